@@ -0,0 +1,123 @@
+import os
+import tarfile
+import zipfile
+
+TAR_COMPRESSIONS = {'.tar': '', '.tar.gz': 'gz', '.tgz': 'gz', '.tar.bz2': 'bz2', '.tar.xz': 'xz'} # Compression of the tar archives by extension
+
+def get_archive_extension(path: str):
+    """
+    Return the archive extension of the path, or None when it is not a zip or tar archive
+    """
+    name = path.lower()
+
+    for ext in ['.zip'] + list(TAR_COMPRESSIONS):
+        if name.endswith(ext):
+            return ext
+
+    return None
+
+def is_archive(path: str):
+    """
+    Return whether the path is a zip or tar archive from its extension
+    """
+    return get_archive_extension(path) != None
+
+def get_archive_stem(path: str):
+    """
+    Return the path of the archive without its archive extension
+    """
+    return path[:len(path) - len(get_archive_extension(path))]
+
+def get_member_path(name: str):
+    """
+    Return the normalized relative path of an archive member name.
+    Raise a ValueError when the member would be written outside of the output folder.
+    """
+    path = os.path.normpath(name.replace('\\', '/'))
+
+    if os.path.isabs(path) or path.split(os.sep)[0] == '..':
+        raise ValueError('Unsafe archive member path : ' + name)
+
+    return path
+
+class ArchiveReader():
+    """
+    Zip or tar archive read member by member in archive order, so that compressed tar archives are read in a single pass without extracting them
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+        if get_archive_extension(path) == '.zip':
+            self.zip = zipfile.ZipFile(path)
+            self.tar = None
+        else:
+            self.zip = None
+            self.tar = tarfile.open(path, 'r|*')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def members(self, extensions: tuple):
+        """
+        Yield the normalized path, the size and a file object of every regular file of the archive with one of the extensions, in archive order.
+        Each file object must be read before the next member.
+        """
+        if self.zip != None:
+            for info in self.zip.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(extensions):
+                    with self.zip.open(info) as file:
+                        yield get_member_path(info.filename), info.file_size, file
+        else:
+            for member in self.tar:
+                if member.isfile() and member.name.lower().endswith(extensions):
+                    yield get_member_path(member.name), member.size, self.tar.extractfile(member)
+
+    def close(self):
+        """
+        Close the archive
+        """
+        if self.zip != None:
+            self.zip.close()
+        else:
+            self.tar.close()
+
+class ArchiveWriter():
+    """
+    Zip or tar archive written file by file, compressed according to its extension
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+        if get_archive_extension(path) == '.zip':
+            self.zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+            self.tar = None
+        else:
+            self.zip = None
+            self.tar = tarfile.open(path, 'w:' + TAR_COMPRESSIONS[get_archive_extension(path)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, path: str, name: str):
+        """
+        Add the file to the archive with the specified member name
+        """
+        if self.zip != None:
+            self.zip.write(path, name)
+        else:
+            self.tar.add(path, name)
+
+    def close(self):
+        """
+        Close the archive, writing its end
+        """
+        if self.zip != None:
+            self.zip.close()
+        else:
+            self.tar.close()
@@ -0,0 +1,73 @@
+from enum import Enum
+from imgformat import Platform
+from typing import Optional
+
+class Direction(Enum):
+    """
+    Enum of the conversion directions of a backend
+    """
+    ENCODE = 'encode' # Image to IMG file
+    DECODE = 'decode' # IMG file to image
+
+class Backend():
+    """
+    Codec backend converting the textures of some platforms and formats, with a relative cost used to pick the fastest available backend
+    """
+    def __init__(self, name: str, description: str, cost: int, available):
+        self.name = name
+        self.description = description
+        self.cost = cost
+        self.available = available # Function returning whether the backend can run
+        self.capabilities = []
+
+    def add(self, direction: Direction, platforms: list, textures: list, mipmap: Optional[int]=None, exts: Optional[tuple]=None):
+        """
+        Add the support of the specified direction, platforms and texture formats, up to a mipmap count and for some image extensions only when specified.
+        Return the backend.
+        """
+        self.capabilities.append((direction, list(platforms), list(textures), mipmap, exts))
+        return self
+
+    def is_available(self):
+        """
+        Return whether the backend can run, its libraries being installed or its tool configured
+        """
+        return self.available()
+
+    def supports(self, platform: Platform, texture, direction: Direction, mipmap=1, ext: Optional[str]=None):
+        """
+        Return whether the backend supports the specified platform, texture format, direction, mipmap count and image extension
+        """
+        for d, platforms, textures, max_mipmap, exts in self.capabilities:
+            if d == direction and platform in platforms and texture in textures and (max_mipmap == None or mipmap <= max_mipmap) and (exts == None or ext == None or ext.lower() in exts):
+                return True
+        return False
+
+BACKENDS = {} # Registered backends by name
+
+def register(backend: Backend):
+    """
+    Register the backend, replacing any backend with the same name.
+    Return the backend.
+    """
+    BACKENDS[backend.name] = backend
+    return backend
+
+def get_backends():
+    """
+    Return the list of the registered backends, from the cheapest to the most expensive
+    """
+    return sorted(BACKENDS.values(), key=lambda backend: backend.cost)
+
+def select(platform: Platform, texture, direction: Direction, mipmap=1, ext: Optional[str]=None, name: Optional[str]=None):
+    """
+    Return the cheapest available backend supporting the specified platform, texture format, direction, mipmap count and image extension.
+    Only the backend with the specified name is considered when a name is specified.
+    """
+    for backend in get_backends():
+        if (name == None or backend.name == name) and backend.supports(platform, texture, direction, mipmap, ext) and backend.is_available():
+            return backend
+
+    if name != None:
+        raise ValueError('The ' + name + ' backend is not available or cannot ' + direction.value + ' ' + platform.fullname + ' ' + texture.name + ' textures')
+    raise ValueError('No available backend can ' + direction.value + ' ' + platform.fullname + ' ' + texture.name + ' textures')
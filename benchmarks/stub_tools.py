@@ -0,0 +1,162 @@
+import os
+import stat
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gx2 import GX2Surface
+from textureformat import DDSFormat, TEX0Format
+
+# Deterministic local stand-ins of PVRTexToolCLI, wimgt and gtx_extract.
+# They write files with the layout of the real tools, filled with a fixed byte pattern instead of encoded textures, so benchmarks run offline.
+
+PATTERN = bytes(range(256)) * 4096 # Fixed image data pattern, 1 MiB
+
+def __fill(size: int):
+    """
+    Return size bytes of the fixed pattern
+    """
+    return (PATTERN * (size // len(PATTERN) + 1))[:size]
+
+def __option(args: list, name: str, default=None):
+    """
+    Return the value following the option name in the arguments
+    """
+    return args[args.index(name) + 1] if name in args else default
+
+def __get_image_size(path: str):
+    """
+    Return the width and height of a PNG file from its header
+    """
+    file = open(path, 'rb')
+    header = file.read(24)
+    file.close()
+
+    return struct.unpack('>II', header[16:24])
+
+def __write_png(dest: str):
+    """
+    Write a fixed 4x4 RGBA PNG file
+    """
+    import numpy
+    from pngfile import write_png
+
+    write_png(dest, numpy.full((4, 4, 4), 128, dtype=numpy.uint8))
+
+def pvrtextoolcli(args: list):
+    """
+    Stand-in of PVRTexToolCLI: encode to DDS or PVR files, or decode to a fixed PNG file
+    """
+    if '-d' in args:
+        __write_png(__option(args, '-d'))
+        return
+
+    output = __option(args, '-o')
+    mipmap = int(__option(args, '-m', '1'))
+
+    if '-r' in args:
+        width, height = (int(x) for x in __option(args, '-r').split(','))
+    else:
+        width, height = __get_image_size(__option(args, '-i'))
+
+    file = open(output, 'wb')
+
+    if output.endswith('.pvr'):
+        size = 0
+        w = width
+        h = height
+
+        for _ in range(mipmap):
+            size += max(8, w) * max(8, h) // 2
+            w //= 2
+            h //= 2
+
+        # PVR 3 header with a 39 bytes metadata block
+        header = bytearray(52)
+        header[0:4] = b'PVR\x03'
+        header[24:28] = height.to_bytes(4, byteorder='little')
+        header[28:32] = width.to_bytes(4, byteorder='little')
+        header[44:48] = mipmap.to_bytes(4, byteorder='little')
+        header[48:52] = (39).to_bytes(4, byteorder='little')
+        file.write(header + bytes(39) + __fill(size))
+    else:
+        dds = DDSFormat.from_string(__option(args, '-f'))
+        file.write(dds.get_header(width, height, mipmap) + __fill(dds.get_size_mipmap(width, height, mipmap)))
+
+    file.close()
+
+def wimgt(args: list):
+    """
+    Stand-in of wimgt: encode to TEX0 files followed by name metadata, or decode to a fixed PNG file
+    """
+    if args[0] == 'decode':
+        __write_png(__option(args, '-d'))
+        return
+
+    tex0 = TEX0Format.from_string(__option(args, '-x'))
+    mipmap = int(__option(args, '--n-mm', '0')) + 1
+    width, height = __get_image_size(args[1])
+
+    file = open(__option(args, '-d'), 'wb')
+    file.write(tex0.get_header(width, height, mipmap) + __fill(tex0.get_size_mipmap(width, height, mipmap)) + b'\x00\x00\x00\x07texture')
+    file.close()
+
+def gtx_extract(args: list):
+    """
+    Stand-in of gtx_extract: convert DDS files to GTX files, or GTX files to a fixed PNG file
+    """
+    source = args[-1]
+    output = __option(args, '-o')
+
+    if not source.endswith('.dds'):
+        __write_png(output)
+        return
+
+    file = open(source, 'rb')
+    blob = file.read()
+    file.close()
+
+    width, height = DDSFormat.get_sizes_from_header(blob)
+    mipmap = int.from_bytes(blob[28:32], byteorder='little')
+    dds = next(dds for dds in DDSFormat if blob[84:88] == dds.dxt[0:4])
+    surface = GX2Surface.from_dds(width, height, dds, mipmap)
+
+    # GTX header, GX2 Surface block, padding up to the image data and end of file block
+    gtx = bytearray(64) + surface.get_texture()
+    gtx += bytes(4096 - len(gtx))
+    gtx += __fill(surface.image_size)
+    gtx += bytes(32)
+
+    file = open(output, 'wb')
+    file.write(gtx)
+    file.close()
+
+TOOLS = {
+    'PVRTexToolCLI': pvrtextoolcli,
+    'wimgt': wimgt,
+    'gtx_extract': gtx_extract
+}
+
+def install(folder: str):
+    """
+    Write a launcher of every stand-in tool to the folder.
+    Return a dictionary of the config.ini paths of the tools.
+    """
+    paths = {}
+
+    for name in TOOLS:
+        path = os.path.join(folder, name + '.py')
+
+        file = open(path, 'w')
+        file.write('#!' + sys.executable + '\n')
+        file.write('import sys\n')
+        file.write('sys.path.insert(0, ' + repr(os.path.dirname(os.path.abspath(__file__))) + ')\n')
+        file.write('import stub_tools\n')
+        file.write('stub_tools.TOOLS[' + repr(name) + '](sys.argv[1:])\n')
+        file.close()
+
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        paths[name] = path
+
+    return paths
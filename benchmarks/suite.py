@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy
+import stub_tools
+import ghl_img_converter as converter
+
+from backends import Direction, get_backends
+from dxt import Quality
+from imgformat import IMGFormat, Platform
+from imgtexture import IMGTexture
+from pngfile import write_png
+from swap import get_backend, swap16, swap32
+from textureformat import DDSFormat, PVRFormat, TEX0Format
+
+def get_textures(img: IMGFormat):
+    """
+    Return the texture formats of the specified IMG format
+    """
+    if img.platform == Platform.IOS:
+        return [PVRFormat.PVRTC1_4]
+    if img.platform == Platform.WII:
+        return list(TEX0Format)
+    return list(DDSFormat)
+
+def get_combinations(sizes: list, mipmaps: list):
+    """
+    Return every IMG format, texture format, size and mipmap count combination
+    """
+    return [(img, texture, size, mipmap) for img in IMGFormat for texture in get_textures(img) for size in sizes for mipmap in mipmaps]
+
+def get_name(*parts):
+    """
+    Return the name of a benchmark from its parts
+    """
+    return '/'.join(str(part.name if hasattr(part, 'name') else part) for part in parts)
+
+def measure(func, repeat: int, number=1):
+    """
+    Time repeat runs of number calls of the function.
+    Return a dictionary of the best and median times in seconds of one call.
+    """
+    times = [seconds / number for seconds in timeit.repeat(func, number=number, repeat=repeat)]
+
+    return {'seconds': min(times), 'median': statistics.median(times)}
+
+def record(results: list, name: str, stage: str, timing: dict, size=0, files=0, ops=0):
+    """
+    Append a benchmark result with its throughputs, computed from its best time, to the results
+    """
+    seconds = timing['seconds']
+    result = {'name': name, 'stage': stage, 'seconds': seconds, 'median': timing['median']}
+
+    if size > 0:
+        result['mb_per_s'] = size / seconds / 1000000
+    if files > 0:
+        result['files_per_s'] = files / seconds
+    if ops > 0:
+        result['ops_per_s'] = ops / seconds
+
+    results.append(result)
+
+def bench_headers(results: list, combinations: list, repeat: int):
+    """
+    Time building and parsing the IMG header of every combination
+    """
+    for img, texture, size, mipmap in combinations:
+        header = img.get_header(size, size, texture, mipmap)
+
+        def parse():
+            platform = IMGFormat.from_img(header).platform
+            platform.get_width_from_img(header)
+            platform.get_height_from_img(header)
+            platform.get_mipmap_from_img(header)
+
+        record(results, get_name('header/build', img, texture, str(size) + 'x' + str(mipmap)), 'header', measure(lambda: img.get_header(size, size, texture, mipmap), repeat, 1000), ops=1)
+        record(results, get_name('header/parse', img, texture, str(size) + 'x' + str(mipmap)), 'header', measure(parse, repeat, 1000), ops=1)
+
+def bench_swaps(results: list, sizes: list, mipmaps: list, repeat: int):
+    """
+    Time the byte swaps of every DDS format and platform
+    """
+    for dds in DDSFormat:
+        for size in sizes:
+            for mipmap in mipmaps:
+                blob = bytearray(stub_tools.PATTERN[0:1]) * dds.get_size_mipmap(size, size, mipmap)
+                swaps = [('x360', [swap16] + ([] if dds.compressed else [swap32]))] + ([] if dds.compressed else [('abgr', [swap32])])
+
+                for name, funcs in swaps:
+                    def run():
+                        for swap in funcs:
+                            swap(blob)
+
+                    record(results, get_name('swap', name, dds, str(size) + 'x' + str(mipmap)), 'swap', measure(run, repeat), size=len(blob))
+
+def bench_sizes(results: list, combinations: list, repeat: int):
+    """
+    Time the mipmap size computations of every combination
+    """
+    for img, texture, size, mipmap in combinations:
+        if img.platform != Platform.IOS:
+            record(results, get_name('size', img, texture, str(size) + 'x' + str(mipmap)), 'size', measure(lambda: texture.get_size_mipmap(size, size, mipmap), repeat, 1000), ops=1)
+
+def get_convert_backends(img: IMGFormat, texture, mipmap: int):
+    """
+    Return the names of the registered backends able to convert to the specified IMG format, texture format and mipmap count
+    """
+    return [backend.name for backend in get_backends() if backend.supports(img.platform, texture, Direction.ENCODE, mipmap)]
+
+def convert(source: str, dest: str, img: IMGFormat, texture, mipmap: int, backend: str):
+    """
+    Convert the source image to the IMG file with the specified backend
+    """
+    if img.platform == Platform.IOS:
+        converter.create_ios_img(source, dest, pvr=texture, mipmap=mipmap)
+    elif img.platform == Platform.WII:
+        converter.create_wii_img(source, dest, texture, img.game, mipmap, Quality.FAST if backend == 'native' else None)
+    else:
+        converter.create_imgs(source, {img.platform: dest}, dds=texture, game=img.game, mipmap=mipmap, quality=None if backend == 'pvrtextoolcli' else Quality.FAST, native_tiling=backend != 'gtx_extract')
+
+def bench_convert(results: list, combinations: list, repeat: int, folder: str):
+    """
+    Time the conversion of synthetic images with every backend of every combination.
+    Return the list of the IMG files converted by the cheapest backend of every combination, with their combination.
+    """
+    converted = []
+    sources = {}
+
+    for img, texture, size, mipmap in combinations:
+        if size not in sources:
+            sources[size] = os.path.join(folder, 'source_' + str(size) + '.png')
+            write_png(sources[size], numpy.random.default_rng(size).integers(0, 256, (size, size, 4), dtype=numpy.uint8))
+
+        for i, backend in enumerate(get_convert_backends(img, texture, mipmap)):
+            dest = os.path.join(folder, get_name(img, texture, size, mipmap, backend).replace('/', '_') + '.img')
+            timing = measure(lambda: convert(sources[size], dest, img, texture, mipmap, backend), repeat)
+
+            record(results, get_name('convert', backend, img, texture, str(size) + 'x' + str(mipmap)), 'convert', timing, size=os.path.getsize(dest), files=1)
+
+            if i == 0:
+                converted.append((img, texture, size, mipmap, dest))
+
+    return converted
+
+def bench_io(results: list, converted: list, repeat: int, folder: str):
+    """
+    Time mapping every converted IMG file, reading its first mip level and copying its payload
+    """
+    for img, texture, size, mipmap, source in converted:
+        if img.platform == Platform.WIIU:
+            continue
+
+        dest = os.path.join(folder, 'copy.img')
+
+        def read():
+            with IMGTexture(source, img.platform) as mapped:
+                bytes(mapped.get_level(0))
+
+        def copy():
+            with IMGTexture(source, img.platform) as mapped:
+                mapped.write(dest, mapped.header)
+
+        name = str(size) + 'x' + str(mipmap)
+        record(results, get_name('io/read', img, texture, name), 'io', measure(read, repeat), size=texture.get_size(size, size), files=1)
+        record(results, get_name('io/copy', img, texture, name), 'io', measure(copy, repeat), size=os.path.getsize(source), files=1)
+
+def bench_extract(results: list, converted: list, repeat: int, folder: str):
+    """
+    Time the extraction of every converted IMG file with every backend able to extract it to PNG
+    """
+    dest = os.path.join(folder, 'extract.png')
+
+    for img, texture, size, mipmap, source in converted:
+        for backend in get_backends():
+            if backend.supports(img.platform, texture, Direction.DECODE, mipmap, '.png'):
+                timing = measure(lambda: converter.extract_img(source, dest, img.platform, backend.name), repeat)
+                record(results, get_name('extract', backend.name, img, texture, str(size) + 'x' + str(mipmap)), 'extract', timing, size=os.path.getsize(source), files=1)
+
+def compare(results: list, baseline: dict, tolerance: float, min_delta: float):
+    """
+    Print the results whose median time is slower than their baseline by more than the tolerance, and by at least min_delta seconds.
+    The absolute floor ignores the noise of the shortest benchmarks, such as the header and size ones timed in microseconds, and baselines saved without median times are compared by their best times.
+    Return the number of regressions.
+    """
+    baselines = {result['name']: result for result in baseline['results']}
+    regressions = 0
+
+    for result in results:
+        if result['name'] not in baselines:
+            continue
+
+        base = baselines[result['name']]
+        key = 'median' if 'median' in base else 'seconds'
+        old = base[key]
+        new = result[key]
+
+        if new > old * (1 + tolerance) and new - old >= min_delta:
+            regressions += 1
+            print('Regression : ' + result['name'] + ' {:.3f} ms instead of {:.3f} ms ({:+.0f}%)'.format(new * 1000, old * 1000, (new / old - 1) * 100))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of every platform and format path of the IMG converter, with stand-ins of the external tools')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024], help='Width and height of the benchmarked textures. Default option is 256 1024')
+    parser.add_argument('--mipmaps', type=int, nargs='+', default=[1, 4], help='Mipmap counts of the benchmarked textures. Default option is 1 4')
+    parser.add_argument('--stages', choices=['header', 'swap', 'size', 'convert', 'io', 'extract'], nargs='+', default=['header', 'swap', 'size', 'convert', 'io', 'extract'], help='Benchmarked stages, io and extract also run convert. Default option is every stage')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, the best one is reported and the median one compared to the baseline. Default option is 3')
+    parser.add_argument('--output', help='Path of the JSON file to save the results and the environment to')
+    parser.add_argument('--baseline', help='Path of a saved JSON results file to compare against, the suite exits with a non-zero status on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Relative slowdown from the baseline reported as a regression. Default option is 0.25')
+    parser.add_argument('--min-delta', type=float, default=1, help='Smallest slowdown from the baseline in milliseconds reported as a regression, ignoring the noise of the shortest benchmarks. Default option is 1')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='ghlimg-benchmark-')
+    results = []
+
+    try:
+        # Replace the external tools with their stand-ins
+        if not converter.config.has_section('path'):
+            converter.config.add_section('path')
+        for name, path in stub_tools.install(folder).items():
+            converter.config.set('path', name, path)
+
+        combinations = get_combinations(args.sizes, args.mipmaps)
+
+        if 'header' in args.stages:
+            bench_headers(results, combinations, args.repeat)
+        if 'swap' in args.stages:
+            bench_swaps(results, args.sizes, args.mipmaps, args.repeat)
+        if 'size' in args.stages:
+            bench_sizes(results, combinations, args.repeat)
+        if 'convert' in args.stages or 'io' in args.stages or 'extract' in args.stages:
+            converted = bench_convert(results, combinations, args.repeat, folder)
+
+            if 'io' in args.stages:
+                bench_io(results, converted, args.repeat, folder)
+            if 'extract' in args.stages:
+                bench_extract(results, converted, args.repeat, folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    report = {
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count(), 'swap': get_backend(), 'numpy': numpy.__version__},
+        'options': {'sizes': args.sizes, 'mipmaps': args.mipmaps, 'repeat': args.repeat},
+        'results': results
+    }
+
+    print('Swap backend : ' + get_backend())
+    print('{:<48}{:>12}{:>12}{:>12}'.format('Benchmark', 'Time (ms)', 'MB/s', 'Files/s'))
+
+    for result in results:
+        print('{:<48}{:>12.3f}{:>12}{:>12}'.format(result['name'], result['seconds'] * 1000, '{:.1f}'.format(result['mb_per_s']) if 'mb_per_s' in result else '', '{:.1f}'.format(result['files_per_s']) if 'files_per_s' in result else ''))
+
+    if args.output != None:
+        file = open(args.output, 'w')
+        json.dump(report, file, indent=1)
+        file.close()
+        print(str(len(results)) + ' results saved to ' + args.output)
+
+    if args.baseline != None:
+        file = open(args.baseline)
+        baseline = json.load(file)
+        file.close()
+
+        regressions = compare(results, baseline, args.tolerance, args.min_delta / 1000)
+        print(str(regressions) + ' regressions against ' + args.baseline)
+
+        if regressions > 0:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
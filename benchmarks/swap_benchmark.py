@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from swap import get_backend, swap16, swap32
+from textureformat import DDSFormat
+
+def legacy_swap16(blob: bytearray, start: int):
+    """
+    Swap bytes of every 16 bits word with the original per byte loop
+    """
+    for i in range(start, len(blob), 2):
+        blob[i], blob[i + 1] = blob[i + 1], blob[i]
+
+def legacy_swap32(blob: bytearray, start: int):
+    """
+    Reverse bytes of every 32 bits word with the original per byte loop
+    """
+    for i in range(start, len(blob), 4):
+        blob[i], blob[i + 1], blob[i + 2], blob[i + 3] = blob[i + 3], blob[i + 2], blob[i + 1], blob[i]
+
+def get_paths(dds: DDSFormat):
+    """
+    Return the swap paths used by the converter for the specified DDS format
+    """
+    paths = [('X360', legacy_swap16 if dds.compressed else lambda blob, start: (legacy_swap16(blob, start), legacy_swap32(blob, start)), swap16 if dds.compressed else lambda blob, start: (swap16(blob, start), swap32(blob, start)))]
+
+    if not dds.compressed:
+        paths.append(('PS3, PC, X1', legacy_swap32, swap32))
+
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark of the byte swaps used by the IMG converter')
+    parser.add_argument('--size', type=int, default=512, help='Width and height of the benchmarked texture. Default option is 512')
+    parser.add_argument('--mipmap', type=int, default=1, help='Mipmap count of the benchmarked texture. Default option is 1')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, the best one is kept. Default option is 3')
+    args = parser.parse_args()
+
+    print('Swap backend : ' + get_backend())
+    print('{:<10}{:<14}{:>12}{:>14}{:>14}{:>10}'.format('Format', 'Platforms', 'Size (KiB)', 'Loop (ms)', 'Bulk (ms)', 'Speedup'))
+
+    for dds in DDSFormat:
+        start = dds.get_header_size()
+        blob = bytearray(os.urandom(start + dds.get_size_mipmap(args.size, args.size, args.mipmap)))
+
+        for platforms, legacy, bulk in get_paths(dds):
+            expected = bytearray(blob)
+            legacy(expected, start)
+            result = bytearray(blob)
+            bulk(result, start)
+
+            if result != expected:
+                raise AssertionError('Bulk swap does not match the original loop for ' + dds.name)
+
+            legacy_time = min(timeit.repeat(lambda: legacy(bytearray(blob), start), number=1, repeat=args.repeat))
+            bulk_time = min(timeit.repeat(lambda: bulk(bytearray(blob), start), number=1, repeat=args.repeat))
+
+            print('{:<10}{:<14}{:>12}{:>14.2f}{:>14.3f}{:>9.0f}x'.format(dds.name, platforms, (len(blob) - start) // 1024, legacy_time * 1000, bulk_time * 1000, legacy_time / bulk_time))
+
+if __name__ == '__main__':
+    main()
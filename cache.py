@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409 # Linux ioctl sharing the blocks of a file with another file on copy-on-write file systems
+
+def hash_file(path: str, hash=None):
+    """
+    Update the hash object with the bytes of the file, a new SHA-256 hash by default.
+    Return the hash object.
+    """
+    if hash == None:
+        hash = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            hash.update(chunk)
+
+    return hash
+
+def clone_file(source: str, dest: str, link=False):
+    """
+    Copy the source file to the destination file, sharing their blocks when the file system supports it, or hardlink it when link is true.
+    The copy is written next to the destination file first, so that an existing destination file is only replaced once the copy is complete, and left untouched when the source file does not exist.
+    """
+    temp = dest + '.' + str(os.getpid()) + '.tmp'
+
+    if os.path.lexists(temp):
+        # Left by a crashed process with the same process identifier
+        os.remove(temp)
+
+    try:
+        if link:
+            os.link(source, temp)
+        else:
+            __copy_file(source, temp)
+
+        os.replace(temp, dest)
+    except BaseException:
+        if os.path.lexists(temp):
+            os.remove(temp)
+        raise
+
+def __copy_file(source: str, dest: str):
+    """
+    Copy the source file to a new destination file, sharing their blocks when the file system supports it
+    """
+    if fcntl != None:
+        try:
+            with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+            return
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # No copy-on-write support, copy the bytes
+            pass
+
+    shutil.copyfile(source, dest)
+
+def break_link(path: str):
+    """
+    Replace a hardlinked file by a copy of its own before it is modified in place, so that the cache entries and the other outputs sharing its content are left untouched.
+    Return whether the file was hardlinked.
+    """
+    if os.stat(path).st_nlink <= 1:
+        return False
+
+    # Copy next to the file first so that the file is replaced at once
+    temp = path + '.' + str(os.getpid()) + '.tmp'
+    __copy_file(path, temp)
+    shutil.copystat(path, temp)
+    os.replace(temp, path)
+
+    return True
+
+class ConversionCache():
+    """
+    Content addressed cache of converted IMG files.
+    The least recently used entries above its maximum size are removed by evict, called once at the end of a batch.
+    """
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size # Maximum size in bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+
+    def get_key(self, source: str, options: dict):
+        """
+        Return the key of the source file converted with the specified options, hashing the bytes of the source file and the options
+        """
+        hash = hash_file(source)
+        hash.update(json.dumps(options, sort_keys=True).encode())
+
+        return hash.hexdigest()
+
+    def get_entry(self, key: str):
+        """
+        Return the path of the cache entry of the specified key
+        """
+        return os.path.join(self.path, key[0:2], key + '.img')
+
+    def get_marker(self, key: str):
+        """
+        Return the path of the empty file whose modification time marks the last use of the cache entry of the specified key.
+        The entry itself is not touched, as its hardlinks share its modification time.
+        """
+        return os.path.join(self.path, key[0:2], key + '.used')
+
+    def fetch(self, key: str, dest: str, link=False):
+        """
+        Copy the cache entry of the specified key to the destination file, sharing their blocks when the file system supports it, or hardlink it when link is true.
+        Hardlinked outputs must be unshared with break_link before being modified in place.
+        An existing destination file is left untouched on a cache miss.
+        Return True on a cache hit, False otherwise.
+        """
+        entry = self.get_entry(key)
+
+        try:
+            clone_file(entry, dest, link)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+        # Mark the entry as recently used
+        open(self.get_marker(key), 'a').close()
+        os.utime(self.get_marker(key))
+        self.hits += 1
+
+        return True
+
+    def store(self, key: str, source: str):
+        """
+        Store a copy of the converted source file as the cache entry of the specified key
+        """
+        entry = self.get_entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        # Write to a temporary file first so that concurrent conversions never read a partial entry
+        temp = entry + '.' + str(os.getpid()) + '.tmp'
+        shutil.copyfile(source, temp)
+        os.replace(temp, entry)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in its maximum size.
+        An entry was last used when it was stored or when its marker was last touched by fetch.
+        """
+        entries = []
+        size = 0
+
+        for folder in os.scandir(self.path):
+            if folder.is_dir():
+                used = {}
+                files = []
+
+                for entry in os.scandir(folder.path):
+                    if entry.name.endswith('.used'):
+                        used[entry.name[:-5]] = entry.stat().st_mtime
+                    elif entry.name.endswith('.img'):
+                        files.append(entry)
+
+                for entry in files:
+                    stat = entry.stat()
+                    entries.append((max(stat.st_mtime, used.get(entry.name[:-4], 0)), stat.st_size, entry.path))
+                    size += stat.st_size
+
+        entries.sort()
+
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                # Already evicted by a concurrent conversion
+                pass
+
+            try:
+                os.remove(path[:-4] + '.used')
+            except FileNotFoundError:
+                pass
+
+            size -= entry_size
@@ -0,0 +1,405 @@
+import multiprocessing
+import os
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import repeat
+from textureformat import DDSFormat
+from typing import Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ENCODER_VERSION = 1 # Version of the built-in encoders output, part of the conversion cache keys
+
+def __expand_565(color):
+    """
+    Return the RGB channels of an array of RGB565 colors expanded to 8 bits
+    """
+    r = (color >> 11) & 0x1F
+    g = (color >> 5) & 0x3F
+    b = color & 0x1F
+
+    return numpy.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1)
+
+def __decode_color(blocks, opaque: bool):
+    """
+    Decode the 8 bytes BC1 color blocks.
+    Return an array of RGBA pixels with shape (blocks, 16, 4).
+    """
+    c0 = blocks[:, 0].astype(numpy.uint16) | (blocks[:, 1].astype(numpy.uint16) << 8)
+    c1 = blocks[:, 2].astype(numpy.uint16) | (blocks[:, 3].astype(numpy.uint16) << 8)
+    p0 = __expand_565(c0).astype(numpy.int32)
+    p1 = __expand_565(c1).astype(numpy.int32)
+
+    # Build the 4 colors palette of every block
+    palette = numpy.empty((len(blocks), 4, 4), dtype=numpy.uint8)
+    palette[:, 0, :3] = p0
+    palette[:, 1, :3] = p1
+    palette[:, :, 3] = 255
+
+    four = (c0 > c1)[:, None] if not opaque else numpy.ones((len(blocks), 1), dtype=bool)
+    palette[:, 2, :3] = numpy.where(four, (2 * p0 + p1) // 3, (p0 + p1) // 2)
+    palette[:, 3, :3] = numpy.where(four, (p0 + 2 * p1) // 3, 0)
+    palette[:, 3, 3] = numpy.where(four[:, 0], 255, 0)
+
+    # 2 bits index per pixel, first pixel in the lowest bits
+    bits = blocks[:, 4:8].copy().view('<u4')
+    indices = (bits >> (2 * numpy.arange(16, dtype=numpy.uint32))) & 3
+
+    return numpy.take_along_axis(palette, indices[:, :, None].astype(numpy.intp), axis=1)
+
+def __decode_explicit_alpha(blocks):
+    """
+    Decode the 8 bytes BC2 alpha blocks.
+    Return an array of alpha values with shape (blocks, 16).
+    """
+    bits = blocks.copy().view('<u8')
+    alpha = (bits >> (4 * numpy.arange(16, dtype=numpy.uint64))) & 0xF
+
+    return (alpha * 17).astype(numpy.uint8)
+
+def __decode_interpolated_alpha(blocks):
+    """
+    Decode the 8 bytes BC3 alpha blocks.
+    Return an array of alpha values with shape (blocks, 16).
+    """
+    a0 = blocks[:, 0].astype(numpy.int32)
+    a1 = blocks[:, 1].astype(numpy.int32)
+    eight = (a0 > a1)[:, None]
+    i = numpy.arange(1, 7, dtype=numpy.int32)
+
+    # Build the 8 alpha values palette of every block
+    palette = numpy.empty((len(blocks), 8), dtype=numpy.int32)
+    palette[:, 0] = a0
+    palette[:, 1] = a1
+    palette[:, 2:8] = numpy.where(eight, ((7 - i) * a0[:, None] + i * a1[:, None]) // 7, 0)
+    palette[:, 2:6] = numpy.where(eight, palette[:, 2:6], ((5 - i[:4]) * a0[:, None] + i[:4] * a1[:, None]) // 5)
+    palette[:, 6:8] = numpy.where(eight, palette[:, 6:8], [0, 255])
+
+    # 3 bits index per pixel stored in the 48 last bits, first pixel in the lowest bits
+    bits = numpy.zeros((len(blocks), 8), dtype=numpy.uint8)
+    bits[:, :6] = blocks[:, 2:8]
+    bits = bits.view('<u8')
+    indices = (bits >> (3 * numpy.arange(16, dtype=numpy.uint64))) & 7
+
+    return numpy.take_along_axis(palette, indices.astype(numpy.intp), axis=1).astype(numpy.uint8)
+
+def unblock(pixels, width: int, height: int, block_width: int, block_height: int):
+    """
+    Rearrange an array of pixels grouped by blocks in rows of blocks to an array of pixels with shape (height, width, channels)
+    """
+    blocks_x = max(1, (width + block_width - 1) // block_width)
+    blocks_y = max(1, (height + block_height - 1) // block_height)
+    pixels = pixels.reshape(blocks_y, blocks_x, block_height, block_width, -1).transpose(0, 2, 1, 3, 4)
+
+    return pixels.reshape(blocks_y * block_height, blocks_x * block_width, -1)[:height, :width]
+
+def decode(blob: bytes, width: int, height: int, dds: DDSFormat):
+    """
+    Decode a single DDS texture level with the specified width, height and format.
+    Return an array of RGBA pixels with shape (height, width, 4).
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to decode DDS textures')
+
+    size = dds.get_size(width, height)
+
+    if len(blob) < size:
+        raise ValueError('Texture data is too small for its size and format')
+
+    if not dds.compressed:
+        return numpy.frombuffer(blob, dtype=numpy.uint8, count=size).reshape(height, width, 4)
+
+    blocks = numpy.frombuffer(blob, dtype=numpy.uint8, count=size).reshape(-1, dds.size)
+
+    return unblock(decode_blocks(blocks, dds), width, height, dds.width, dds.height)
+
+def decode_blocks(blocks, dds: DDSFormat):
+    """
+    Decode an array of blocks of a compressed DDS format with shape (blocks, block size).
+    Return an array of RGBA pixels with shape (blocks, 16, 4).
+    """
+    if dds == DDSFormat.BC1:
+        return __decode_color(blocks, False)
+
+    pixels = __decode_color(blocks[:, 8:16], True)
+
+    if dds == DDSFormat.BC2:
+        pixels[:, :, 3] = __decode_explicit_alpha(blocks[:, 0:8])
+    else:
+        pixels[:, :, 3] = __decode_interpolated_alpha(blocks[:, 0:8])
+
+    return pixels
+
+def decode_mipmap(blob: bytes, width: int, height: int, dds: DDSFormat, mipmap: int):
+    """
+    Decode every level of a DDS texture with the specified width, height, format and mipmap count.
+    Return a list of arrays of RGBA pixels, one for each mip level.
+    """
+    levels = []
+    offset = 0
+
+    for level in range(mipmap):
+        w = max(1, width >> level)
+        h = max(1, height >> level)
+        levels.append(decode(memoryview(blob)[offset:], w, h, dds))
+        offset += dds.get_size(w, h)
+
+    return levels
+
+class Quality(Enum):
+    """
+    Enum of the quality presets of the built-in encoder
+    """
+    FAST = 'fast' # Range fit along the principal axis of each block
+    HIGH = 'high' # Range fit refined with least squares endpoints
+
+    @staticmethod
+    def from_string(value: str):
+        """
+        Return the quality preset associated with its name as defined in the command line options
+        """
+        for quality in Quality:
+            if value == quality.value:
+                return quality
+        raise ValueError('Unknown quality')
+
+def blockify(pixels, block_width=4, block_height=4):
+    """
+    Pad an array of pixels with shape (height, width, channels) to whole blocks by repeating its edges.
+    Return an array of pixels grouped by blocks in rows of blocks with shape (blocks, block_width * block_height, channels).
+    """
+    height, width, channels = pixels.shape
+    pixels = numpy.pad(pixels, ((0, -height % block_height), (0, -width % block_width), (0, 0)), mode='edge')
+    blocks_y = pixels.shape[0] // block_height
+    blocks_x = pixels.shape[1] // block_width
+
+    return pixels.reshape(blocks_y, block_height, blocks_x, block_width, channels).transpose(0, 2, 1, 3, 4).reshape(-1, block_width * block_height, channels)
+
+def __quantize_565(color):
+    """
+    Return the RGB565 colors nearest to an array of RGB colors
+    """
+    color = numpy.clip(color, 0, 255)
+    r = numpy.rint(color[:, 0] * 31 / 255).astype(numpy.uint16)
+    g = numpy.rint(color[:, 1] * 63 / 255).astype(numpy.uint16)
+    b = numpy.rint(color[:, 2] * 31 / 255).astype(numpy.uint16)
+
+    return (r << 11) | (g << 5) | b
+
+def __get_palette(c0, c1, four):
+    """
+    Return the 4 colors palette of every block as the decoder builds it, with shape (blocks, 4, 3)
+    """
+    p0 = __expand_565(c0).astype(numpy.int32)
+    p1 = __expand_565(c1).astype(numpy.int32)
+    four = four[:, None]
+
+    return numpy.stack([p0, p1, numpy.where(four, (2 * p0 + p1) // 3, (p0 + p1) // 2), numpy.where(four, (p0 + 2 * p1) // 3, 0)], axis=1).astype(numpy.float32)
+
+def __fit_color(rgb, opaque, transparent, c0, c1):
+    """
+    Order the endpoints of every block for its color mode and assign the nearest palette color to every pixel.
+    Return the ordered endpoints, the indices and the squared error of every block.
+    """
+    # Blocks with transparent pixels need the 3 colors mode, the others the 4 colors mode
+    swap = numpy.where(transparent, c0 > c1, c0 < c1)
+    c0, c1 = numpy.where(swap, c1, c0), numpy.where(swap, c0, c1)
+    four = c0 > c1
+
+    palette = __get_palette(c0, c1, four)
+    distance = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=3)
+
+    # Index 3 is transparent black in the 3 colors mode
+    distance[:, :, 3] = numpy.where(four[:, None], distance[:, :, 3], numpy.inf)
+    indices = distance.argmin(axis=2)
+    error = numpy.where(opaque, distance.min(axis=2), 0).sum(axis=1)
+    indices = numpy.where(opaque, indices, 3)
+
+    return c0, c1, indices, error
+
+def __refine_color(rgb, opaque, c0, c1, indices):
+    """
+    Return the endpoints minimizing the squared error of every block for its current indices
+    """
+    four = (c0 > c1)[:, None]
+    weights = numpy.where(four, numpy.array([1, 0, 2 / 3, 1 / 3], dtype=numpy.float32)[indices], numpy.array([1, 0, 1 / 2, 0], dtype=numpy.float32)[indices])
+    weights = numpy.where(opaque, weights, 0)
+    inverse = numpy.where(opaque, 1 - weights, 0)
+
+    # Solve the 2x2 normal equations of every block
+    aa = (weights * weights).sum(axis=1)
+    ab = (weights * inverse).sum(axis=1)
+    bb = (inverse * inverse).sum(axis=1)
+    ax = (weights[:, :, None] * rgb).sum(axis=1)
+    bx = (inverse[:, :, None] * rgb).sum(axis=1)
+    det = aa * bb - ab * ab
+    valid = (numpy.abs(det) > 1e-6)[:, None]
+    det = numpy.where(valid[:, 0], det, 1)[:, None]
+
+    e0 = numpy.where(valid, (bb[:, None] * ax - ab[:, None] * bx) / det, __expand_565(c0))
+    e1 = numpy.where(valid, (aa[:, None] * bx - ab[:, None] * ax) / det, __expand_565(c1))
+
+    return __quantize_565(e0), __quantize_565(e1)
+
+def __encode_color(blocks, alpha: bool, quality: Quality):
+    """
+    Encode the RGB channels of the blocks to 8 bytes BC1 color blocks.
+    Pixels with an alpha lower than 128 are encoded as transparent unless the alpha is encoded separately.
+    """
+    rgb = blocks[:, :, :3].astype(numpy.float32)
+    opaque = (blocks[:, :, 3] >= 128) | alpha
+    transparent = ~opaque.all(axis=1)
+    weights = opaque.astype(numpy.float32)[:, :, None]
+
+    # Principal axis of the opaque pixels of every block
+    count = numpy.maximum(weights.sum(axis=1), 1)
+    mean = (rgb * weights).sum(axis=1) / count
+    centered = (rgb - mean[:, None, :]) * weights
+    covariance = numpy.einsum('nki,nkj->nij', centered, centered)
+    axis = centered[numpy.arange(len(blocks)), (centered ** 2).sum(axis=2).argmax(axis=1)]
+
+    for _ in range(8):
+        axis = numpy.einsum('nij,nj->ni', covariance, axis)
+        norm = numpy.linalg.norm(axis, axis=1, keepdims=True)
+        axis = numpy.where(norm > 0, axis / numpy.maximum(norm, 1e-12), 0)
+
+    # Endpoints at the extremes of the projections on the axis
+    projection = numpy.einsum('nki,ni->nk', rgb - mean[:, None, :], axis)
+    high = numpy.where(opaque, projection, -numpy.inf).max(axis=1, initial=0)[:, None]
+    low = numpy.where(opaque, projection, numpy.inf).min(axis=1, initial=0)[:, None]
+
+    c0, c1, indices, error = __fit_color(rgb, opaque, transparent, __quantize_565(mean + axis * high), __quantize_565(mean + axis * low))
+
+    if quality == Quality.HIGH:
+        for _ in range(2):
+            r0, r1, r_indices, r_error = __fit_color(rgb, opaque, transparent, *__refine_color(rgb, opaque, c0, c1, indices))
+            better = r_error < error
+            c0 = numpy.where(better, r0, c0)
+            c1 = numpy.where(better, r1, c1)
+            indices = numpy.where(better[:, None], r_indices, indices)
+            error = numpy.where(better, r_error, error)
+
+    encoded = numpy.empty((len(blocks), 8), dtype=numpy.uint8)
+    encoded[:, 0:2] = c0.astype('<u2').view(numpy.uint8).reshape(-1, 2)
+    encoded[:, 2:4] = c1.astype('<u2').view(numpy.uint8).reshape(-1, 2)
+    encoded[:, 4:8] = (indices.astype(numpy.uint32) << (2 * numpy.arange(16, dtype=numpy.uint32))).sum(axis=1, dtype=numpy.uint32).astype('<u4').view(numpy.uint8).reshape(-1, 4)
+
+    return encoded
+
+def __encode_explicit_alpha(alpha):
+    """
+    Encode the alpha values of the blocks to 8 bytes BC2 alpha blocks
+    """
+    values = ((alpha.astype(numpy.uint32) * 15 + 127) // 255).astype(numpy.uint64)
+
+    return (values << (4 * numpy.arange(16, dtype=numpy.uint64))).sum(axis=1, dtype=numpy.uint64).astype('<u8').view(numpy.uint8).reshape(-1, 8)
+
+def __encode_interpolated_alpha(alpha):
+    """
+    Encode the alpha values of the blocks to 8 bytes BC3 alpha blocks
+    """
+    a0 = alpha.max(axis=1)
+    a1 = alpha.min(axis=1)
+
+    encoded = numpy.zeros((len(alpha), 8), dtype=numpy.uint8)
+    encoded[:, 0] = a0
+    encoded[:, 1] = a1
+
+    # Nearest of the 8 alpha values, blocks with a single alpha value keep the first index
+    i = numpy.arange(8, dtype=numpy.int32)
+    weights = numpy.array([0, 7, 1, 2, 3, 4, 5, 6], dtype=numpy.int32)
+    palette = ((7 - weights) * a0[:, None].astype(numpy.int32) + weights * a1[:, None].astype(numpy.int32)) // 7
+    indices = numpy.abs(alpha[:, :, None].astype(numpy.int32) - palette[:, None, :]).argmin(axis=2)
+    indices = numpy.where((a0 > a1)[:, None], i[indices], 0).astype(numpy.uint64)
+
+    bits = (indices << (3 * numpy.arange(16, dtype=numpy.uint64))).sum(axis=1, dtype=numpy.uint64)
+    encoded[:, 2:8] = bits.astype('<u8').view(numpy.uint8).reshape(-1, 8)[:, 0:6]
+
+    return encoded
+
+def encode_blocks(blocks, dds: DDSFormat, quality=Quality.HIGH):
+    """
+    Encode an array of blocks of RGBA pixels with shape (blocks, 16, 4) to a compressed DDS format.
+    Return an array of encoded blocks with shape (blocks, block size).
+    """
+    if dds == DDSFormat.BC1:
+        return __encode_color(blocks, False, quality)
+
+    encoded = numpy.empty((len(blocks), 16), dtype=numpy.uint8)
+    encoded[:, 8:16] = __encode_color(blocks, True, quality)
+
+    if dds == DDSFormat.BC2:
+        encoded[:, 0:8] = __encode_explicit_alpha(blocks[:, :, 3])
+    else:
+        encoded[:, 0:8] = __encode_interpolated_alpha(blocks[:, :, 3])
+
+    return encoded
+
+def __encode_rows(pixels, dds: DDSFormat, quality: Quality):
+    """
+    Encode a band of rows of RGBA pixels, whose height is a multiple of the block height
+    """
+    return encode_blocks(blockify(pixels), dds, quality).tobytes()
+
+def __get_jobs(jobs: Optional[int]=None):
+    """
+    Return the number of worker processes encoding a texture, by default the CPU count or 1 in a worker process or thread, so that pools are never nested in the workers of a batch
+    """
+    if jobs != None:
+        return jobs
+
+    return 1 if multiprocessing.parent_process() != None or threading.current_thread() != threading.main_thread() else os.cpu_count()
+
+def __get_band_jobs(pixels, dds: DDSFormat, jobs: int):
+    """
+    Return the number of worker processes encoding the level, keeping at least 16 block rows per worker
+    """
+    rows = (pixels.shape[0] + dds.height - 1) // dds.height
+    return min(jobs, rows // 16)
+
+def encode(pixels, dds: DDSFormat, quality=Quality.HIGH, jobs: Optional[int]=None, executor: Optional[ProcessPoolExecutor]=None):
+    """
+    Encode an array of RGBA pixels with shape (height, width, 4) to a single DDS texture level of the specified format.
+    Bands of block rows are encoded on jobs worker processes, by default the CPU count or 1 in a worker process or thread.
+    The bands are encoded on the executor when specified, so that a single pool encodes every mip level, or on a new pool otherwise.
+    Return the bytes of the texture level as stored after the DDS header.
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to encode DDS textures')
+
+    if not dds.compressed:
+        return numpy.ascontiguousarray(pixels, dtype=numpy.uint8).tobytes()
+
+    jobs = __get_band_jobs(pixels, dds, __get_jobs(jobs))
+
+    if jobs <= 1:
+        return __encode_rows(pixels, dds, quality)
+
+    band = ((pixels.shape[0] + dds.height - 1) // dds.height + jobs - 1) // jobs * dds.height
+    bands = [pixels[y:y + band] for y in range(0, pixels.shape[0], band)]
+
+    if executor != None:
+        return b''.join(executor.map(__encode_rows, bands, repeat(dds), repeat(quality)))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return b''.join(executor.map(__encode_rows, bands, repeat(dds), repeat(quality)))
+
+def encode_mipmap(levels: list, dds: DDSFormat, quality=Quality.HIGH, jobs: Optional[int]=None):
+    """
+    Encode a list of arrays of RGBA pixels, one for each mip level, to DDS texture levels of the specified format.
+    A single pool of worker processes encodes every mip level large enough to be split in bands.
+    Return the bytes of every texture level as stored after the DDS header.
+    """
+    jobs = __get_jobs(jobs)
+
+    if numpy == None or not dds.compressed or len(levels) == 0 or __get_band_jobs(levels[0], dds, jobs) <= 1:
+        # The smaller mip levels are not split either
+        return b''.join(encode(pixels, dds, quality, 1) for pixels in levels)
+
+    with ProcessPoolExecutor(max_workers=__get_band_jobs(levels[0], dds, jobs)) as executor:
+        return b''.join(encode(pixels, dds, quality, jobs, executor) for pixels in levels)
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from service import request
+
+# Client of the conversion daemon started with "ghl_img_converter.py serve --socket".
+# It takes the same command line as ghl_img_converter.py, optionally preceded by --socket PATH, and runs it locally when no daemon is listening.
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    socket_path = None
+
+    if len(argv) >= 2 and argv[0] == '--socket':
+        socket_path = argv[1]
+        argv = argv[2:]
+
+    try:
+        status, output = request(argv, socket_path=socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # No daemon listening, the command was not sent and runs in a new process
+        status = subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ghl_img_converter.py')] + argv).returncode
+        output = ''
+    except (OSError, RuntimeError) as error:
+        # The command may have run on the daemon, so it is never run again
+        sys.stderr.write('Error : ' + (str(error) or type(error).__name__) + '\n')
+        sys.exit(1)
+
+    sys.stdout.write(output)
+    sys.exit(status)
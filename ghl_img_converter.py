@@ -1,22 +1,88 @@
+import asyncio
 import configparser
+import contextlib
+import csv
+import io
+import itertools
+import json
 import os
-import subprocess
-
+import shutil
+import sys
+import time
+import dxt
+import gx2
+import pvrtc
+import tex0codec
+
+from archive import ArchiveReader, ArchiveWriter, get_archive_stem, is_archive
+from backends import Backend, BACKENDS, Direction, get_backends, register, select
+from cache import ConversionCache, break_link, clone_file, hash_file
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dxt import Quality
+from gx2 import GX2_TEXTURE_SIZE, GX2Surface
+from imagefile import MipFilter, get_mipmap, read_image, resize
 from imgformat import IMGFormat, Platform, Game
-from textureformat import DDSFormat, PVRFormat, TEX0Format
+from imgtexture import IMG_HEADER_SIZE, IMGTexture
+from journal import Journal
+from orchestrator import Orchestrator, run_tool, set_timeout
+from pngfile import write_png
+from profiler import Profile, count, stage, summarize
+from scratch import ScratchSpace
+from service import get_default_socket, serve
+from swap import swap16, swap32
+from textureformat import PVR_HEADER_SIZE, DDSFormat, PVRFormat, TEX0Format
 from typing import Optional
 
 config = configparser.ConfigParser()
 config.read('config.ini')
 
+STREAM_CHUNK_SIZE = 1024 * 1024 # Size of the chunks of streamed conversions, a multiple of the swapped words and texture blocks sizes
+PROGRESS_INTERVAL = 5 # Seconds between the progress lines of a batch when the standard error is not a terminal
+BATCH_ARGS = ('input', 'output', 'jobs', 'engine', 'timeout', 'profile', 'progress', 'resume', 'journal', 'cache', 'cache_size', 'cache_link', 'dedup', 'dedup_link') # Command line arguments not changing the output of a batch
+
+def __is_tool_configured(name: str):
+    """
+    Return whether the path of the specified external tool is set in config.ini and points to an existing program
+    """
+    if not config.has_option('path', name) or config['path'][name] == '':
+        return False
+
+    path = config['path'][name]
+    return os.path.isfile(path) or shutil.which(path) != None
+
+# Built-in codec backends, the cheapest available backend supporting a job converts it
+DDS_PLATFORMS = [Platform.PS3, Platform.PC, Platform.X1, Platform.X360]
+
+register(Backend('native', 'Built-in NumPy codecs', 1, lambda: dxt.numpy != None)
+    .add(Direction.ENCODE, DDS_PLATFORMS, list(DDSFormat))
+    .add(Direction.ENCODE, [Platform.WIIU], list(DDSFormat), mipmap=1)
+    .add(Direction.ENCODE, [Platform.WII], list(TEX0Format))
+    .add(Direction.DECODE, DDS_PLATFORMS + [Platform.WIIU], list(DDSFormat), exts=('.png',))
+    .add(Direction.DECODE, [Platform.WII], list(TEX0Format), exts=('.png',))
+    .add(Direction.DECODE, [Platform.IOS], [PVRFormat.PVRTC1_4], exts=('.png',)))
+register(Backend('pvrtextoolcli', 'PVRTexToolCLI', 10, lambda: __is_tool_configured('PVRTexToolCLI'))
+    .add(Direction.ENCODE, DDS_PLATFORMS, list(DDSFormat))
+    .add(Direction.ENCODE, [Platform.IOS], [PVRFormat.PVRTC1_4])
+    .add(Direction.DECODE, DDS_PLATFORMS, list(DDSFormat))
+    .add(Direction.DECODE, [Platform.IOS], [PVRFormat.PVRTC1_4]))
+register(Backend('wimgt', 'wimgt', 10, lambda: __is_tool_configured('wimgt'))
+    .add(Direction.ENCODE, [Platform.WII], list(TEX0Format))
+    .add(Direction.DECODE, [Platform.WII], list(TEX0Format)))
+register(Backend('gtx_extract', 'gtx_extract, with the DDS textures encoded by the cheapest available DDS backend', 20, lambda: __is_tool_configured('gtx_extract'))
+    .add(Direction.ENCODE, [Platform.WIIU], list(DDSFormat))
+    .add(Direction.DECODE, [Platform.WIIU], list(DDSFormat)))
+
 def __read(filename: str):
     """
     Read the specified file.
     Return a byte array of the file.
     """
-    file = open(filename, 'rb')
-    blob = bytearray(file.read())
-    file.close()
+    with stage('read'):
+        file = open(filename, 'rb')
+        blob = bytearray(file.read())
+        file.close()
+
+    count('bytes_read', len(blob))
     return blob
 
 def __read_header(filename: str):
@@ -33,258 +99,554 @@ def __write(dest: str, blob: bytes):
     """
     Write binary to the destination file.
     """
-    file = open(dest, 'wb')
-    file.write(blob)
-    file.close()
+    with stage('write'):
+        file = open(dest, 'wb')
+        file.write(blob)
+        file.close()
+
+    count('bytes_written', len(blob))
+
+def __scratch():
+    """
+    Return a new scratch space for the intermediate files of a conversion, in the folder set in config.ini or a RAM backed folder by default
+    """
+    return ScratchSpace(config.get('scratch', 'path', fallback=None))
+
+def __write_parts(dest: str, parts: list):
+    """
+    Write every binary part in order to the destination file, without joining them first.
+    """
+    with stage('write'):
+        file = open(dest, 'wb')
+        file.writelines(parts)
+        file.close()
+
+    count('bytes_written', sum(len(part) for part in parts))
+
+def __apply_swaps(blob: bytearray, swaps: list, start=0, end: Optional[int]=None):
+    """
+    Apply every swap function in order to the bytes of the blob between the start and end offsets
+    """
+    with stage('swap'):
+        for swap in swaps:
+            swap(blob, start, end)
+
+    count('bytes_swapped', (len(blob) if end == None else end) - start)
+
+def __stream(dest: str, header: bytes, source: str, start: int, end: Optional[int]=None, swaps=()):
+    """
+    Write the header followed by the bytes of the source file between the start and end offsets to the destination file.
+    The bytes are read in chunks of STREAM_CHUNK_SIZE bytes, with every swap function applied to each chunk before it is written.
+    """
+    if end == None:
+        end = os.path.getsize(source)
+
+    buffer = bytearray(STREAM_CHUNK_SIZE)
+    view = memoryview(buffer)
+    count('bytes_written', len(header) + end - start)
+
+    with stage('stream'):
+        input = open(source, 'rb')
+        input.seek(start)
+        output = open(dest, 'wb')
+        output.write(header)
+
+        while start < end:
+            size = input.readinto(view[0:min(STREAM_CHUNK_SIZE, end - start)])
+
+            if size == 0:
+                raise ValueError('Unexpected end of file')
+
+            if len(swaps) > 0:
+                __apply_swaps(buffer, swaps, 0, size)
+
+            output.write(view[0:size])
+            start += size
+
+        view.release()
+        input.close()
+        output.close()
 
 def __create__pvrtextoolcli(source: str, dest: str, ext: str, width: int, height: int, texture: str, mipmap: int, flip: bool):
     """
     Convert the source image using PVRTexToolCLI
     """
-    subprocess.call(config['path']['PVRTexToolCLI'] + ' -i "' + source + '" -o "' + dest + ext + '"' + ('' if width == None or height == None else (' -r ' + str(width) + ',' + str(height))) + ' -f ' +texture + ' -m ' + str(mipmap) + (' -flip y' if flip else ''))
+    run_tool([config['path']['PVRTexToolCLI'], '-i', source, '-o', dest + ext] + ([] if width == None or height == None else ['-r', str(width) + ',' + str(height)]) + ['-f', texture, '-m', str(mipmap)] + (['-flip', 'y'] if flip else []))
 
-def __create_dds_img(img: IMGFormat, source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False):
+def __create_dds(source: str, width: Optional[int], height: Optional[int], dds: DDSFormat, mipmap: int, flip: bool, quality: Quality, mip_filter=MipFilter.BOX, linear=False):
     """
-    Convert the source image file to an IMG file with the specified size, format, game and mipmap count.
+    Convert the source image to a DDS texture with the built-in encoder, its mip levels generated with the specified filter.
+    Return a byte array of the DDS file.
     """
-    __create__pvrtextoolcli(source, dest, '.dds', width, height, dds.name, mipmap, flip)
+    with stage('read_image'):
+        pixels = read_image(source)
 
-    blob = __read(dest + '.dds')
+    if width != None and height != None:
+        with stage('resize'):
+            pixels = resize(pixels, width, height)
 
-    if width == None or height == None:
-        width, height = dds.get_sizes_from_header(blob)
+    if flip:
+        pixels = pixels[::-1]
 
-    os.remove(dest + '.dds')
+    blob = dds.get_header(pixels.shape[1], pixels.shape[0], mipmap)
+
+    with stage('encode'):
+        blob += dxt.encode_mipmap(get_mipmap(pixels, mipmap, mip_filter, linear), dds, quality)
+
+    return blob
+
+def __get_dds_img_header(platform: Platform, game: Game, width: int, height: int, dds: DDSFormat, mipmap: int):
+    """
+    Return the IMG 20 bytes header of a DDS texture, only PS3 and X360 textures exist for other games
+    """
+    with stage('header'):
+        return IMGFormat.from_enums(platform, game if platform in (Platform.PS3, Platform.X360) else Game.GHL).get_header(width, height, dds, mipmap)
+
+def __get_dds_swaps(platform: Platform, dds: DDSFormat):
+    """
+    Return the list of the swap functions turning the image data of a DDS texture into the image data of the specified platform
+    """
+    swaps = []
+
+    if platform == Platform.X360:
+        # Swap bytes
+        swaps.append(swap16)
 
     if not dds.compressed:
         # Swap bytes to ABGR
-        for i in range(dds.get_header_size(), len(blob), 4):
-            blob[i], blob[i + 1], blob[i + 2], blob[i + 3] = blob[i + 3], blob[i + 2], blob[i + 1], blob[i]
+        swaps.append(swap32)
+
+    return swaps
+
+def __pack_dds_img(dds_blob: bytes, platform: Platform, game: Game, width: int, height: int, dds: DDSFormat, mipmap: int):
+    """
+    Derive the IMG file of the specified platform and game from a DDS file, without modifying the DDS file.
+    Return a list of the binary parts of the IMG file, the image data is only copied when its bytes are swapped.
+    """
+    payload = memoryview(dds_blob)[dds.get_header_size():]
+
+    if platform == Platform.WIIU:
+        surface = GX2Surface.from_dds(width, height, dds, mipmap)
+
+        with stage('tile'):
+            data = surface.tile(payload)
+
+        # GHL Wii U IMG 20 bytes header and GX2 Texture block, followed by the tiled image data
+        return [IMGFormat.GHLWIIU.get_header(width, height, dds, mipmap), surface.get_texture(), data]
 
-    # Replace DDS header with IMG 20 bytes header
-    blob[0:dds.get_header_size()] = img.get_header(width, height, dds, mipmap)
+    swaps = __get_dds_swaps(platform, dds)
 
-    __write(dest, blob)
+    if len(swaps) > 0:
+        payload = bytearray(payload)
+        __apply_swaps(payload, swaps)
 
-def create_ps3_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, game=Game.GHL, mipmap=1, flip=False):
+    return [__get_dds_img_header(platform, game, width, height, dds, mipmap), payload]
+
+def create_imgs(source: str, dests: dict, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, game=Game.GHL, mipmap=1, flip=False, quality: Optional[Quality]=None, native_tiling=True, mip_filter=MipFilter.BOX, linear=False):
+    """
+    Convert the source image file to IMG files of several platforms with the specified size, format, game and mipmap count.
+    The dictionary of destinations maps PS3, PC, X1, X360 and Wii U platforms to their IMG file, the source image is encoded once for all of them.
+    The DDS file of PVRTexToolCLI is streamed to the IMG files, the built-in encoder keeps the DDS texture in memory and generates the mip levels with the specified filter, in linear light when linear is True.
+    Wii U textures with a single mip level are tiled natively unless native tiling is disabled, the others are converted with gtx_extract.
+    """
+    for platform in dests:
+        if platform not in (Platform.PS3, Platform.PC, Platform.X1, Platform.X360, Platform.WIIU):
+            raise ValueError('Platform not supported')
+
+    if quality != None:
+        blob = __create_dds(source, width, height, dds, mipmap, flip, quality, mip_filter, linear)
+        width, height = dds.get_sizes_from_header(blob)
+
+        for platform, dest in dests.items():
+            if platform == Platform.WIIU and (mipmap != 1 or gx2.numpy == None or not native_tiling):
+                with __scratch() as scratch:
+                    __write(scratch.get_path('texture.dds'), blob)
+                    __create_wiiu_gtx_img(scratch.get_path('texture.dds'), dest, width, height, dds, mipmap)
+            else:
+                __write_parts(dest, __pack_dds_img(blob, platform, game, width, height, dds, mipmap))
+        return
+
+    with __scratch() as scratch:
+        dds_path = scratch.get_path('texture.dds')
+        __create__pvrtextoolcli(source, scratch.get_path('texture'), '.dds', width, height, dds.name, mipmap, flip)
+
+        file = open(dds_path, 'rb')
+        dds_header = file.read(dds.get_header_size())
+        file.close()
+
+        if width == None or height == None:
+            width, height = dds.get_sizes_from_header(dds_header)
+
+        for platform, dest in dests.items():
+            if platform == Platform.WIIU and (mipmap != 1 or gx2.numpy == None or not native_tiling):
+                __create_wiiu_gtx_img(dds_path, dest, width, height, dds, mipmap)
+            elif platform == Platform.WIIU:
+                # Tiling needs the whole mip level
+                __write_parts(dest, __pack_dds_img(__read(dds_path), platform, game, width, height, dds, mipmap))
+            else:
+                __stream(dest, __get_dds_img_header(platform, game, width, height, dds, mipmap), dds_path, dds.get_header_size(), swaps=__get_dds_swaps(platform, dds))
+
+def create_ps3_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, game=Game.GHL, mipmap=1, flip=False, quality: Optional[Quality]=None):
     """
     Convert the source image file to a PlayStation 3 IMG file with the specified size, format, game and mipmap count.
     """
-    __create_dds_img(IMGFormat.from_enums(Platform.PS3, game), source, dest, width, height, dds, mipmap, flip)
+    create_imgs(source, {Platform.PS3: dest}, width, height, dds, game, mipmap, flip, quality)
 
-def create_pc_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False):
+def create_pc_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False, quality: Optional[Quality]=None):
     """
     Convert the source image file to a PC IMG file with the specified size, format and mipmap count.
     """
-    __create_dds_img(IMGFormat.GHLPC, source, dest, width, height, dds, mipmap, flip)
+    create_imgs(source, {Platform.PC: dest}, width, height, dds, Game.GHL, mipmap, flip, quality)
     
-def create_x1_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False):
+def create_x1_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False, quality: Optional[Quality]=None):
     """
     Convert the source image file to a Xbox One IMG file with the specified size, format and mipmap count.
     """
-    __create_dds_img(IMGFormat.GHLX1, source, dest, width, height, dds, mipmap, flip)
+    create_imgs(source, {Platform.X1: dest}, width, height, dds, Game.GHL, mipmap, flip, quality)
 
 def create_ios_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, pvr=PVRFormat.PVRTC1_4, mipmap=1, flip=False):
     """
     Convert the source image file to a GHL iOS IMG file with the specified size and mipmap count.
     """
-    __create__pvrtextoolcli(source, dest, '.pvr', width, height, pvr.name, mipmap, flip)
+    with __scratch() as scratch:
+        __create__pvrtextoolcli(source, scratch.get_path('texture'), '.pvr', width, height, pvr.name, mipmap, flip)
 
-    blob = __read(dest + '.pvr')
+        file = open(scratch.get_path('texture.pvr'), 'rb')
+        header = bytearray(file.read(67))
+        file.close()
 
-    if width == None or height == None:
-        width, height = PVRFormat.get_sizes_from_header(blob)
+        if width == None or height == None:
+            width, height = PVRFormat.get_sizes_from_header(header)
 
-    os.remove(dest + '.pvr')
+        # Adjust metadata size in the PVR header
+        header[48:52] = (15).to_bytes(4, byteorder='little')
 
-    # Truncate metadata block and adjust metadata size in the PVR header
-    del blob[67:91]
-    blob[48:52] = (15).to_bytes(4, byteorder='little')
-    
-    # Prepend GHL iOS IMG 20 bytes header
-    blob = IMGFormat.GHLIOS.get_header(width, height, pvr, mipmap) + blob
+        # Prepend GHL iOS IMG 20 bytes header and truncate metadata block
+        __stream(dest, IMGFormat.GHLIOS.get_header(width, height, pvr, mipmap) + header, scratch.get_path('texture.pvr'), 91)
 
-    __write(dest, blob)
-
-def create_x360_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, game=Game.GHL, mipmap=1, flip=False):
+def create_x360_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, game=Game.GHL, mipmap=1, flip=False, quality: Optional[Quality]=None):
     """
     Convert the source image file to a Xbox 360 IMG file with the specified size, format, game and mipmap count.
     """
-    __create__pvrtextoolcli(source, dest, '.dds', width, height, dds.name, mipmap, flip)
+    create_imgs(source, {Platform.X360: dest}, width, height, dds, game, mipmap, flip, quality)
 
-    blob = __read(dest + '.dds')
+def create_wiiu_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False, quality: Optional[Quality]=None):
+    """
+    Convert the source image file to a GHL Wii U IMG file with the specified size and mipmap count.
+    Textures with a single mip level are tiled natively, the others are converted with gtx_extract.
+    """
+    create_imgs(source, {Platform.WIIU: dest}, width, height, dds, Game.GHL, mipmap, flip, quality)
 
-    if width == None or height == None:
-        width, height = dds.get_sizes_from_header(blob)
+def __create_wiiu_gtx_img(dds_path: str, dest: str, width: int, height: int, dds: DDSFormat, mipmap: int):
+    """
+    Convert a DDS file to a GHL Wii U IMG file with gtx_extract
+    """
+    with __scratch() as scratch:
+        gtx_path = scratch.get_path('texture.gtx')
 
-    os.remove(dest + '.dds')
+        # Convert the DDS file to a GTX texture
+        run_tool([sys.executable, config['path']['gtx_extract'], '-o', gtx_path, dds_path])
 
-    # Swap bytes
-    for i in range(dds.get_header_size(), len(blob), 2):
-        blob[i], blob[i + 1] = blob[i + 1], blob[i]
+        file = open(gtx_path, 'rb')
+        file.seek(64)
+        texture = file.read(GX2_TEXTURE_SIZE)
+        file.close()
 
-    if not dds.compressed:
-        # Swap bytes to ABGR
-        for i in range(dds.get_header_size(), len(blob), 4):
-            blob[i], blob[i + 1], blob[i + 2], blob[i + 3] = blob[i + 3], blob[i + 2], blob[i + 1], blob[i]
+        # Replace GTX 32 bytes header with GHL Wii U IMG 20 bytes header, GX2 Surface block and padding block by GX2 Surface data, and remove 32 bytes end of file block header
+        __stream(dest, IMGFormat.GHLWIIU.get_header(width, height, dds, mipmap) + texture, gtx_path, 4096, os.path.getsize(gtx_path) - 32)
+
+def create_wii_img(source: str, dest: str, tex0=TEX0Format.RGB5A3, game=Game.DJH2, mipmap=1, quality: Optional[Quality]=None, mip_filter=MipFilter.BOX, linear=False):
+    """
+    Convert the source image file to a Wii IMG file with the specified format, game and mipmap count.
+    The built-in encoder is used instead of wimgt when a quality preset is specified, its mip levels being generated with the specified filter.
+    """
+    if quality != None:
+        with stage('read_image'):
+            pixels = read_image(source)
+
+        height, width = pixels.shape[0:2]
+
+        with stage('encode'):
+            blob = tex0codec.encode_mipmap(get_mipmap(pixels, mipmap, mip_filter, linear), tex0, quality)
+
+        # Wii IMG 20 bytes header from the specified game followed by every mip level
+        __write(dest, IMGFormat.from_enums(Platform.WII, game).get_header(width, height, tex0, mipmap) + blob)
+        return
+
+    with __scratch() as scratch:
+        tex_path = scratch.get_path('texture.tex')
+
+        # Convert the source file to a TEX0 texture
+        run_tool([config['path']['wimgt'], 'encode', source, '-d', tex_path, '-x', tex0.name, '--n-mm', str(mipmap - 1)])
 
-    # Replace DDS header with X360 IMG 20 bytes header from the specified game
-    blob[0:dds.get_header_size()] = IMGFormat.from_enums(Platform.X360, game).get_header(width, height, dds, mipmap)
+        file = open(tex_path, 'rb')
+        header = file.read(64)
+        file.close()
 
-    __write(dest, blob)
+        width, height = TEX0Format.get_sizes_from_header(header)
 
-def create_wiiu_img(source: str, dest: str, width: Optional[int]=None, height: Optional[int]=None, dds=DDSFormat.BC1, mipmap=1, flip=False):
+        # Replace TEX0 header with Wii IMG 20 bytes header from the specified game and remove name metadata
+        __stream(dest, IMGFormat.from_enums(Platform.WII, game).get_header(width, height, tex0, mipmap), tex_path, 64, 64 + tex0.get_size_mipmap(width, height, mipmap))
+
+def append_mipmaps(source: str, dest: str, mipmap: int, platform: Optional[Platform]=None, flip=False, quality=Quality.HIGH, mip_filter=MipFilter.BOX, linear=False):
     """
-    Convert the source image file to a GHL Wii U IMG file with the specified size and mipmap count.
+    Append the missing mip levels up to the mipmap count to the PlayStation 3, PC, Xbox One, Xbox 360 or Wii IMG file converted from the source image.
+    Only the missing mip levels are encoded, with the built-in encoder, from the source image resized to the size of the IMG file.
+    The mipmap count of the IMG header is updated once every mip level is written, and the IMG file is restored on errors.
+    A hardlinked IMG file is replaced by a copy of its own first.
+    Return the number of appended mip levels.
     """
-    __create__pvrtextoolcli(source, dest, '.temp.dds', width, height, dds.name, mipmap, flip)
+    with IMGTexture(dest, platform) as texture:
+        platform = texture.platform
+        width = texture.width
+        height = texture.height
+        texture_format = texture.texture
+        current = texture.mipmap
+        header = bytearray(texture.header)
+        size = len(texture.view) - IMG_HEADER_SIZE
+
+    if platform not in (Platform.PS3, Platform.PC, Platform.X1, Platform.X360, Platform.WII):
+        raise ValueError('Mip levels can only be appended to PlayStation 3, PC, Xbox One, Xbox 360 and Wii textures')
+
+    if size != texture_format.get_size_mipmap(width, height, current):
+        raise ValueError('Unexpected IMG file size')
 
-    # Convert the temporary file to a GTX texture
-    subprocess.call('python3 ' + config['path']['gtx_extract'] + ' -o "' + dest + '.gtx" "' + dest + '.temp.dds"', shell=True)
+    if mipmap <= current:
+        return 0
 
-    blob = __read(dest + '.temp.dds')
+    with stage('read_image'):
+        pixels = read_image(source)
 
-    if width == None or height == None:
-        width, height = DDSFormat.get_sizes_from_header(blob)
+    if pixels.shape[1] != width or pixels.shape[0] != height:
+        with stage('resize'):
+            pixels = resize(pixels, width, height)
 
-    os.remove(dest + '.temp.dds')
+    if flip:
+        pixels = pixels[::-1]
 
-    blob = __read(dest + '.gtx')
-    os.remove(dest + '.gtx')
+    # Every mip level is generated from the source image, only the missing ones are encoded
+    levels = get_mipmap(pixels, mipmap, mip_filter, linear)[current:]
 
-    # Replace GX2 Surface block and padding block by GX2 Surface data
-    blob[32:4096] = blob[64:220]
+    with stage('encode'):
+        if platform == Platform.WII:
+            blob = bytearray(tex0codec.encode_mipmap(levels, texture_format, quality))
+        else:
+            blob = bytearray(dxt.encode_mipmap(levels, texture_format, quality))
 
-    # Remove 32 bytes end of file block header
-    blob = blob[:-32]
+    if platform != Platform.WII and len(__get_dds_swaps(platform, texture_format)) > 0:
+        __apply_swaps(blob, __get_dds_swaps(platform, texture_format))
 
-    # Replace GTX 32 bytes header with GHL Wii U IMG 20 bytes header
-    blob[0:32] = IMGFormat.GHLWIIU.get_header(width, height, dds, mipmap)
+    # Mipmap count of the IMG header
+    header[16:18] = (mipmap - platform.mipmap).to_bytes(2, byteorder=platform.byteorder)
 
-    __write(dest, blob)
+    with stage('write'):
+        # Never write through a hardlink to a cache entry or a deduplicated output
+        break_link(dest)
+        file = open(dest, 'r+b')
 
-def create_wii_img(source: str, dest: str, tex0=TEX0Format.RGB5A3, game=Game.DJH2, mipmap=1):
+        try:
+            file.seek(IMG_HEADER_SIZE + size)
+            file.write(blob)
+            file.flush()
+            file.seek(0)
+            file.write(header)
+        except Exception:
+            file.truncate(IMG_HEADER_SIZE + size)
+            raise
+        finally:
+            file.close()
+
+    count('bytes_written', len(blob) + len(header))
+    return mipmap - current
+
+def __get_level_range(texture, width: int, height: int, mipmap: int, level: Optional[int]=None):
     """
-    Convert the source image file to a Wii IMG file with the specified format, game and mipmap count.
+    Return the start and end offsets in the payload, the width, the height and the mipmap count of the specified mip level of a DDS or TEX0 texture.
+    Return the range of every mip level when no level is specified, its end offset being None.
     """
-    # Convert the source file to a TEX0 texture
-    subprocess.call(config['path']['wimgt'] + ' encode "' + source + '" -d "' + dest + '.tex" -x ' + tex0.name + ' --n-mm ' + str(mipmap - 1))
+    if level == None:
+        return 0, None, width, height, mipmap
 
-    blob = __read(dest + '.tex')
+    start = texture.get_size_mipmap(width, height, level)
+    width = max(1, width >> level)
+    height = max(1, height >> level)
 
-    width, height = TEX0Format.get_sizes_from_header(blob)
+    return start, start + texture.get_size(width, height), width, height, 1
 
-    os.remove(dest + '.tex')
+def __extract_dds_img(source: str, dest: str, width: int, height: int, dds: DDSFormat, mipmap: int, level: Optional[int]=None):
+    """
+    Extract the source DDS IMG file with the specified width, height, format and mipmap count to a decompressed format, only the specified mip level when specified
+    """
+    start, end, width, height, mipmap = __get_level_range(dds, width, height, mipmap, level)
 
-    # Replace TEX0 header with Wii IMG 20 bytes header from the specified game
-    blob[0:64] = IMGFormat.from_enums(Platform.WII, game).get_header(width, height, tex0, mipmap)
-    
-    # Remove name metadata
-    blob = blob[:tex0.get_size_mipmap(width, height, mipmap) + 20]
+    with __scratch() as scratch, IMGTexture(source) as texture:
+        dds_path = scratch.get_path('texture.dds')
+
+        # Create temporary DDS file, with a DDS header instead of the IMG 20 bytes header
+        if dds.compressed:
+            texture.write(dds_path, dds.get_header(width, height, mipmap), start, end)
+        else:
+            # Swap bytes to RGBA
+            blob = bytearray(texture.get_payload()[start:end])
+            __apply_swaps(blob, [swap32])
 
-    __write(dest, blob)
+            __write_parts(dds_path, [dds.get_header(width, height, mipmap), blob])
 
-def __extract_dds_img(source: str, dest: str, width: int, height: int, dds: DDSFormat, mipmap: int):
+        # Convert DDS to decompressed format
+        run_tool([config['path']['PVRTexToolCLI'], '-i', dds_path, '-o', dds_path, '-d', dest, '-f', dds.name])
+
+def __extract_ios_img(source: str, dest: str, level: Optional[int]=None):
+    """
+    Extract the source iOS IMG file to a decompressed format, only the specified mip level when specified
+    """
+    with __scratch() as scratch, IMGTexture(source, Platform.IOS) as texture:
+        pvr_path = scratch.get_path('texture.pvr')
+
+        if level == None:
+            # Create temporary PVR file without the iOS IMG 20 bytes header
+            texture.write(pvr_path, b'')
+        else:
+            # Create temporary PVR file of the mip level, with the size and mipmap count of the PVR header adjusted
+            start = texture.get_level_offset(level)
+            header = bytearray(texture.get_payload()[0:PVR_HEADER_SIZE + PVRFormat.get_metadata_size_from_header(texture.get_payload()[0:PVR_HEADER_SIZE])])
+            header[24:28] = max(1, texture.height >> level).to_bytes(4, byteorder='little')
+            header[28:32] = max(1, texture.width >> level).to_bytes(4, byteorder='little')
+            header[44:48] = (1).to_bytes(4, byteorder='little')
+
+            texture.write(pvr_path, header, start, start + texture.texture.get_size(texture.width >> level, texture.height >> level))
+
+        # Convert PVR to decompressed format
+        run_tool([config['path']['PVRTexToolCLI'], '-i', pvr_path, '-o', pvr_path, '-d', dest, '-f', 'PVRTC1_4_RGB'])
+
+def __extract_x360_img(source: str, dest: str, width: int, height: int, dds: DDSFormat, mipmap: int, level: Optional[int]=None):
     """
-    Extract the source DDS IMG file with the specified width, height, format and mipmap count to a decompressed format
+    Extract the source Xbox 360 IMG file with the specified width, height, format and mipmap count to a decompressed format, only the specified mip level when specified
     """
-    blob = __read(source)
+    start, end, width, height, mipmap = __get_level_range(dds, width, height, mipmap, level)
 
-    # Replace IMG 20 bytes header with DDS header
-    blob[0:20] = dds.get_header(width, height, mipmap)
+    with IMGTexture(source) as texture:
+        blob = bytearray(texture.get_payload()[start:end])
 
-    if not dds.compressed:
-        # Swap bytes to RGBA
-        for i in range(dds.get_header_size(), len(blob), 4):
-            blob[i], blob[i + 1], blob[i + 2], blob[i + 3] = blob[i + 3], blob[i + 2], blob[i + 1], blob[i]
+    # Swap bytes, and to RGBA for uncompressed textures
+    __apply_swaps(blob, ([] if dds.compressed else [swap32]) + [swap16])
+
+    with __scratch() as scratch:
+        dds_path = scratch.get_path('texture.dds')
 
-    # Create temporary DDS file
-    __write(source + '.dds', blob)
+        # Create temporary DDS file, with a DDS header instead of the X360 IMG 20 bytes header
+        __write_parts(dds_path, [dds.get_header(width, height, mipmap), blob])
 
-    # Convert DDS to decompressed format
-    subprocess.call(config['path']['PVRTexToolCLI'] + ' -i "' + source + '.dds" -o "' + source + '.dds" -d "' + dest + '" -f ' + dds.name)
-    os.remove(source + '.dds')
+        # Convert DDS to decompressed format
+        run_tool([config['path']['PVRTexToolCLI'], '-i', dds_path, '-o', dds_path, '-d', dest, '-f', dds.name])
 
-def __extract_ios_img(source: str, dest: str):
+def __extract_wiiu_img(source: str, dest: str):
     """
-    Extract the source iOS IMG file to a decompressed format
+    Extract the source Wii U IMG file to a decompressed format
     """
-    blob = __read(source)
+    with __scratch() as scratch, IMGTexture(source) as texture:
+        gtx_path = scratch.get_path('texture.gtx')
+
+        # Replace Wii U IMG 20 bytes header with GTX header and GX2 Surface block header
+        header = bytearray.fromhex('47 66 78 32 00 00 00 20 00 00 00 07 00 00 00 01 00 00 00 02 00 00 00 01 00 00 00 00 00 00 00 00 42 4C 4B 7B 00 00 00 20 00 00 00 01 00 00 00 00 00 00 00 0B 00 00 00 9C 00 00 00 00 00 00 00 00')
+        header += texture.get_payload()[0:GX2_TEXTURE_SIZE]
 
-    # Remove iOS IMG 20 bytes header
-    del blob[0:20]
+        # Add swizzled image data block header and adjust data length
+        header += bytes.fromhex('42 4C 4B 7B 00 00 00 20 00 00 00 01 00 00 00 00 00 00 00 0C 00 00 00 00 00 00 00 00 00 00 00 00')
+        header[240:244] = header[96:100]
 
-    # Create temporary PVR file
-    __write(source + '.pvr', blob)
+        # Create temporary GTX file
+        texture.write(gtx_path, header, GX2_TEXTURE_SIZE)
 
-    # Convert PVR to decompressed format
-    subprocess.call(config['path']['PVRTexToolCLI'] + ' -i "' + source + '.pvr" -o "' + source + '.pvr" -d "' + dest + '" -f PVRTC1_4_RGB')
-    os.remove(source + '.pvr')
+        # Convert GTX to decompressed format
+        run_tool([sys.executable, config['path']['gtx_extract'], '-o', dest, gtx_path])
 
-def __extract_x360_img(source: str, dest: str, width: int, height: int, dds: DDSFormat, mipmap: int):
+def __extract_wii_img(source: str, dest: str, width: int, height: int, tex0: TEX0Format, mipmap: int, level: Optional[int]=None):
     """
-    Extract the source Xbox 360 IMG file with the specified width, height, format and mipmap count to a decompressed format
+    Extract the source Wii IMG file with the specified width, height, format and mipmap count to a decompressed format, only the specified mip level when specified
     """
-    blob = __read(source)
-
-    # Replace X360 IMG 20 bytes header with DDS header
-    blob[0:20] = dds.get_header(width, height, mipmap)
+    start, end, width, height, mipmap = __get_level_range(tex0, width, height, mipmap, level)
 
-    if not dds.compressed:
-        # Swap bytes to RGBA
-        for i in range(dds.get_header_size(), len(blob), 4):
-            blob[i], blob[i + 1], blob[i + 2], blob[i + 3] = blob[i + 3], blob[i + 2], blob[i + 1], blob[i]
-
-    # Swap bytes
-    for i in range(dds.get_header_size(), len(blob), 2):
-        blob[i], blob[i + 1] = blob[i + 1], blob[i]
+    with __scratch() as scratch, IMGTexture(source, Platform.WII) as texture:
+        tex_path = scratch.get_path('texture.tex')
 
-    # Create temporary DDS file
-    __write(source + '.dds', blob)
+        # Create temporary TEX0 file, with a TEX0 header instead of the Wii IMG 20 bytes header
+        texture.write(tex_path, tex0.get_header(width, height, mipmap), start, end)
 
-    # Convert DDS to decompressed format
-    subprocess.call(config['path']['PVRTexToolCLI'] + ' -i "' + source + '.dds" -o "' + source + '.dds" -d "' + dest + '" -f ' + dds.name)
-    os.remove(source + '.dds')
+        # Convert TEX0 to decompressed format
+        run_tool([config['path']['wimgt'], 'decode', tex_path, '-d', dest, '--no-mm'])
 
-def __extract_wiiu_img(source: str, dest: str):
+def decode_img(source: str, platform: Optional[Platform]=None, level=0):
     """
-    Extract the source Wii U IMG file to a decompressed format
+    Decode the specified mip level of the source PlayStation 3, PC, Xbox One, Xbox 360, Wii U, Wii or iOS IMG file without any external tool, only the first mip level of Wii U textures.
+    Only the bytes of the decoded mip level are read.
+    Return an array of RGBA pixels with shape (height, width, 4).
     """
-    blob = __read(source)
+    with IMGTexture(source, platform) as texture:
+        width = max(1, texture.width >> level)
+        height = max(1, texture.height >> level)
+
+        if texture.platform == Platform.WII:
+            # Decode the specified mip level only
+            with stage('decode'):
+                return tex0codec.decode(texture.get_level(level), width, height, texture.texture)
+
+        if texture.platform == Platform.IOS:
+            # Decode the specified mip level only, following the PVR header and its metadata block
+            with stage('decode'):
+                return pvrtc.decode(texture.get_level(level), width, height)
 
-    # Replace Wii U IMG 20 bytes header with GTX header and GX2 Surface block header
-    blob[0:20] = bytes.fromhex('47 66 78 32 00 00 00 20 00 00 00 07 00 00 00 01 00 00 00 02 00 00 00 01 00 00 00 00 00 00 00 00 42 4C 4B 7B 00 00 00 20 00 00 00 01 00 00 00 00 00 00 00 0B 00 00 00 9C 00 00 00 00 00 00 00 00')
+        if texture.platform == Platform.WIIU:
+            if level != 0:
+                raise ValueError('Only the first mip level of Wii U textures can be decoded')
 
-    # Add swizzled image data block header and adjust data length
-    blob[220:220] = bytes.fromhex('42 4C 4B 7B 00 00 00 20 00 00 00 01 00 00 00 00 00 00 00 0C 00 00 00 00 00 00 00 00 00 00 00 00')
-    blob[240:244] = blob[96:100]
+            surface = GX2Surface.from_texture(texture.get_payload()[0:GX2_TEXTURE_SIZE])
 
-    # Create temporary GTX file
-    __write(source + '.gtx', blob)
+            # Untile the first mip level
+            with stage('tile'):
+                data = surface.untile(texture.get_payload()[GX2_TEXTURE_SIZE:GX2_TEXTURE_SIZE + surface.image_size])
 
-    # Convert GTX to decompressed format
-    subprocess.call('python3 ' + config['path']['gtx_extract'] + ' -o "' + dest + '" "' + source + '.gtx"', shell=True)
-    os.remove(source + '.gtx')
+            with stage('decode'):
+                return dxt.decode(data, surface.width, surface.height, surface.dds)
 
-def __extract_wii_img(source: str, dest: str, width: int, height: int, tex0: TEX0Format, mipmap: int):
+        if texture.platform not in (Platform.X360, Platform.PS3, Platform.PC, Platform.X1):
+            raise ValueError('Platform not supported by the native decoder')
+
+        dds = texture.texture
+
+        # Decode the specified mip level only, copied when its bytes are swapped
+        if texture.platform != Platform.X360 and dds.compressed:
+            with stage('decode'):
+                return dxt.decode(texture.get_level(level), width, height, dds)
+
+        blob = bytearray(texture.get_level(level))
+
+    # Swap bytes for X360 textures, and to RGBA for uncompressed textures
+    __apply_swaps(blob, ([swap16] if texture.platform == Platform.X360 else []) + ([] if dds.compressed else [swap32]))
+
+    with stage('decode'):
+        return dxt.decode(blob, width, height, dds)
+
+def get_extract_level(width: int, height: int, mipmap: int, mip: Optional[int]=None, max_size: Optional[int]=None):
     """
-    Extract the source Wii IMG file with the specified width, height, format and mipmap count to a decompressed format
+    Return the mip level to extract from a texture with the specified width, height and mipmap count: the specified mip level, or the first following mip level fitting in the maximum size.
+    The mip level is clamped to the smallest mip level of the texture. Return None to extract the whole texture when neither is specified.
     """
-    blob = __read(source)
+    if mip == None and max_size == None:
+        return None
 
-    # Replace Wii IMG 20 bytes header with TEX0 header
-    blob[0:20] = tex0.get_header(width, height, mipmap)
+    level = 0 if mip == None else max(0, mip)
 
-    # Create temporary TEX0 file
-    __write(source + '.tex', blob)
-    
-    # Convert TEX0 to decompressed format
-    subprocess.call(config['path']['wimgt'] + ' decode "' + source + '.tex" -d "' + dest + '" --no-mm')
-    os.remove(source + '.tex')
+    if max_size != None:
+        while level < mipmap - 1 and max(width >> level, height >> level) > max_size:
+            level += 1
 
-def extract_img(source: str, dest: str, platform: Optional[Platform]=None):
+    return min(level, mipmap - 1)
+
+def extract_img(source: str, dest: str, platform: Optional[Platform]=None, backend: Optional[str]=None, mip: Optional[int]=None, max_size: Optional[int]=None):
     """
-    Extract the source IMG file to a decompressed format
+    Extract the source IMG file to a decompressed format with the cheapest available backend, or with the backend of the specified name.
+    With a mip level or a maximum size, only the specified mip level, or the first one fitting in the maximum size, is read and extracted.
+    Wii U textures always extract their first mip level.
     """
     header = __read_header(source)
 
@@ -292,19 +654,176 @@ def extract_img(source: str, dest: str, platform: Optional[Platform]=None):
     if platform == None:
         platform = IMGFormat.from_img(header).platform
 
-    if platform == Platform.X360:
-        __extract_x360_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), platform.get_dds_from_img(header), platform.get_mipmap_from_img(header))
+    if platform == Platform.IOS:
+        texture = PVRFormat.PVRTC1_4
+    elif platform == Platform.WII:
+        texture = platform.get_tex0_from_img(header)
+    else:
+        texture = platform.get_dds_from_img(header)
+
+    mipmap = platform.get_mipmap_from_img(header)
+    level = None if platform == Platform.WIIU else get_extract_level(platform.get_width_from_img(header), platform.get_height_from_img(header), mipmap, mip, max_size)
+
+    backend = select(platform, texture, Direction.DECODE, mipmap if level == None else 1, os.path.splitext(dest)[1], backend).name
+
+    if backend == 'native':
+        # Decode DDS, GX2, TEX0 and PVRTC textures to PNG without PVRTexToolCLI, gtx_extract or wimgt
+        pixels = decode_img(source, platform, 0 if level == None else level)
+
+        with stage('write_image'):
+            write_png(dest, pixels)
+    elif platform == Platform.X360:
+        __extract_x360_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), texture, mipmap, level)
     elif platform == Platform.PS3 or platform == Platform.PC or platform == Platform.X1:
-        __extract_dds_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), platform.get_dds_from_img(header), platform.get_mipmap_from_img(header))
+        __extract_dds_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), texture, mipmap, level)
     elif platform == Platform.WII:
-        __extract_wii_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), platform.get_tex0_from_img(header), platform.get_mipmap_from_img(header))
+        __extract_wii_img(source, dest, platform.get_width_from_img(header), platform.get_height_from_img(header), texture, mipmap, level)
     elif platform == Platform.WIIU:
         __extract_wiiu_img(source, dest)
     elif platform == Platform.IOS:
-        __extract_ios_img(source, dest)
+        __extract_ios_img(source, dest, level)
+    else:
+        raise ValueError('Platform not supported')
+
+def repack_img(source: str, dest: str, platform: Platform, game: Optional[Game]=None, source_platform: Optional[Platform]=None):
+    """
+    Repack the source IMG file to the specified platform and game without decoding its texture.
+    The game of the source IMG is kept when no game is specified.
+    """
+    with IMGTexture(source, source_platform) as texture:
+        for p in (texture.platform, platform):
+            if p not in (Platform.X360, Platform.PS3, Platform.PC, Platform.X1):
+                raise ValueError('Platform not supported')
+
+        # IMG 20 bytes header of the target platform and game
+        header = IMGFormat.from_enums(platform, texture.game if game == None else game).get_header(texture.width, texture.height, texture.texture, texture.mipmap)
+
+        # Xbox 360 textures are the other platforms textures with swapped bytes, both for DXT blocks and ABGR pixels
+        if (texture.platform == Platform.X360) != (platform == Platform.X360):
+            blob = bytearray(texture.get_payload())
+            __apply_swaps(blob, [swap16])
+        else:
+            texture.write(dest, header)
+            return
+
+    __write_parts(dest, [header, blob])
+
+def __pread(file, size: int, offset: int):
+    """
+    Return at most size bytes of the unbuffered file from the specified offset
+    """
+    if hasattr(os, 'pread'):
+        return os.pread(file.fileno(), size, offset)
+
+    file.seek(offset)
+    return file.read(size)
+
+def __pwrite(file, blob: bytes, offset: int):
+    """
+    Write the bytes to the unbuffered file at the specified offset
+    """
+    if hasattr(os, 'pwrite'):
+        os.pwrite(file.fileno(), blob, offset)
     else:
+        file.seek(offset)
+        file.write(blob)
+
+def __move(file, start: int, end: int, dest: int):
+    """
+    Move the bytes between the start and end offsets of the unbuffered file to the destination offset, lower than the start offset.
+    The bytes are copied in chunks from the first one, so every chunk is read before being overwritten.
+    """
+    count('bytes_read', end - start)
+    count('bytes_written', end - start)
+
+    with stage('write'):
+        offset = start
+
+        while offset < end:
+            chunk = __pread(file, min(STREAM_CHUNK_SIZE, end - offset), offset)
+
+            if len(chunk) == 0:
+                raise ValueError('Texture data is too small for its size and format')
+
+            __pwrite(file, chunk, dest + offset - start)
+            offset += len(chunk)
+
+def edit_img(path: str, platform: Optional[Platform]=None, game: Optional[Game]=None, mipmap: Optional[int]=None, max_size: Optional[int]=None, source_platform: Optional[Platform]=None):
+    """
+    Edit the IMG file in place without decoding its texture: retag its platform or game, keep at most mipmap count mip levels and drop the leading mip levels larger than the maximum size.
+    Only the IMG header is rewritten when the mip levels are kept, the trailing mip levels are truncated, and the remaining mip levels are moved once after the IMG header when leading mip levels are dropped.
+    A hardlinked IMG file is replaced by a copy of its own first.
+    DJ Hero and DJ Hero 2 IMG headers are identical, so a DJ Hero texture retagged to either game is left unchanged.
+    Return whether the IMG file was changed.
+    """
+    with IMGTexture(path, source_platform) as texture:
+        current = texture.platform
+        header = texture.header
+        width = texture.width
+        height = texture.height
+        levels = texture.mipmap
+        tex = texture.texture
+        size = len(texture.get_payload())
+
+        if game == None:
+            game = texture.game
+
+    if current not in (Platform.PS3, Platform.PC, Platform.X1, Platform.X360, Platform.WII):
         raise ValueError('Platform not supported')
 
+    # PlayStation 3, PC and Xbox One textures share their texture data
+    if platform != None and platform != current and (platform not in (Platform.PS3, Platform.PC, Platform.X1) or current not in (Platform.PS3, Platform.PC, Platform.X1)):
+        raise ValueError('Only PlayStation 3, PC and Xbox One textures can be retagged to each other, use repack instead')
+
+    if mipmap != None and mipmap < 1:
+        raise ValueError('Mipmap count must be at least 1')
+
+    platform = current if platform == None else platform
+
+    # First mip level fitting in the maximum size, the smallest mip level being always kept
+    drop = get_extract_level(width, height, levels, None, max_size) if max_size != None else 0
+    kept = levels - drop if mipmap == None else min(mipmap, levels - drop)
+    start = tex.get_size_mipmap(width, height, drop)
+    width = max(1, width >> drop)
+    height = max(1, height >> drop)
+    end = start + tex.get_size_mipmap(width, height, kept)
+
+    if size < end:
+        raise ValueError('Texture data is too small for its size and format')
+
+    if platform == Platform.WII:
+        with stage('header'):
+            edited = IMGFormat.from_enums(platform, game).get_header(width, height, tex, kept)
+    else:
+        edited = __get_dds_img_header(platform, game, width, height, tex, kept)
+
+    if edited == header and kept == levels:
+        # Already edited with the same options, DJ Hero and DJ Hero 2 IMG headers included
+        return False
+
+    # Never write through a hardlink to a cache entry or a deduplicated output
+    break_link(path)
+    file = open(path, 'r+b', buffering=0)
+
+    try:
+        if drop > 0:
+            # Move the remaining mip levels right after the IMG header
+            __move(file, IMG_HEADER_SIZE + start, IMG_HEADER_SIZE + end, IMG_HEADER_SIZE)
+
+        if kept < levels:
+            # Truncate the dropped mip levels
+            file.truncate(IMG_HEADER_SIZE + end - start)
+
+        if edited != header:
+            count('bytes_written', len(edited))
+
+            with stage('write'):
+                __pwrite(file, edited, 0)
+    finally:
+        file.close()
+
+    return True
+
 def __format_list(elements: list, separator = ', ', last_separator = ', ', empty = 'Empty', selector = lambda x : str(x)):
     """
     Return a formatted string from a list of elements
@@ -346,138 +865,987 @@ def get_texture_formats(img: IMGFormat, header: bytes):
     
     return textures
 
-def __get_texture_format_info(img: IMGFormat, header: bytes):
+def get_payload_size(platform: Platform, texture, width: int, height: int, mipmap: int):
     """
-    Return a formatted string of the texture format information from an IMG format and its IMG header value
+    Return the expected size of the data following the IMG header with the specified platform, texture format, width, height and mipmap count.
+    Return None when it cannot be computed from the IMG header.
     """
-    if img.platform == Platform.IOS:
-        return PVRFormat.PVRTC1_4.name
+    if platform == Platform.IOS:
+        # PVR header and truncated metadata followed by 4 bits per pixel levels of at least 8x8 pixels
+        return PVR_HEADER_SIZE + 15 + texture.get_size_mipmap(width, height, mipmap)
+    elif platform == Platform.WIIU:
+        # GX2 Texture block followed by the tiled first mip level
+        return GX2_TEXTURE_SIZE + GX2Surface.from_dds(width, height, texture, mipmap).image_size if mipmap == 1 else None
     else:
-        textures = get_texture_formats(img, header)
-        return __format_list(textures, ', ', ' or ', 'Unknown format', lambda x : x.name)
+        return texture.get_size_mipmap(width, height, mipmap)
+
+def get_info(path: str):
+    """
+    Read only the IMG header of the specified file.
+    Return a dictionary of the information about the IMG file, with every candidate when the header is shared by several platforms and games.
+    """
+    return __get_header_info(path, __read_header(path), os.path.getsize(path))
+
+def __get_header_info(path: str, header: bytes, size: int):
+    """
+    Return the information dictionary of the IMG file with the specified path, IMG header and file size
+    """
+    img = IMGFormat.from_img(header)
+    width = img.platform.get_width_from_img(header)
+    height = img.platform.get_height_from_img(header)
+    mipmap = img.platform.get_mipmap_from_img(header)
+    textures = [PVRFormat.PVRTC1_4] if img.platform == Platform.IOS else get_texture_formats(img, header)
+
+    return {
+        'path': path,
+        'size': size,
+        'width': width,
+        'height': height,
+        'mipmap': mipmap,
+        'formats': [texture.name for texture in textures],
+        'platforms': [platform.name.lower() for platform in ([img.platform] if img.game == Game.GHL else [Platform.X360, Platform.PS3, Platform.WII])],
+        'games': [game.name.lower() for game in ([img.game] if img.game == Game.GHL else [Game.DJH, Game.DJH2])],
+        'payload_sizes': [get_payload_size(Platform.WII if isinstance(texture, TEX0Format) else img.platform, texture, width, height, mipmap) for texture in textures]
+    }
 
 def print_info(path: str):
     """
     Prints information about the IMG file
     """
-    header = __read_header(path)
-    img = IMGFormat.from_img(header)
+    __print_info(get_info(path))
+
+def __print_info(info: dict):
+    """
+    Prints the information dictionary of an IMG file
+    """
+    print('Width          = ' + str(info['width']))
+    print('Height         = ' + str(info['height']))
+    print('Texture format = ' + __format_list(info['formats'], ', ', ' or ', 'Unknown format'))
+    print('Mipmap count   = ' + str(info['mipmap']))
+    print('Platform       = ' + __format_list(info['platforms'], ', ', ' or ', selector=lambda x : Platform.from_string(x).fullname))
+    print('Game           = ' + __format_list(info['games'], ', ', ' or ', selector=lambda x : Game.from_string(x).value))
+
+def __scan(input: str):
+    """
+    Yield the path of every IMG file of the input folder and its subfolders
+    """
+    folders = [input]
+
+    while len(folders) > 0:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    folders.append(entry.path)
+                elif entry.name.lower().endswith('.img'):
+                    yield entry.path
+
+def __get_info_or_error(path: str):
+    """
+    Return the information dictionary of an IMG file, or a dictionary with the error when its header cannot be read
+    """
+    try:
+        return get_info(path)
+    except (OSError, ValueError) as error:
+        return {'path': path, 'error': str(error)}
+
+def scan_info(input: str, jobs: Optional[int]=None):
+    """
+    Read the header of every IMG file of the input folder and its subfolders on a pool of jobs threads.
+    Yield the information dictionary of each IMG file as soon as it is read, in the order of the folder walk.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(__get_info_or_error, __scan(input))
+
+def scan_archive_info(path: str):
+    """
+    Read the header of every IMG file of the zip or tar archive without extracting it.
+    Yield the information dictionary of each IMG file in archive order, its path being the archive path followed by its name in the archive.
+    """
+    with ArchiveReader(path) as reader:
+        for name, size, file in reader.members(('.img',)):
+            try:
+                yield __get_header_info(os.path.join(path, name), file.read(IMG_HEADER_SIZE), size)
+            except ValueError as error:
+                yield {'path': os.path.join(path, name), 'error': str(error)}
+
+def __walk(input: str, output: Optional[str], extensions: tuple, ext: str):
+    """
+    Walk the input folder and create the matching output folders.
+    Return a list of the source and destination paths, the size and the modification time in nanoseconds of every file with one of the specified extensions.
+    """
+    files = []
+    folders = [input]
+
+    with stage('walk'):
+        while len(folders) > 0:
+            subdir = folders.pop()
+            out_folder = os.path.join(output if output != None else input, os.path.relpath(subdir, input))
+            os.makedirs(out_folder, exist_ok=True)
+
+            # The directory entries hold the file sizes without an extra call per file on most systems
+            with os.scandir(subdir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.name.lower().endswith(extensions):
+                        stat = entry.stat()
+                        files.append((entry.path, os.path.join(out_folder, os.path.splitext(entry.name)[0] + ext), stat.st_size, stat.st_mtime_ns))
+
+    return files
+
+def __get_batch_options(args):
+    """
+    Return the dictionary of every command line argument changing the output files of a batch, with the versions of the encoders and external tools
+    """
+    options = {key: value for key, value in vars(args).items() if key not in BATCH_ARGS and not callable(value)}
+    options['version'] = [dxt.ENCODER_VERSION, dict(config['path']) if config.has_section('path') else None]
+
+    return options
+
+def __print_progress(done: int, total: Optional[int], size: int, total_size: Optional[int], seconds: float, end: str):
+    """
+    Prints the progress line of a batch to the standard error, with its throughput and its remaining time estimated from the remaining bytes.
+    The total is None when the files of the batch are not known in advance.
+    """
+    line = str(done) + ('' if total == None else '/' + str(total)) + ' files, {:.1f} files/s, {:.1f} MB/s'.format(done / seconds if seconds > 0 else 0, size / seconds / 1000000 if seconds > 0 else 0)
+
+    if total_size != None and 0 < size < total_size:
+        line += ', ETA ' + time.strftime('%H:%M:%S', time.gmtime(seconds * (total_size - size) / size))
+
+    sys.stderr.write(line + end)
+    sys.stderr.flush()
+
+def __run_job(func, args, source: str, dest: str):
+    """
+    Run the single file function on the source and destination paths, profiled with the profile command line argument.
+    Return the value returned by the single file function and the dictionary of the profile of the file, or None when not profiling.
+    """
+    if not getattr(args, 'profile', False):
+        return func(args, source, dest), None
+
+    with Profile(source) as profile:
+        result = func(args, source, dest)
+
+    return result, profile.to_dict()
+
+def __print_profiles(profiles: list, batch: Optional[Profile]=None):
+    """
+    Prints the profile of every file as a JSON line, followed by a JSON line of their summary
+    """
+    for profile in profiles:
+        print(json.dumps(profile))
+
+    print(json.dumps({'summary': summarize(profiles, None if batch == None else batch.to_dict())}))
 
-    print('Width          = ' + str(img.platform.get_width_from_img(header)))
-    print('Height         = ' + str(img.platform.get_height_from_img(header)))
-    print('Texture format = ' + __get_texture_format_info(img, header))
-    print('Mipmap count   = ' + str(img.platform.get_mipmap_from_img(header)))
-    print('Platform       = ' + (img.platform.fullname if img.game == Game.GHL else (Platform.X360.fullname + ', ' + Platform.PS3.fullname + ' or ' + Platform.WII.fullname)))
-    print('Game           = ' + (img.game.value if img.game == Game.GHL else (Game.DJH.value + ' or ' + Game.DJH2.value)))
+def __run_single(func, args, source: str, dest: str):
+    """
+    Run the single file function on the source and destination paths, printing its profile with the profile command line argument.
+    Return the value returned by the single file function.
+    """
+    result, profile = __run_job(func, args, source, dest)
+
+    if profile != None:
+        __print_profiles([profile])
+
+    return result
+
+async def __run_async(func, args, jobs):
+    """
+    Run the single file function on every source and destination paths with an orchestrator running args.jobs external tools at once.
+    The jobs are taken from their iterable only when fewer than twice args.jobs files are running.
+    Yield the source path of every file with the value returned by the single file function and the profile of the file, or with the exception raised, as soon as the file ends.
+    """
+    sources = []
+
+    def get_jobs():
+        for source, dest in jobs:
+            sources.append(source)
+            yield func, args, source, dest
+
+    async with Orchestrator(args.jobs, args.timeout) as orchestrator:
+        async for index, result in orchestrator.as_completed(__run_job, get_jobs(), args.jobs * 2):
+            yield sources[index], result
+
+def __run_jobs(func, args, jobs):
+    """
+    Run the single file function on every source and destination paths with a pool of args.jobs worker processes, or with the asyncio orchestrator.
+    The jobs are taken from their iterable only when fewer than twice args.jobs files are running, so that lazily prepared files stay bounded.
+    Yield the source path of every file with the value returned by the single file function and the profile of the file, or with the exception raised.
+    """
+    if getattr(args, 'engine', None) == 'asyncio':
+        # Run the event loop until the next file ends, so that every file is recorded as soon as it ends
+        loop = asyncio.new_event_loop()
+        results = __run_async(func, args, jobs)
+
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+    elif args.jobs <= 1:
+        for source, dest in jobs:
+            try:
+                yield source, __run_job(func, args, source, dest)
+            except Exception as error:
+                yield source, error
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=set_timeout, initargs=(getattr(args, 'timeout', None),)) as executor:
+            jobs = iter(jobs)
+            futures = {}
+
+            while True:
+                # Twice as many files as workers, so that no worker waits for its next file
+                for source, dest in itertools.islice(jobs, args.jobs * 2 - len(futures)):
+                    futures[executor.submit(__run_job, func, args, source, dest)] = source
+
+                if len(futures) == 0:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    source = futures.pop(future)
+
+                    try:
+                        yield source, future.result()
+                    except Exception as error:
+                        yield source, error
+
+def __run_batch(func, args, extensions: tuple, ext: str, name: str, get_outputs=lambda args, dest: [dest]):
+    """
+    Run the single file function on the source and destination paths of every file of the input folder with one of the extensions, the largest files first.
+    Archive inputs and outputs are run by __run_archive_batch.
+    Every completed file is recorded in the journal of the batch, and the files completed by a previous batch are skipped with the resume command line argument.
+    Print a summary, and the profiles with the profile command line argument, and exit with a non-zero status if any file failed.
+    Return the list of the values returned by the single file function.
+    """
+    if is_archive(args.input) or is_archive(getattr(args, 'output', None) or ''):
+        return __run_archive_batch(func, args, extensions, ext, get_outputs)
+
+    profiling = getattr(args, 'profile', False)
+    batch = Profile(args.input)
+    results = []
+    profiles = []
+    errors = []
+
+    with batch if profiling else contextlib.nullcontext():
+        files = __walk(args.input, getattr(args, 'output', None), extensions, ext)
+
+        # Largest files first, so that the batch does not end with a large file running alone
+        files.sort(key=lambda file: file[2], reverse=True)
+
+        options = __get_batch_options(args)
+
+        journal_path = args.journal if args.journal != None else os.path.join(getattr(args, 'output', None) or args.input, '.ghl_img_converter.' + name + '.journal')
+        journal = Journal(journal_path, args.resume)
+
+        with journal:
+            files = {source: (dest, size, mtime) for source, dest, size, mtime in files if not journal.is_completed(source, size, mtime, options, get_outputs(args, dest))}
+
+            # Byte-identical sources are run once, the outputs of their duplicates being filled from the outputs of the first one
+            duplicates = __group_duplicates([(source, size) for source, (_, size, _) in files.items()], args.jobs) if getattr(args, 'dedup', False) else {}
+            saved = {duplicate for group in duplicates.values() for duplicate in group}
+            jobs = [(source, dest) for source, (dest, _, _) in files.items() if source not in saved]
+
+            if journal.skipped > 0:
+                print(str(journal.skipped) + ' files skipped, completed in ' + journal_path)
+
+            total_size = sum(size for _, size, _ in files.values())
+            terminal = sys.stderr.isatty()
+            start = time.perf_counter()
+            last = start
+            done = 0
+            size = 0
+            deduplicated = 0
+
+            for source, result in __fill_duplicates(__run_jobs(func, args, jobs), duplicates, files, get_outputs, args):
+                dest, file_size, mtime = files[source]
+                done += 1
+                size += file_size
+
+                if isinstance(result, Exception):
+                    errors.append((source, result))
+                    print('Error with file : ' + source + ' (' + (str(result) or type(result).__name__) + ')')
+                else:
+                    # Files edited in place are recorded with their edited size and modification time
+                    if os.path.normpath(dest) == os.path.normpath(source):
+                        stat = os.stat(source)
+                        file_size, mtime = stat.st_size, stat.st_mtime_ns
+
+                    journal.record(source, file_size, mtime, options, get_outputs(args, dest))
+
+                    # Duplicates have no value of their own
+                    if source not in saved:
+                        results.append(result[0])
+                    else:
+                        deduplicated += 1
+
+                    if result[1] != None:
+                        profiles.append(result[1])
+
+                if args.progress and (terminal or time.perf_counter() - last >= PROGRESS_INTERVAL or done == len(files)):
+                    last = time.perf_counter()
+                    __print_progress(done, len(files), size, total_size, last - start, '\n' if not terminal or done == len(files) else '\r')
+
+    # Only the duplicates whose outputs were written saved a run
+    if deduplicated > 0:
+        print(str(deduplicated) + ' runs saved by deduplication, ' + str(len(jobs)) + ' of ' + str(len(files)) + ' files run')
+
+    __report_batch(args, len(files), results, profiles, errors, batch if profiling else None, deduplicated)
+
+    return results
+
+def __group_duplicates(files: list, jobs: Optional[int]=None):
+    """
+    Group the byte-identical files of the list of source paths and sizes, hashing only the files sharing their size and extension with another file, on a pool of jobs threads.
+    Return a dictionary of the list of the duplicates of the first file of every group, in the order of the list.
+    """
+    sizes = {}
+
+    for source, size in files:
+        sizes.setdefault((size, os.path.splitext(source)[1].lower()), []).append(source)
+
+    candidates = [source for group in sizes.values() if len(group) > 1 for source in group]
+    groups = {}
+
+    with stage('hash'), ThreadPoolExecutor(max_workers=jobs) as executor:
+        for source, digest in zip(candidates, executor.map(lambda source: hash_file(source).digest(), candidates)):
+            groups.setdefault((digest, os.path.splitext(source)[1].lower()), []).append(source)
+
+    return {group[0]: group[1:] for group in groups.values() if len(group) > 1}
+
+def __fill_duplicates(results, duplicates: dict, files: dict, get_outputs, args):
+    """
+    Yield the source path and result of every file run, followed by every duplicate of the file.
+    The output files of the duplicates are cloned from the output files of the file, hardlinked with the dedup_link command line argument, and the duplicates fail with the file.
+    """
+    for source, result in results:
+        yield source, result
+
+        for duplicate in duplicates.get(source, []):
+            if isinstance(result, Exception):
+                yield duplicate, result
+                continue
+
+            try:
+                with stage('clone'):
+                    for output, dest in zip(get_outputs(args, files[source][0]), get_outputs(args, files[duplicate][0])):
+                        clone_file(output, dest, args.dedup_link)
+
+                yield duplicate, (None, None)
+            except OSError as error:
+                yield duplicate, error
+
+def __get_archive_files(args, extensions: tuple, ext: str, output: str, scratch: ScratchSpace):
+    """
+    Yield the displayed name, the source and destination paths and the size of every file of the input folder or archive with one of the extensions.
+    Archive members are copied to the scratch space one at a time, only when the next file is needed.
+    """
+    if not is_archive(args.input):
+        files = __walk(args.input, output, extensions, ext)
+
+        # Largest files first, so that the batch does not end with a large file running alone
+        files.sort(key=lambda file: file[2], reverse=True)
+
+        for source, dest, size, _ in files:
+            yield source, source, dest, size
+
+        return
+
+    with ArchiveReader(args.input) as reader:
+        for index, (name, size, file) in enumerate(reader.members(extensions)):
+            # Every member has its own folder, keeping its name for the external tools
+            source = scratch.get_path(os.path.join('input', str(index), os.path.basename(name)))
+            dest = os.path.join(output, os.path.splitext(name)[0] + ext)
+            os.makedirs(os.path.dirname(source))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+            with stage('unpack'):
+                out = open(source, 'wb')
+                shutil.copyfileobj(file, out, STREAM_CHUNK_SIZE)
+                out.close()
+
+            count('bytes_read', size)
+            yield os.path.join(args.input, name), source, dest, size
+
+def __get_archive_batch_error(args):
+    """
+    Return the error of a batch option not supported with an archive input or output, or None when the options are supported.
+    Archive batches stream their members, so they have no journal to resume and are never deduplicated.
+    """
+    if not is_archive(getattr(args, 'input', None) or '') and not is_archive(getattr(args, 'output', None) or ''):
+        return None
+
+    if getattr(args, 'resume', False) or getattr(args, 'journal', None) != None:
+        return '--resume and --journal are not supported with archives, archive batches have no journal'
+    if getattr(args, 'dedup_link', False):
+        return '--dedup-link is not supported with archives, archive batches are not deduplicated'
+
+    return None
+
+def __run_archive_batch(func, args, extensions: tuple, ext: str, get_outputs=lambda args, dest: [dest]):
+    """
+    Run the single file function on every file of the input folder or archive with one of the extensions, writing the output files to the output folder or archive.
+    The archive members are streamed through the workers without extracting the archive, the next member being copied to the scratch space only when a worker needs it.
+    The output files are added to the output archive by this process in the order the files end, and removed from the scratch space.
+    Print a summary, and the profiles with the profile command line argument, and exit with a non-zero status if any file failed.
+    Return the list of the values returned by the single file function.
+    """
+    profiling = getattr(args, 'profile', False)
+    batch = Profile(args.input)
+    results = []
+    profiles = []
+    errors = []
+    files = {}
+    done = 0
+
+    def get_jobs():
+        for name, source, dest, size in __get_archive_files(args, extensions, ext, output, scratch):
+            files[source] = (name, dest, size)
+            yield source, dest
+
+    with batch if profiling else contextlib.nullcontext(), __scratch() as scratch:
+        if is_archive(args.output or ''):
+            writer = ArchiveWriter(args.output)
+            output = scratch.get_path('output')
+        else:
+            writer = None
+            output = args.output if args.output != None else get_archive_stem(args.input)
+
+        with writer if writer != None else contextlib.nullcontext():
+            terminal = sys.stderr.isatty()
+            start = time.perf_counter()
+            last = start
+            size = 0
+
+            for source, result in __run_jobs(func, args, get_jobs()):
+                name, dest, file_size = files.pop(source)
+                done += 1
+                size += file_size
+
+                if isinstance(result, Exception):
+                    errors.append((name, result))
+                    print('Error with file : ' + name + ' (' + (str(result) or type(result).__name__) + ')')
+                else:
+                    results.append(result[0])
+
+                    if result[1] != None:
+                        profiles.append(result[1])
+
+                for path in get_outputs(args, dest) if writer != None else []:
+                    if os.path.isfile(path):
+                        if not isinstance(result, Exception):
+                            with stage('pack'):
+                                writer.add(path, os.path.relpath(path, output))
+
+                        os.remove(path)
+
+                if is_archive(args.input):
+                    shutil.rmtree(os.path.dirname(source), ignore_errors=True)
+
+                if args.progress and (terminal or time.perf_counter() - last >= PROGRESS_INTERVAL):
+                    last = time.perf_counter()
+                    __print_progress(done, None, size, None, last - start, '\r' if terminal else '\n')
+
+            if args.progress and done > 0:
+                __print_progress(done, None, size, None, time.perf_counter() - start, '\n')
+
+    __report_batch(args, done, results, profiles, errors, batch if profiling else None)
+
+    return results
+
+def __report_batch(args, total: int, results: list, profiles: list, errors: list, batch: Optional[Profile]=None, deduplicated=0):
+    """
+    Print the summary of a batch, and the profiles when the batch was profiled, and exit with a non-zero status if any file failed.
+    Deduplicated files are the duplicates whose outputs were copied from the outputs of another file of the batch.
+    """
+    if batch != None:
+        __print_profiles(profiles, batch)
+
+    if len(errors) > 0:
+        print(str(total - len(errors)) + ' of ' + str(total) + ' files processed, ' + str(len(errors)) + ' failed')
+        __finish_batch(args, results, deduplicated)
+        sys.exit(1)
+
+    print(str(total) + ' files processed')
+    __finish_batch(args, results, deduplicated)
+
+def __finish_batch(args, results: list, deduplicated=0):
+    """
+    Evict the conversion cache and print its statistics when the command uses one.
+    The deduplicated files never look up the cache, their outputs being copied from the outputs of another file of the batch.
+    """
+    if getattr(args, 'cache', None) == None:
+        return
+
+    cache = ConversionCache(args.cache, args.cache_size * 1024 * 1024)
+    cache.evict()
+
+    # Every converted file returns the list of the cache results of its IMG files
+    results = [result for file_results in results for result in file_results]
+    hits = results.count('hit')
+    print('Cache : ' + str(hits) + ' hits, ' + str(len(results) - hits) + ' misses, ' + str(cache.evictions) + ' evicted' + (', ' + str(deduplicated) + ' deduplicated files not looked up' if deduplicated > 0 else ''))
 
 def __extract_args(args):
     """
     Extract using command line arguments
     """
     # Batch extract
-    if os.path.isdir(args.input):
-        for subdir, _, files in os.walk(args.input):
-            out_folder = os.path.join(args.output if args.output != None else args.input, os.path.relpath(subdir, args.input))
-            if not os.path.exists(out_folder):
-                os.mkdir(out_folder)
-
-            for f in files:
-                if f.lower().endswith('.img'):
-                    try:
-                        __extract_args_single(args, os.path.join(subdir, f), os.path.join(out_folder, os.path.splitext(f)[0] + '.png'))
-                    except ValueError:
-                        print('Error with file : ' + os.path.join(subdir, f))
+    if os.path.isdir(args.input) or is_archive(args.input):
+        __run_batch(__extract_args_single, args, ('.img',), '.png', 'extract')
     # Single extract
     else:
-        __extract_args_single(args, args.input, args.output if args.output != None else os.path.splitext(args.input)[0] + '.png')
+        __run_single(__extract_args_single, args, args.input, args.output if args.output != None else os.path.splitext(args.input)[0] + '.png')
 
 def __extract_args_single(args, source: str, dest: str):
     """
     Extract a single file using the command line arguments and the specified input and output
     """
-    extract_img(source, dest, None if args.platform == None else Platform.from_string(args.platform))
+    extract_img(source, dest, None if args.platform == None else Platform.from_string(args.platform), None if args.backend == 'auto' else args.backend, args.mip, args.max_size)
+
+def __get_convert_platforms(args):
+    """
+    Return the list of the platforms to convert to from the command line arguments, expanding all to every DDS platform
+    """
+    platforms = []
+
+    for platform in args.platform:
+        for p in (['ps3', 'pc', 'x1', 'x360', 'wiiu'] if platform == 'all' else [platform]):
+            if p not in platforms:
+                platforms.append(p)
+
+    return platforms
+
+def __get_convert_dests(args, dest: str):
+    """
+    Return the dictionary of the IMG file of every platform to convert to.
+    The platform is appended to the destination name when converting to several platforms.
+    """
+    platforms = __get_convert_platforms(args)
+
+    if len(platforms) == 1:
+        return {platforms[0]: dest}
+
+    return {platform: os.path.splitext(dest)[0] + '.' + platform + '.img' for platform in platforms}
+
+def __get_convert_game_error(args):
+    """
+    Return the error of a platform to convert to without IMG files for the game of the command line arguments, or None when every platform has them.
+    Only PS3, X360 and Wii textures are tagged with the game, the other platforms always use Guitar Hero Live headers.
+    """
+    game = Game.from_string(args.game)
+
+    for platform in __get_convert_platforms(args):
+        p = Platform.from_string(platform)
+
+        try:
+            IMGFormat.from_enums(p, game if p in (Platform.PS3, Platform.X360, Platform.WII) else Game.GHL)
+        except ValueError:
+            return p.fullname + ' textures do not exist for ' + game.value + ', use --game ' + ' or '.join(format.game.name.lower() for format in IMGFormat if format.platform == p) + ' or convert to ' + p.fullname + ' separately'
+
+    return None
 
 def __convert_args(args):
     """
     Convert using the commannd line arguments
     """
     # Batch convert
-    if os.path.isdir(args.input):
-        for subdir, _, files in os.walk(args.input):
-            out_folder = os.path.join(args.output if args.output != None else args.input, os.path.relpath(subdir, args.input))
-            if not os.path.exists(out_folder):
-                os.mkdir(out_folder)
-
-            for f in files:
-                if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                    try:
-                        __convert_args_single(args, os.path.join(subdir, f), os.path.join(out_folder, os.path.splitext(f)[0] + '.img'))
-                    except ValueError:
-                        print('Error with file : ' + os.path.join(subdir, f))
+    if os.path.isdir(args.input) or is_archive(args.input):
+        __run_batch(__convert_args_single, args, ('.png', '.jpg', '.jpeg', '.bmp'), '.img', 'convert', lambda args, dest: list(__get_convert_dests(args, dest).values()))
     # Single convert
     else:
-        __convert_args_single(args, args.input, args.output if args.output != None else os.path.splitext(args.input)[0] + '.img')
+        __finish_batch(args, [__run_single(__convert_args_single, args, args.input, args.output if args.output != None else os.path.splitext(args.input)[0] + '.img')])
+
+def __get_convert_options(args, platform: str):
+    """
+    Return the dictionary of every command line argument changing the converted IMG of the specified platform, with the versions of the encoders
+    """
+    return {
+        'platform': platform,
+        'game': args.game,
+        'format': args.format,
+        'tex0': args.tex0,
+        'width': args.width,
+        'height': args.height,
+        'mipmap': args.mipmap,
+        'flip': args.flip,
+        'backend': __get_convert_backend(args, platform).name,
+        'quality': args.quality,
+        'mip_filter': args.mip_filter,
+        'mip_space': args.mip_space,
+        'version': [dxt.ENCODER_VERSION, dict(config['path']) if config.has_section('path') else None]
+    }
+
+def __get_convert_backend(args, platform: str):
+    """
+    Return the backend converting to the specified platform with the command line arguments, the cheapest available one unless a backend is specified
+    """
+    if platform == 'ios':
+        texture = PVRFormat.PVRTC1_4
+    elif platform == 'wii':
+        texture = TEX0Format.from_string(args.tex0)
+    else:
+        texture = DDSFormat.from_string(args.format)
+
+    # The encoder option is an alias of the backend option
+    name = args.backend if args.backend != 'auto' else args.encoder
+
+    return select(Platform.from_string(platform), texture, Direction.ENCODE, args.mipmap, name=name)
 
 def __convert_args_single(args, source: str, dest: str):
     """
-    Convert a single file using the command line arguments and the specified input and output
-    """
-    if args.platform == 'ps3':
-        create_ps3_img(source, dest, args.width, args.height, DDSFormat.from_string(args.format), Game.from_string(args.game), args.mipmap, args.flip)
-    elif args.platform == 'pc':
-        create_pc_img(source, dest, args.width, args.height, DDSFormat.from_string(args.format), args.mipmap, args.flip)
-    elif args.platform == 'x1':
-        create_x1_img(source, dest, args.width, args.height, DDSFormat.from_string(args.format), args.mipmap, args.flip)
-    elif args.platform == 'ios':
-        create_ios_img(source, dest, args.width, args.height, PVRFormat.PVRTC1_4, args.mipmap, args.flip)
-    elif args.platform == 'x360':
-        create_x360_img(source, dest, args.width, args.height, DDSFormat.from_string(args.format), Game.from_string(args.game), args.mipmap, args.flip)
-    elif args.platform == 'wiiu':
-        create_wiiu_img(source, dest, args.width, args.height, DDSFormat.from_string(args.format), args.mipmap, args.flip)
-    elif args.platform == 'wii':
-        create_wii_img(source, dest, TEX0Format.from_string(args.tex0), Game.from_string(args.game), args.mipmap)
+    Convert a single file to every platform using the command line arguments and the specified input and output.
+    Return a list with 'hit' for every IMG copied from the conversion cache and 'miss' for every converted IMG.
+    """
+    dests = __get_convert_dests(args, dest)
+    cache = None if args.cache == None else ConversionCache(args.cache, args.cache_size * 1024 * 1024)
+    keys = {}
+    appended = {}
+    results = []
+
+    if cache != None:
+        for platform in list(dests):
+            keys[platform] = cache.get_key(source, __get_convert_options(args, platform))
+
+            if cache.fetch(keys[platform], dests[platform], args.cache_link):
+                del dests[platform]
+                results.append('hit')
+
+    if args.append_mipmaps:
+        for platform in list(dests):
+            if __append_mipmaps_single(args, source, platform, dests[platform]):
+                appended[platform] = dests.pop(platform)
+
+    if len(dests) > 0:
+        __convert_single(args, source, dests)
+
+    dests.update(appended)
+
+    for platform in dests:
+        if cache != None:
+            cache.store(keys[platform], dests[platform])
+
+        results.append('miss')
+
+    return results
+
+def __append_mipmaps_single(args, source: str, platform: str, dest: str):
+    """
+    Append the missing mip levels to the existing IMG file of the platform when it has the game, format and size of the command line arguments and fewer mip levels.
+    Return whether the mip levels were appended, the IMG file must be converted otherwise.
+    """
+    if platform not in ('ps3', 'pc', 'x1', 'x360', 'wii') or not os.path.isfile(dest) or __get_convert_backend(args, platform).name != 'native':
+        return False
+
+    game = Game.from_string(args.game)
+    p = Platform.from_string(platform)
+
+    try:
+        with IMGTexture(dest, p) as texture:
+            header = texture.header
+            width = texture.width
+            height = texture.height
+            mipmap = texture.mipmap
+    except (OSError, ValueError):
+        return False
+
+    # The IMG file must only differ by its mipmap count
+    if p == Platform.WII:
+        expected = IMGFormat.from_enums(p, game).get_header(width, height, TEX0Format.from_string(args.tex0), mipmap)
+    else:
+        expected = __get_dds_img_header(p, game, width, height, DDSFormat.from_string(args.format), mipmap)
+
+    if header != expected or mipmap >= args.mipmap or args.width not in (None, width) or args.height not in (None, height):
+        return False
+
+    append_mipmaps(source, dest, args.mipmap, p, args.flip, Quality.from_string(args.quality), MipFilter.from_string(args.mip_filter), args.mip_space == 'linear')
+    return True
+
+def __convert_single(args, source: str, dests: dict):
+    """
+    Convert a single file to the IMG file of every platform using the command line arguments, without the conversion cache.
+    The PS3, PC, X1, X360 and Wii U textures are derived from a single encoding of the source file.
+    """
+    quality = Quality.from_string(args.quality)
+    dds = DDSFormat.from_string(args.format)
+    dds_dests = {}
+    native_tiling = True
+
+    for platform, dest in dests.items():
+        backend = __get_convert_backend(args, platform)
+
+        if platform == 'ios':
+            create_ios_img(source, dest, args.width, args.height, PVRFormat.PVRTC1_4, args.mipmap, args.flip)
+        elif platform == 'wii':
+            create_wii_img(source, dest, TEX0Format.from_string(args.tex0), Game.from_string(args.game), args.mipmap, quality if backend.name == 'native' else None, MipFilter.from_string(args.mip_filter), args.mip_space == 'linear')
+        else:
+            if backend.name == 'gtx_extract':
+                # gtx_extract tiles a DDS texture of the cheapest available DDS backend
+                native_tiling = False
+                backend = select(Platform.PC, dds, Direction.ENCODE, args.mipmap)
+
+            # Group the platforms sharing the same encoder
+            dds_dests.setdefault(backend.name, {})[Platform.from_string(platform)] = dest
+
+    for name, group in dds_dests.items():
+        create_imgs(source, group, args.width, args.height, dds, Game.from_string(args.game), args.mipmap, args.flip, quality if name == 'native' else None, native_tiling, MipFilter.from_string(args.mip_filter), args.mip_space == 'linear')
+
+def __repack_args(args):
+    """
+    Repack using the command line arguments
+    """
+    # Batch repack
+    if os.path.isdir(args.input) or is_archive(args.input):
+        __run_batch(__repack_args_single, args, ('.img',), '.' + args.platform + '.img', 'repack')
+    # Single repack
+    else:
+        __run_single(__repack_args_single, args, args.input, args.output if args.output != None else os.path.splitext(args.input)[0] + '.' + args.platform + '.img')
+
+def __repack_args_single(args, source: str, dest: str):
+    """
+    Repack a single file using the command line arguments and the specified input and output
+    """
+    repack_img(source, dest, Platform.from_string(args.platform), None if args.game == None else Game.from_string(args.game), None if args.source_platform == None else Platform.from_string(args.source_platform))
+
+def __edit_args(args):
+    """
+    Edit using the command line arguments
+    """
+    # Batch edit
+    if os.path.isdir(args.input):
+        __run_batch(__edit_args_single, args, ('.img',), '.img', 'edit')
+    # Single edit
+    else:
+        __run_single(__edit_args_single, args, args.input, args.input)
+
+def __edit_args_single(args, source: str, dest: str):
+    """
+    Edit a single file in place using the command line arguments and the specified input
+    """
+    return edit_img(source, None if args.platform == None else Platform.from_string(args.platform), None if args.game == None else Game.from_string(args.game), args.mipmap, args.max_size, None if args.source_platform == None else Platform.from_string(args.source_platform))
+
+def print_backends():
+    """
+    Prints every registered backend with its availability, cost and supported conversions
+    """
+    for backend in get_backends():
+        print(backend.name + ' (' + ('available' if backend.is_available() else 'not available') + ', cost ' + str(backend.cost) + ') : ' + backend.description)
+
+        for direction, platforms, textures, mipmap, exts in backend.capabilities:
+            line = '    ' + direction.value + ' ' + __format_list(platforms, selector=lambda x : x.fullname) + ' : ' + __format_list(textures, selector=lambda x : x.name)
+
+            if mipmap != None:
+                line += ', up to ' + str(mipmap) + ' mip level' + ('s' if mipmap > 1 else '')
+            if exts != None:
+                line += ', to ' + __format_list(list(exts)) + ' only'
+
+            print(line)
+
+def __backends_args(args):
+    """
+    Prints the backends using the command line arguments
+    """
+    print_backends()
 
 def __info_args(args):
     """
     Prints the informations using the command line arguments
     """
-    print_info(args.input)
+    # Single text information
+    if not os.path.isdir(args.input) and not is_archive(args.input) and args.output_format == 'text':
+        print_info(args.input)
+        return
 
-if __name__ == "__main__":
-    import sys
+    if os.path.isdir(args.input):
+        infos = scan_info(args.input, args.jobs)
+    elif is_archive(args.input):
+        infos = scan_archive_info(args.input)
+    else:
+        infos = [get_info(args.input)]
+
+    try:
+        if args.output_format == 'csv':
+            fields = ['path', 'size', 'width', 'height', 'mipmap', 'formats', 'platforms', 'games', 'payload_sizes', 'error']
+            writer = csv.DictWriter(sys.stdout, fields, lineterminator='\n')
+            writer.writeheader()
+
+        for info in infos:
+            if args.output_format == 'json':
+                print(json.dumps(info))
+            elif args.output_format == 'csv':
+                writer.writerow({key: '|'.join(str(x) for x in value) if isinstance(value, list) else value for key, value in info.items()})
+            else:
+                print(info['path'])
+
+                if 'error' in info:
+                    print('Error          = ' + info['error'])
+                else:
+                    __print_info(info)
+
+                print()
 
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader stopped early, as head does: silence the flush of the remaining output at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+def __serve_job(argv: list, cwd: str):
+    """
+    Run a command line of the daemon from the working directory of its client.
+    Return the exit status and the printed output of the command.
+    """
+    output = io.StringIO()
+    status = 0
+
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            os.chdir(cwd)
+            __run_command(argv, daemon=True)
+        except SystemExit as error:
+            status = 0 if error.code == None else error.code if isinstance(error.code, int) else 1
+
+            if isinstance(error.code, str):
+                print(error.code)
+        except Exception as error:
+            print('Error : ' + (str(error) or type(error).__name__))
+            status = 1
+
+    return status, output.getvalue()
+
+def __serve_args(args):
+    """
+    Runs the daemon using the command line arguments
+    """
+    serve(__serve_job, get_default_socket(True) if args.socket == '' else args.socket, args.jobs)
+
+def __create_parser():
+    """
+    Return the parser of the command line arguments
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='A python script to extract and convert to IMG files used in some FSG games like Guitar Hero Live, DJ Hero and DJ Hero 2.')
+    sp = parser.add_subparsers(help='You must choose one of the following commands')
+    
+    sp_extract = sp.add_parser('extract', help='Extract a IMG file to a decompressed format')
+    sp_extract.set_defaults(func=__extract_args)
+    sp_extract.add_argument('input', help='Path of the input IMG file, root folder or zip or tar archive to extract')
+    sp_extract.add_argument('--output', help='Path to the output decompressed format, output folder or zip or tar archive')
+    sp_extract.add_argument('--platform', choices=['ps3', 'pc', 'x1', 'ios', 'x360', 'wiiu', 'wii'], help='Force extraction from the specified platform')
+    sp_extract.add_argument('--mip', type=int, help='Mip level to extract, 0 being the largest one. Clamped to the smallest mip level of each texture, the first mip level of Wii U textures is always extracted')
+    sp_extract.add_argument('--max-size', type=int, help='Maximum width and height of the extracted image, for previews. The first mip level fitting in it is extracted, from --mip when specified, or the smallest mip level')
+    sp_extract.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of files extracted in parallel in batch mode. Default option is the CPU count')
+    sp_extract.add_argument('--backend', choices=['auto'] + list(BACKENDS), default='auto', help='Backend extracting the textures. auto picks the cheapest available backend supporting each platform, format and output format. Default option is auto')
+    sp_extract.add_argument('--engine', choices=['processes', 'asyncio'], default='processes', help='Execution engine of batch mode. asyncio runs the external tools of --jobs files at once while the other files are processed in threads, processes suits the native decoder better. Default option is processes')
+    sp_extract.add_argument('--timeout', type=float, help='Timeout in seconds of every external tool run, the file fails when it is exceeded')
+    sp_extract.add_argument('--resume', action="store_true", default=False, help='Skip the files of the batch already extracted with the same options by a previous batch, according to its journal')
+    sp_extract.add_argument('--journal', help='Path of the journal recording the files extracted by the batch. Default option is .ghl_img_converter.extract.journal in the output folder')
+    sp_extract.add_argument('--progress', action="store_true", default=False, help='Prints the progress of the batch to the standard error, with its throughput and its remaining time')
+    sp_extract.add_argument('--profile', action="store_true", default=False, help='Prints the time spent in every stage and the counters of every file extracted as JSON lines, followed by a summary with percentiles')
+
+    sp_convert = sp.add_parser('convert', help='Convert an image to a IMG file')
+    sp_convert.set_defaults(func=__convert_args)
+    sp_convert.add_argument('input', help='Path of the input image, root folder or zip or tar archive to convert')
+    sp_convert.add_argument('--output', help='Path to the output IMG, folder or zip or tar archive')
+    sp_convert.add_argument('--platform', choices=['ps3', 'pc', 'x1', 'ios', 'x360', 'wiiu', 'wii', 'all'], nargs='+', required=True, help='Platforms to convert the IMG to, all being PS3, PC, X1, X360 and Wii U. With several platforms, the platform is appended to the output names and the source is encoded once for the PS3, PC, X1, X360 and Wii U textures')
+    sp_convert.add_argument('--game', choices=['ghl', 'djh', 'djh2'], default='ghl', help='Game to convert the IMG to, used in PS3, X360 and Wii textures. Wii textures only exist for djh and djh2. Default option is ghl')
+    sp_convert.add_argument('--width', type=int, help='Width of the output IMG. Not supported on Wii textures')
+    sp_convert.add_argument('--height', type=int, help='Height of the output IMG. Not supported on Wii textures')
+    sp_convert.add_argument('--format', choices=['BC1', 'BC2', 'BC3', 'R8G8B8A8'], default='BC1', help='DDS format of the output IMG, used in PS3, PC, X1, X360 and Wii U textures. Default option is BC1')
+    sp_convert.add_argument('--tex0', choices=['CMPR', 'RGB5A3', 'IA4'], default='RGB5A3', help='TEX0 format of the output IMG, used in Wii textures. Default option is RGB5A3')
+    sp_convert.add_argument('--mipmap', type=int, default=1, help='Mipmap count of the output IMG')
+    sp_convert.add_argument('--flip', action="store_true", default=False, help='Vertically flip the output IMG. Not supported on Wii textures')
+    sp_convert.add_argument('--backend', choices=['auto'] + list(BACKENDS), default='auto', help='Backend converting the textures. auto picks the cheapest available backend supporting each platform, format and mipmap count. Default option is auto')
+    sp_convert.add_argument('--encoder', choices=['pvrtextoolcli', 'native'], help='Alias of --backend, kept for compatibility')
+    sp_convert.add_argument('--quality', choices=['fast', 'high'], default='high', help='Quality preset of the native encoder. Default option is high')
+    sp_convert.add_argument('--mip-filter', choices=['box', 'kaiser'], default='box', help='Filter generating the mip levels with the native backend. kaiser gives sharper mip levels. Default option is box')
+    sp_convert.add_argument('--mip-space', choices=['srgb', 'linear'], default='srgb', help='Color space filtering the mip levels with the native backend. linear converts the sRGB colors to linear light first, keeping the brightness of contrasted details. Default option is srgb')
+    sp_convert.add_argument('--append-mipmaps', action="store_true", default=False, help='When an output IMG already exists with the same game, format and size and fewer mip levels, only encode the missing mip levels with the native backend and append them')
+    sp_convert.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of files converted in parallel in batch mode. Default option is the CPU count')
+    sp_convert.add_argument('--engine', choices=['processes', 'asyncio'], default='processes', help='Execution engine of batch mode. asyncio runs the external tools of --jobs files at once while the other files are processed in threads, processes suits the native encoder better. Default option is processes')
+    sp_convert.add_argument('--timeout', type=float, help='Timeout in seconds of every external tool run, the file fails when it is exceeded')
+    sp_convert.add_argument('--cache', help='Path to the conversion cache folder. IMG files converted from the same source bytes and options are copied from it')
+    sp_convert.add_argument('--cache-size', type=int, default=1024, help='Maximum size of the conversion cache in MiB, the least recently used entries are evicted at the end of each batch. Default option is 1024')
+    sp_convert.add_argument('--cache-link', action="store_true", default=False, help='Hardlink cached IMG files instead of copying them. The output files then share their content with the cache entries, and must not be modified in place by other tools')
+    sp_convert.add_argument('--no-dedup', dest='dedup', action="store_false", default=True, help='Convert every byte-identical source image of a batch separately. By default each one is converted once and its IMG files are copied to the outputs of its duplicates')
+    sp_convert.add_argument('--dedup-link', action="store_true", default=False, help='Hardlink the IMG files of byte-identical source images instead of copying them. The output files then share their content, and must not be modified in place by other tools')
+    sp_convert.add_argument('--resume', action="store_true", default=False, help='Skip the files of the batch already converted with the same options by a previous batch, according to its journal')
+    sp_convert.add_argument('--journal', help='Path of the journal recording the files converted by the batch. Default option is .ghl_img_converter.convert.journal in the output folder')
+    sp_convert.add_argument('--progress', action="store_true", default=False, help='Prints the progress of the batch to the standard error, with its throughput and its remaining time')
+    sp_convert.add_argument('--profile', action="store_true", default=False, help='Prints the time spent in every stage and the counters of every file converted as JSON lines, followed by a summary with percentiles')
+
+    sp_repack = sp.add_parser('repack', help='Repack a IMG file to another platform or game without decoding it')
+    sp_repack.set_defaults(func=__repack_args)
+    sp_repack.add_argument('input', help='Path of the input IMG file, root folder or zip or tar archive to repack')
+    sp_repack.add_argument('--output', help='Path to the output IMG, folder or zip or tar archive')
+    sp_repack.add_argument('--platform', choices=['ps3', 'pc', 'x1', 'x360'], required=True, help='Platform to repack the IMG to')
+    sp_repack.add_argument('--game', choices=['ghl', 'djh', 'djh2'], help='Game to repack the IMG to. Default option is the game of the input IMG')
+    sp_repack.add_argument('--source-platform', choices=['ps3', 'pc', 'x1', 'x360'], help='Force the platform of the input IMG, needed for DJ Hero PlayStation 3 textures')
+    sp_repack.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of files repacked in parallel in batch mode. Default option is the CPU count')
+    sp_repack.add_argument('--resume', action="store_true", default=False, help='Skip the files of the batch already repacked with the same options by a previous batch, according to its journal')
+    sp_repack.add_argument('--journal', help='Path of the journal recording the files repacked by the batch. Default option is .ghl_img_converter.repack.journal in the output folder')
+    sp_repack.add_argument('--progress', action="store_true", default=False, help='Prints the progress of the batch to the standard error, with its throughput and its remaining time')
+    sp_repack.add_argument('--profile', action="store_true", default=False, help='Prints the time spent in every stage and the counters of every file repacked as JSON lines, followed by a summary with percentiles')
+
+    sp_edit = sp.add_parser('edit', help='Edit IMG files in place without decoding their texture: retag their platform or game, or drop mip levels')
+    sp_edit.set_defaults(func=__edit_args)
+    sp_edit.add_argument('input', help='Path of the input IMG file or root folder to edit')
+    sp_edit.add_argument('--platform', choices=['ps3', 'pc', 'x1'], help='Platform to retag the IMG to, PS3, PC and X1 textures sharing their texture data')
+    sp_edit.add_argument('--game', choices=['ghl', 'djh', 'djh2'], help='Game to retag the IMG to, used in PS3, X360 and Wii textures')
+    sp_edit.add_argument('--mipmap', type=int, help='Maximum mipmap count of the IMG, the following mip levels are truncated')
+    sp_edit.add_argument('--max-size', type=int, help='Maximum width and height of the IMG, the leading mip levels larger than it are dropped. The smallest mip level is always kept')
+    sp_edit.add_argument('--source-platform', choices=['ps3', 'pc', 'x1', 'x360', 'wii'], help='Force the platform of the input IMG, needed for DJ Hero PlayStation 3 textures')
+    sp_edit.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of files edited in parallel in batch mode. Default option is the CPU count')
+    sp_edit.add_argument('--resume', action="store_true", default=False, help='Skip the files of the batch already edited with the same options by a previous batch and unchanged since, according to its journal')
+    sp_edit.add_argument('--journal', help='Path of the journal recording the files edited by the batch. Default option is .ghl_img_converter.edit.journal in the input folder')
+    sp_edit.add_argument('--progress', action="store_true", default=False, help='Prints the progress of the batch to the standard error, with its throughput and its remaining time')
+    sp_edit.add_argument('--profile', action="store_true", default=False, help='Prints the time spent in every stage and the counters of every file edited as JSON lines, followed by a summary with percentiles')
+
+    sp_info = sp.add_parser('info', help='Prints information about the IMG file')
+    sp_info.set_defaults(func=__info_args)
+    sp_info.add_argument('input', help='Path of the input IMG file, root folder or zip or tar archive to scan')
+    sp_info.add_argument('--output-format', choices=['text', 'json', 'csv'], default='text', help='Format of the printed information, json prints one JSON object per line. Default option is text')
+    sp_info.add_argument('--jobs', type=int, help='Number of threads reading headers in batch mode. Default option is the thread pool default')
+
+    sp_backends = sp.add_parser('backends', help='Prints the codec backends with their availability, cost and supported conversions')
+    sp_backends.set_defaults(func=__backends_args)
+
+    sp_serve = sp.add_parser('serve', help='Run a daemon running the commands of its clients on a pool of worker processes kept alive between commands')
+    sp_serve.set_defaults(func=__serve_args)
+    sp_serve.add_argument('--socket', nargs='?', const='', help='Path of the Unix socket the daemon listens to. Without a path, the default socket ghl_img_client.py sends its commands to, ghl_img_converter.sock in $XDG_RUNTIME_DIR or in a folder of the current user in the temporary folder. Without a socket, the commands are read from the standard input as JSON lines and their results written to the standard output')
+    sp_serve.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of commands run in parallel. Default option is the CPU count')
+
+    return parser
+
+def __run_command(argv: list, daemon=False):
+    """
+    Run the command line arguments
+    """
     # Drag and drop extraction
-    if len(sys.argv) == 2 and sys.argv[1].lower().endswith('.img'):
-        extract_img(sys.argv[1], os.path.splitext(sys.argv[1])[0] + '.png')
-    # Command line usage
-    else:
-        import argparse
+    if len(argv) == 1 and argv[0].lower().endswith('.img'):
+        extract_img(argv[0], os.path.splitext(argv[0])[0] + '.png')
+        return
 
-        parser = argparse.ArgumentParser(description='A python script to extract and convert to IMG files used in some FSG games like Guitar Hero Live, DJ Hero and DJ Hero 2.')
-        sp = parser.add_subparsers(help='You must choose one of the following commands')
-        
-        sp_extract = sp.add_parser('extract', help='Extract a IMG file to a decompressed format')
-        sp_extract.set_defaults(func=__extract_args)
-        sp_extract.add_argument('input', help='Path of the input IMG file or root folder to extract')
-        sp_extract.add_argument('--output', help='Path to the output decompressed format or output folder')
-        sp_extract.add_argument('--platform', choices=['ps3', 'pc', 'x1', 'ios', 'x360', 'wiiu', 'wii'], help='Force extraction from the specified platform')
-
-        sp_convert = sp.add_parser('convert', help='Convert an image to a IMG file')
-        sp_convert.set_defaults(func=__convert_args)
-        sp_convert.add_argument('input', help='Path of the input image or root folder to convert')
-        sp_convert.add_argument('--output', help='Path to the output IMG or folder')
-        sp_convert.add_argument('--platform', choices=['ps3', 'pc', 'x1', 'ios', 'x360', 'wiiu', 'wii'], required=True, help='Platform to convert the IMG to')
-        sp_convert.add_argument('--game', choices=['ghl', 'djh', 'djh2'], default='ghl', help='Game to convert the IMG to, used in PS3 and X360 textures. Default option is ghl')
-        sp_convert.add_argument('--width', type=int, help='Width of the output IMG. Not supported on Wii textures')
-        sp_convert.add_argument('--height', type=int, help='Height of the output IMG. Not supported on Wii textures')
-        sp_convert.add_argument('--format', choices=['BC1', 'BC2', 'BC3', 'R8G8B8A8'], default='BC1', help='DDS format of the output IMG, used in PS3, PC, X1, X360 and Wii U textures. Default option is BC1')
-        sp_convert.add_argument('--tex0', choices=['CMPR', 'RGB5A3', 'IA4'], default='RGB5A3', help='TEX0 format of the output IMG, used in Wii textures. Default option is RGB5A3')
-        sp_convert.add_argument('--mipmap', type=int, default=1, help='Mipmap count of the output IMG')
-        sp_convert.add_argument('--flip', action="store_true", default=False, help='Vertically flip the output IMG. Not supported on Wii textures')
-
-        sp_info = sp.add_parser('info', help='Prints information about the IMG file')
-        sp_info.set_defaults(func=__info_args)
-        sp_info.add_argument('input', help='Path of the input IMG file')
-
-        args = parser.parse_args()
-        args.func(args)
+    parser = __create_parser()
+    args = parser.parse_args(argv)
+
+    # Reject the conversions failing for every file before starting a batch
+    if args.func == __convert_args and __get_convert_game_error(args) != None:
+        parser.error(__get_convert_game_error(args))
+    if __get_archive_batch_error(args) != None:
+        parser.error(__get_archive_batch_error(args))
+
+    if daemon and args.func == __serve_args:
+        raise ValueError('The daemon cannot run serve')
+
+    set_timeout(getattr(args, 'timeout', None))
+    args.func(args)
+
+if __name__ == "__main__":
+    __run_command(sys.argv[1:])
@@ -0,0 +1,185 @@
+import struct
+
+from textureformat import DDSFormat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+GX2_TEXTURE_SIZE = 156 # Size of the GX2 Texture block stored after the GHL Wii U IMG header
+
+GX2_FORMATS = {
+    DDSFormat.BC1: 0x31,
+    DDSFormat.BC2: 0x32,
+    DDSFormat.BC3: 0x33,
+    DDSFormat.R8G8B8A8: 0x1A
+}
+
+TILE_MODE_LINEAR_ALIGNED = 1
+TILE_MODE_1D_TILED_THIN1 = 2
+TILE_MODE_2D_TILED_THIN1 = 4
+
+class GX2Surface():
+    """
+    GX2 Surface values of a Wii U texture
+    """
+    def __init__(self, width: int, height: int, dds: DDSFormat, mipmap: int, image_size: int, tile_mode: int, swizzle: int, alignment: int, pitch: int):
+        self.width = width
+        self.height = height
+        self.dds = dds
+        self.mipmap = mipmap
+        self.image_size = image_size
+        self.tile_mode = tile_mode
+        self.swizzle = swizzle
+        self.alignment = alignment
+        self.pitch = pitch # Pitch in elements, blocks for compressed formats
+
+    def get_bpp(self):
+        """
+        Return the bits per element of the surface format
+        """
+        return self.dds.size * 8 if self.dds.compressed else self.dds.size
+
+    def get_elements(self):
+        """
+        Return the width and height of the surface in elements
+        """
+        if self.dds.compressed:
+            return max(1, (self.width + 3) // 4), max(1, (self.height + 3) // 4)
+        return self.width, self.height
+
+    def get_texture(self):
+        """
+        Return a GX2 Texture block of the surface, with the texture registers initialized for a 2D texture
+        """
+        texture = struct.pack('>8I', 1, self.width, self.height, 1, self.mipmap, GX2_FORMATS[self.dds], 0, 1)
+        texture += struct.pack('>8I', self.image_size, 0, 0, 0, self.tile_mode, self.swizzle, self.alignment, self.pitch)
+        texture += bytes(13 * 4) # Mip level offsets
+        texture += struct.pack('>4I', 0, self.mipmap, 0, 1) # View first mip, mip count, first slice and slice count
+        texture += bytes([0x00, 0x01, 0x02, 0x03]) # Component selectors
+
+        # SQ_TEX_RESOURCE words 0, 1, 4, 5 and 6, the base and mip addresses only hold the swizzle
+        pitch = self.pitch * (4 if self.dds.compressed else 1)
+        texture += struct.pack('>5I',
+            1 | (self.tile_mode << 3) | ((max(8, pitch) // 8 - 1) << 8) | ((self.width - 1) << 19),
+            (self.height - 1) | (GX2_FORMATS[self.dds] << 26),
+            (2 << 14) | (0 << 16) | (1 << 19) | (2 << 22) | (3 << 25),
+            self.mipmap - 1,
+            (2 << 30))
+
+        return texture
+
+    @staticmethod
+    def from_texture(texture: bytes):
+        """
+        Return the GX2 Surface values of a GX2 Texture block
+        """
+        _, width, height, _, mipmap, format, _, _ = struct.unpack('>8I', texture[0:32])
+        image_size, _, _, _, tile_mode, swizzle, alignment, pitch = struct.unpack('>8I', texture[32:64])
+
+        for dds in GX2_FORMATS:
+            if GX2_FORMATS[dds] == format & 0x3F:
+                return GX2Surface(width, height, dds, mipmap, image_size, tile_mode, swizzle, alignment, pitch)
+        raise ValueError('Unknown format')
+
+    @staticmethod
+    def from_dds(width: int, height: int, dds: DDSFormat, mipmap=1):
+        """
+        Return the GX2 Surface values of a 2D tiled texture with the specified width, height, format and mipmap count, as computed by GX2CalcSurfaceSizeAndAlignment
+        """
+        surface = GX2Surface(width, height, dds, mipmap, 0, TILE_MODE_2D_TILED_THIN1, 0xD0000, 0, 0)
+        bpp = surface.get_bpp()
+        elements_width, elements_height = surface.get_elements()
+        tile_mode = surface.get_tile_mode()
+
+        if tile_mode == TILE_MODE_2D_TILED_THIN1:
+            # Whole 32x16 elements macro tiles
+            surface.pitch = (elements_width + 31) // 32 * 32
+            padded_height = (elements_height + 15) // 16 * 16
+            surface.alignment = max(bpp * 16 * 32 // 8, 256)
+        else:
+            # Whole 8x8 elements micro tiles
+            surface.pitch = (elements_width + 7) // 8 * 8
+            padded_height = (elements_height + 7) // 8 * 8
+            surface.alignment = 256
+            surface.swizzle = 0
+
+        surface.image_size = surface.pitch * padded_height * bpp // 8
+
+        return surface
+
+    def get_tile_mode(self):
+        """
+        Return the tile mode used by the first mip level.
+        2D tiled surfaces smaller than a macro tile fall back to 1D tiling.
+        """
+        elements_width, elements_height = self.get_elements()
+
+        if self.tile_mode == TILE_MODE_2D_TILED_THIN1 and (elements_width < 32 or elements_height < 16):
+            return TILE_MODE_1D_TILED_THIN1
+        return self.tile_mode
+
+    def get_addresses(self):
+        """
+        Return the byte address of every element of the first mip level in the tiled image data, with shape (height, width) in elements
+        """
+        if numpy == None:
+            raise RuntimeError('NumPy is required to tile Wii U textures')
+
+        elements_width, elements_height = self.get_elements()
+        bpp = self.get_bpp()
+        y, x = numpy.mgrid[0:elements_height, 0:elements_width].astype(numpy.int64)
+        tile_mode = self.get_tile_mode()
+
+        if tile_mode == TILE_MODE_LINEAR_ALIGNED or tile_mode == 0:
+            return (y * self.pitch + x) * bpp // 8
+
+        if tile_mode not in (TILE_MODE_1D_TILED_THIN1, TILE_MODE_2D_TILED_THIN1):
+            raise ValueError('Unsupported tile mode')
+
+        # Index of the element within its 8x8 micro tile
+        if bpp == 32:
+            bits = [x & 1, (x >> 1) & 1, y & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1]
+        elif bpp == 64:
+            bits = [x & 1, y & 1, (x >> 1) & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1]
+        else:
+            bits = [y & 1, x & 1, (x >> 1) & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1]
+
+        element = sum(bit << i for i, bit in enumerate(bits)) * bpp // 8
+
+        if tile_mode == TILE_MODE_1D_TILED_THIN1:
+            return element + ((x >> 3) + (y >> 3) * (self.pitch >> 3)) * (64 * bpp // 8)
+
+        # 2 pipes and 4 banks, with the pipe and bank swizzle of the surface
+        pipe = ((y >> 3) ^ (x >> 3)) & 1
+        bank = (((y >> 5) ^ (x >> 3)) & 1) | (((y >> 4) ^ (x >> 4)) & 1) << 1
+        bank_pipe = ((pipe + 2 * bank) ^ (((self.swizzle >> 8) & 1) + 2 * ((self.swizzle >> 9) & 3))) % 8
+        pipe = bank_pipe % 2
+        bank = bank_pipe // 2
+
+        # 32x16 elements macro tiles
+        macro_tile_offset = ((x // 32) + (self.pitch // 32) * (y // 16)) * (bpp * 16 * 32 // 8)
+        total = element + (macro_tile_offset >> 3)
+
+        return (bank << 9) | (pipe << 8) | (total & 0xFF) | ((total & ~0xFF) << 3)
+
+    def untile(self, blob: bytes):
+        """
+        Return the linear image data of the first mip level from its tiled image data
+        """
+        elements = self.get_bpp() // 8
+        addresses = self.get_addresses().reshape(-1, 1) + numpy.arange(elements)
+
+        return numpy.frombuffer(blob, dtype=numpy.uint8, count=self.image_size)[addresses].tobytes()
+
+    def tile(self, blob: bytes):
+        """
+        Return the tiled image data of the first mip level from its linear image data
+        """
+        elements = self.get_bpp() // 8
+        addresses = self.get_addresses().reshape(-1, 1) + numpy.arange(elements)
+        tiled = numpy.zeros(self.image_size, dtype=numpy.uint8)
+        tiled[addresses] = numpy.frombuffer(blob, dtype=numpy.uint8, count=addresses.size).reshape(addresses.shape)
+
+        return tiled.tobytes()
@@ -0,0 +1,159 @@
+from enum import Enum
+from pngfile import read_png
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+KAISER_WIDTH = 3 # Half width of the Kaiser filter, in pixels of the next mip level
+KAISER_ALPHA = 4 # Shape of the Kaiser window, higher values reduce ringing and sharpness
+
+class MipFilter(Enum):
+    """
+    Enum of the filters of the built-in mip level generator
+    """
+    BOX = 'box' # Average of every 2x2 pixels
+    KAISER = 'kaiser' # Kaiser windowed sinc, sharper mip levels
+
+    @staticmethod
+    def from_string(value: str):
+        """
+        Return the mip filter associated with its name as defined in the command line options
+        """
+        for mip_filter in MipFilter:
+            if value == mip_filter.value:
+                return mip_filter
+        raise ValueError('Unknown mip filter')
+
+def read_image(source: str):
+    """
+    Read the source image file with Pillow when installed, or with the built-in PNG reader otherwise.
+    Return an array of RGBA pixels with shape (height, width, 4).
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to read images')
+
+    if Image != None:
+        image = Image.open(source)
+        pixels = numpy.asarray(image.convert('RGBA'))
+        image.close()
+        return pixels
+
+    return read_png(source)
+
+def resize(pixels, width: int, height: int):
+    """
+    Resize an array of RGBA pixels to the specified width and height with a bilinear filter
+    """
+    h, w = pixels.shape[0:2]
+
+    if w == width and h == height:
+        return pixels
+
+    # Coordinates of the destination pixel centers in the source image
+    x = numpy.clip((numpy.arange(width) + 0.5) * w / width - 0.5, 0, w - 1)
+    y = numpy.clip((numpy.arange(height) + 0.5) * h / height - 0.5, 0, h - 1)
+    x0 = numpy.floor(x).astype(numpy.intp)
+    y0 = numpy.floor(y).astype(numpy.intp)
+    x1 = numpy.minimum(x0 + 1, w - 1)
+    y1 = numpy.minimum(y0 + 1, h - 1)
+    fx = (x - x0)[None, :, None]
+    fy = (y - y0)[:, None, None]
+
+    source = pixels.astype(numpy.float32)
+    top = source[y0][:, x0] * (1 - fx) + source[y0][:, x1] * fx
+    bottom = source[y1][:, x0] * (1 - fx) + source[y1][:, x1] * fx
+
+    return numpy.clip(top * (1 - fy) + bottom * fy + 0.5, 0, 255).astype(numpy.uint8)
+
+def downsample(pixels):
+    """
+    Return the next mip level of an array of RGBA pixels, halving each side with a box filter
+    """
+    h, w = pixels.shape[0:2]
+    fw = 2 if w > 1 else 1
+    fh = 2 if h > 1 else 1
+    source = pixels[:h // fh * fh, :w // fw * fw].astype(numpy.uint32)
+
+    return ((source.reshape(h // fh, fh, w // fw, fw, -1).sum(axis=(1, 3)) + fw * fh // 2) // (fw * fh)).astype(numpy.uint8)
+
+def srgb_to_linear(values):
+    """
+    Convert an array of sRGB values between 0 and 1 to linear light values
+    """
+    return numpy.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(values):
+    """
+    Convert an array of linear light values between 0 and 1 to sRGB values
+    """
+    return numpy.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1 / 2.4) - 0.055)
+
+def __get_filter_weights(mip_filter: MipFilter):
+    """
+    Return the weights of the source pixels around the center of a pixel of the next mip level, along one axis
+    """
+    if mip_filter == MipFilter.BOX:
+        return numpy.array([0.5, 0.5], dtype=numpy.float32)
+
+    # Kaiser windowed sinc sampled at the source pixel centers, in pixels of the next mip level
+    x = (numpy.arange(-2 * KAISER_WIDTH, 2 * KAISER_WIDTH) + 0.5) / 2
+    weights = numpy.sinc(x) * numpy.i0(KAISER_ALPHA * numpy.sqrt(1 - (x / KAISER_WIDTH) ** 2)) / numpy.i0(KAISER_ALPHA)
+
+    return (weights / weights.sum()).astype(numpy.float32)
+
+def __decimate(values, axis: int, weights):
+    """
+    Halve an array of float pixels along the specified axis with the filter weights, the pixels past the edges repeating the edge pixels
+    """
+    size = values.shape[axis]
+
+    if size == 1:
+        return values
+
+    radius = len(weights) // 2
+    padding = [(0, 0)] * values.ndim
+    padding[axis] = (radius, radius)
+    padded = numpy.moveaxis(numpy.pad(values, padding, mode='edge'), axis, 0)
+
+    # Source pixels 2i-radius+1 to 2i+radius around every pixel i of the next mip level
+    result = sum(weight * padded[i + 1:i + 1 + size // 2 * 2:2] for i, weight in enumerate(weights))
+
+    return numpy.moveaxis(result, 0, axis)
+
+def get_mipmap(pixels, mipmap: int, mip_filter=MipFilter.BOX, linear=False):
+    """
+    Return a list of the mipmap count levels of an array of RGBA pixels, starting from the pixels themselves.
+    Every level is filtered from the unquantized previous level, with the colors converted to linear light when linear is True.
+    Box filtered sRGB levels are filtered from the quantized previous level instead.
+    """
+    levels = [pixels]
+
+    if mip_filter == MipFilter.BOX and not linear:
+        for _ in range(mipmap - 1):
+            levels.append(downsample(levels[-1]))
+
+        return levels
+
+    weights = __get_filter_weights(mip_filter)
+    values = pixels.astype(numpy.float32) / 255
+
+    if linear:
+        values[..., 0:3] = srgb_to_linear(values[..., 0:3])
+
+    for _ in range(mipmap - 1):
+        values = numpy.clip(__decimate(__decimate(values, 0, weights), 1, weights), 0, 1)
+        level = values.copy()
+
+        if linear:
+            level[..., 0:3] = linear_to_srgb(level[..., 0:3])
+
+        levels.append((level * 255 + 0.5).astype(numpy.uint8))
+
+    return levels
@@ -47,21 +47,13 @@ class Platform(Enum):
         """
         Return the DDS format associated with its IMG header value
         """
-        img = self.get_img_from_img(header)
-        for dds in DDSFormat:
-            if img == dds.img:
-                return dds
-        raise ValueError('Unknown format')
+        return DDSFormat.from_img(self.get_img_from_img(header))
     
     def get_tex0_from_img(self, header: bytes):
         """
         Return the TEX0 format associated with its IMG header value
         """
-        img = self.get_img_from_img(header)
-        for tex0 in TEX0Format:
-            if img == tex0.img:
-                return tex0
-        raise ValueError('Unknown format')
+        return TEX0Format.from_img(self.get_img_from_img(header))
 
     @staticmethod
     def from_string(value: str):
@@ -133,9 +125,8 @@ class IMGFormat(Enum):
         """
         Return the IMGFormat associated with its platform and game combination
         """
-        for img in IMGFormat:
-            if platform == img.platform and game == img.game:
-                return img
+        if (platform, game) in IMG_FORMATS_BY_ENUMS:
+            return IMG_FORMATS_BY_ENUMS[(platform, game)]
         raise ValueError('Unknown IMG format. This platform and/or game may not be supported')
 
     @staticmethod
@@ -143,7 +134,14 @@ class IMGFormat(Enum):
         """
         Return the IMGFormat associated with its IMG header values
         """
-        for img in IMGFormat:
-            if value[18:20] == img.img[-2:]:
-                return img
-        raise ValueError('Unknown IMG format. This platform and/or game may not be supported')
\ No newline at end of file
+        if bytes(value[18:20]) in IMG_FORMATS:
+            return IMG_FORMATS[bytes(value[18:20])]
+        raise ValueError('Unknown IMG format. This platform and/or game may not be supported')
+
+# Reverse lookups of the IMG formats, the first declared format wins for shared header values
+IMG_FORMATS = {}
+IMG_FORMATS_BY_ENUMS = {}
+
+for img in IMGFormat:
+    IMG_FORMATS.setdefault(img.img[-2:], img)
+    IMG_FORMATS_BY_ENUMS[(img.platform, img.game)] = img
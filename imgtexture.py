@@ -0,0 +1,127 @@
+import mmap
+import os
+
+from imgformat import IMGFormat, Platform
+from profiler import count, stage
+from textureformat import PVR_HEADER_SIZE, PVRFormat
+from typing import Optional
+
+IMG_HEADER_SIZE = 20 # Size of the IMG header of every platform
+
+class IMGTexture():
+    """
+    Memory mapped IMG file, with its IMG header parsed once and its mip levels exposed as memory views without copying them
+    """
+    __slots__ = ('path', 'file', 'map', 'view', 'header', 'platform', 'game', 'width', 'height', 'mipmap', 'texture')
+
+    def __init__(self, path: str, platform: Optional[Platform]=None):
+        self.path = path
+        self.file = open(path, 'rb')
+
+        try:
+            if os.fstat(self.file.fileno()).st_size < IMG_HEADER_SIZE:
+                raise ValueError('Not a IMG file')
+
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.map)
+            self.header = bytes(self.view[0:IMG_HEADER_SIZE])
+
+            img = IMGFormat.from_img(self.header)
+
+            # Identify the platform of the IMG
+            self.platform = img.platform if platform == None else platform
+            self.game = img.game
+            self.width = self.platform.get_width_from_img(self.header)
+            self.height = self.platform.get_height_from_img(self.header)
+            self.mipmap = self.platform.get_mipmap_from_img(self.header)
+
+            if self.platform == Platform.IOS:
+                self.texture = PVRFormat.PVRTC1_4
+            elif self.platform == Platform.WII:
+                self.texture = self.platform.get_tex0_from_img(self.header)
+            else:
+                self.texture = self.platform.get_dds_from_img(self.header)
+        except Exception:
+            # Release the view, the map and the file opened before the error, as close is never called
+            if hasattr(self, 'view'):
+                self.view.release()
+            if hasattr(self, 'map'):
+                self.map.close()
+
+            self.file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Unmap and close the IMG file. Every memory view of the texture must be released before.
+        """
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def get_payload(self):
+        """
+        Return a memory view of the data following the IMG header
+        """
+        return self.view[IMG_HEADER_SIZE:]
+
+    def get_level_offset(self, level: int):
+        """
+        Return the offset of the specified mip level in the payload.
+        The DDS and TEX0 textures store their mip levels right after the IMG header, and the iOS textures after the PVR header and its metadata block.
+        """
+        if self.platform == Platform.WIIU:
+            raise ValueError('Platform not supported')
+
+        if level < 0 or level >= self.mipmap:
+            raise IndexError('Mip level out of range')
+
+        offset = self.texture.get_size_mipmap(self.width, self.height, level)
+
+        if self.platform == Platform.IOS:
+            offset += PVR_HEADER_SIZE + PVRFormat.get_metadata_size_from_header(self.view[IMG_HEADER_SIZE:IMG_HEADER_SIZE + PVR_HEADER_SIZE])
+
+        return offset
+
+    def get_level(self, level=0):
+        """
+        Return a memory view of the specified mip level
+        """
+        offset = IMG_HEADER_SIZE + self.get_level_offset(level)
+
+        return self.view[offset:offset + self.texture.get_size(self.width >> level, self.height >> level)]
+
+    def write(self, dest: str, header: bytes, start=0, end: Optional[int]=None):
+        """
+        Write the specified header followed by the payload between the start and end offsets to the destination file.
+        The payload is copied by the kernel with sendfile when available.
+        """
+        end = len(self.view) - IMG_HEADER_SIZE if end == None else end
+
+        count('bytes_written', len(header) + end - start)
+
+        with stage('write'):
+            file = open(dest, 'wb')
+            file.write(header)
+
+            if hasattr(os, 'sendfile'):
+                file.flush()
+                offset = IMG_HEADER_SIZE + start
+
+                while offset < IMG_HEADER_SIZE + end:
+                    sent = os.sendfile(file.fileno(), self.file.fileno(), offset, IMG_HEADER_SIZE + end - offset)
+
+                    if sent == 0:
+                        break
+
+                    offset += sent
+            else:
+                file.write(self.view[IMG_HEADER_SIZE + start:IMG_HEADER_SIZE + end])
+
+            file.close()
@@ -0,0 +1,76 @@
+import json
+import os
+
+class Journal():
+    """
+    Append-only journal of the files completed by a batch, one JSON line per file written as soon as the file is completed.
+    A file is skipped when resuming if its source has the size, modification time and options of its journal entry and its output files still exist.
+    """
+    def __init__(self, path: str, resume=False):
+        self.path = path
+        self.entries = {} # Journal entry of every completed source path
+        self.skipped = 0
+        self.cut = False # Whether the last line of the journal was cut by a crash
+
+        if resume and os.path.isfile(path):
+            self.load()
+
+        # Journals are only appended to when resuming, a new batch starts an empty journal
+        self.file = open(path, 'a' if resume else 'w')
+
+        if self.cut:
+            # End the line of the entry cut by a crash, ignored by load
+            self.file.write('\n')
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def load(self):
+        """
+        Read the entries of the journal, the last entry of a source path replacing the previous ones
+        """
+        file = open(self.path)
+
+        for line in file:
+            self.cut = not line.endswith('\n')
+
+            try:
+                entry = json.loads(line)
+                self.entries[entry['source']] = entry
+            except (ValueError, KeyError, TypeError):
+                # Line cut by a crash
+                continue
+
+        file.close()
+
+    def is_completed(self, source: str, size: int, mtime: int, options: dict, outputs: list):
+        """
+        Return whether the source file with the specified size, modification time in nanoseconds and options was completed with the specified output files, counting it as skipped
+        """
+        entry = self.entries.get(os.path.abspath(source))
+
+        if entry == None or entry.get('size') != size or entry.get('mtime') != mtime or json.dumps(entry.get('options'), sort_keys=True) != json.dumps(options, sort_keys=True):
+            return False
+
+        if not all(os.path.isfile(output) for output in outputs):
+            return False
+
+        self.skipped += 1
+        return True
+
+    def record(self, source: str, size: int, mtime: int, options: dict, outputs: list):
+        """
+        Append the entry of the completed source file with the specified size, modification time in nanoseconds, options and output files
+        """
+        self.file.write(json.dumps({'source': os.path.abspath(source), 'size': size, 'mtime': mtime, 'options': options, 'outputs': [os.path.abspath(output) for output in outputs]}) + '\n')
+        self.file.flush()
+
+    def close(self):
+        """
+        Close the journal file
+        """
+        self.file.close()
@@ -0,0 +1,131 @@
+import asyncio
+import contextvars
+import os
+import subprocess
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from profiler import count, stage
+from typing import Optional
+
+current_orchestrator = contextvars.ContextVar('current_orchestrator', default=None) # Orchestrator running the current job
+default_timeout = None # Timeout in seconds of the external tools run outside of an orchestrator
+
+def set_timeout(timeout: Optional[float]):
+    """
+    Set the timeout in seconds of the external tools run outside of an orchestrator, None for no timeout
+    """
+    global default_timeout
+    default_timeout = timeout
+
+def run_tool(argv: list):
+    """
+    Run an external tool with the specified argument vector and wait for it.
+    Inside a job of an orchestrator, the tool is launched by the event loop of the orchestrator instead.
+    Raise a RuntimeError when the tool fails or times out.
+    """
+    orchestrator = current_orchestrator.get()
+
+    # Python tools are profiled under the name of their script
+    name = os.path.basename(argv[1] if argv[0] == sys.executable else argv[0])
+    count('tool_runs')
+
+    with stage('tool.' + name):
+        if orchestrator != None:
+            asyncio.run_coroutine_threadsafe(orchestrator.run_tool(argv), orchestrator.loop).result()
+            return
+
+        try:
+            returncode = subprocess.run(argv, timeout=default_timeout).returncode
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(os.path.basename(argv[0]) + ' timed out after ' + str(default_timeout) + ' seconds')
+
+    if returncode != 0:
+        raise RuntimeError(os.path.basename(argv[0]) + ' failed with exit code ' + str(returncode))
+
+class Orchestrator():
+    """
+    Asyncio execution engine of conversion jobs.
+    Every job runs in a worker thread, and its external tools are launched by the event loop with at most tools processes at once.
+    The Python stages of the jobs, such as byte swaps and headers, overlap with the tools still running for other jobs.
+    """
+    def __init__(self, tools: Optional[int]=None, timeout: Optional[float]=None, workers: Optional[int]=None):
+        self.tools = tools if tools != None else os.cpu_count()
+        self.timeout = timeout # Timeout in seconds of every external tool
+        self.workers = workers if workers != None else self.tools * 2
+        self.loop = None
+        self.semaphore = None
+        self.executor = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.semaphore = asyncio.Semaphore(self.tools)
+        self.executor = ThreadPoolExecutor(self.workers)
+        return self
+
+    async def __aexit__(self, *args):
+        self.executor.shutdown(wait=True)
+
+    async def run_tool(self, argv: list):
+        """
+        Launch an external tool with the specified argument vector once a tool slot is free, and wait for it.
+        Raise a RuntimeError when the tool fails or times out, killing it on timeout.
+        """
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(*argv)
+
+            try:
+                returncode = await asyncio.wait_for(process.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise RuntimeError(os.path.basename(argv[0]) + ' timed out after ' + str(self.timeout) + ' seconds')
+
+        if returncode != 0:
+            raise RuntimeError(os.path.basename(argv[0]) + ' failed with exit code ' + str(returncode))
+
+    async def run(self, func, *args):
+        """
+        Run the job function with the specified arguments in a worker thread, its external tools being launched by this orchestrator.
+        Return the value returned by the function.
+        """
+        context = contextvars.copy_context()
+        context.run(current_orchestrator.set, self)
+
+        return await self.loop.run_in_executor(self.executor, context.run, func, *args)
+
+    async def map(self, func, jobs: list):
+        """
+        Run the job function on every tuple of arguments of the jobs list.
+        Return the list of the values returned by the function, or of the exceptions raised, in the order of the jobs.
+        """
+        return await asyncio.gather(*(self.run(func, *job) for job in jobs), return_exceptions=True)
+
+    async def as_completed(self, func, jobs, limit: Optional[int]=None):
+        """
+        Run the job function on every tuple of arguments of the jobs iterable, taking the next job from it only when fewer than limit jobs are running.
+        Yield the index of every job with the value returned by the function, or the exception raised, as soon as the job ends.
+        """
+        async def run(index: int, job: tuple):
+            try:
+                return index, await self.run(func, *job)
+            except Exception as error:
+                return index, error
+
+        jobs = enumerate(jobs)
+        pending = set()
+
+        while True:
+            for index, job in jobs:
+                pending.add(asyncio.ensure_future(run(index, job)))
+
+                if limit != None and len(pending) >= limit:
+                    break
+
+            if len(pending) == 0:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                yield task.result()
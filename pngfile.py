@@ -0,0 +1,198 @@
+import struct
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PNG_SIGNATURE = bytes([0x89, 0x50, 0x4E, 0x47, 0x0D, 0x0A, 0x1A, 0x0A])
+
+def __chunk(type: bytes, data: bytes):
+    """
+    Return a PNG chunk of the specified type and data
+    """
+    return struct.pack('>I', len(data)) + type + data + struct.pack('>I', zlib.crc32(type + data))
+
+def encode_png(pixels, level=6):
+    """
+    Encode an array of RGBA pixels with shape (height, width, 4) to a PNG image.
+    Return the bytes of the PNG file.
+    """
+    height, width, channels = pixels.shape
+
+    if channels != 4:
+        raise ValueError('Only RGBA pixels are supported')
+
+    # Prepend the none filter type to every row
+    rows = bytearray((width * 4 + 1) * height)
+    view = memoryview(rows)
+    data = pixels.tobytes()
+
+    for y in range(height):
+        view[y * (width * 4 + 1) + 1:(y + 1) * (width * 4 + 1)] = data[y * width * 4:(y + 1) * width * 4]
+
+    png = bytearray(PNG_SIGNATURE)
+    png += __chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+    png += __chunk(b'IDAT', zlib.compress(rows, level))
+    png += __chunk(b'IEND', b'')
+
+    return png
+
+def write_png(dest: str, pixels, level=6):
+    """
+    Write an array of RGBA pixels with shape (height, width, 4) to the destination PNG file
+    """
+    file = open(dest, 'wb')
+    file.write(encode_png(pixels, level))
+    file.close()
+
+def __paeth(a, b, c):
+    """
+    Return the Paeth predictors of arrays of left, above and upper left bytes: the closest of them to left + above - upper left, in this order on ties
+    """
+    bc = b - c
+    ac = a - c
+    pa = numpy.abs(bc)
+    pb = numpy.abs(ac)
+    pc = numpy.abs(bc + ac)
+
+    return numpy.where((pa <= pb) & (pa <= pc), a, numpy.where(pb <= pc, b, c))
+
+def __get_diagonals(pixels, width: int):
+    """
+    Return a view of an array of pixels with shape (height, width, channels) where the pixel at row y and column x is at row y and column x + y, so that every anti-diagonal of pixels is a column.
+    Only the columns of the pixels of each row are valid.
+    """
+    height, _, channels = pixels.shape
+    item = pixels.itemsize
+
+    return numpy.lib.stride_tricks.as_strided(pixels, shape=(height, height + width - 1, channels), strides=((width - 1) * channels * item, channels * item, item))
+
+def __unfilter(data: bytes, width: int, height: int, bpp: int):
+    """
+    Reverse the filter of every scanline of the decompressed image data.
+    Return the raw rows of the image.
+    """
+    stride = width * bpp
+    rows = numpy.frombuffer(data, dtype=numpy.uint8, count=(stride + 1) * height).reshape(height, stride + 1)
+    filters = rows[:, 0]
+
+    if numpy.any(filters > 4):
+        raise ValueError('Unknown PNG filter type')
+
+    if not numpy.any(filters >= 3):
+        # Each row only depends on the previous one
+        raw = numpy.empty((height, stride), dtype=numpy.uint8)
+        prior = numpy.zeros(stride, dtype=numpy.uint8)
+
+        for y in range(height):
+            row = rows[y, 1:]
+
+            if filters[y] == 1:
+                # Running sum of every channel, wrapping at 256
+                row = row.reshape(-1, bpp).cumsum(axis=0, dtype=numpy.uint8).reshape(-1)
+            elif filters[y] == 2:
+                row = row + prior
+
+            raw[y] = row
+            prior = raw[y]
+
+        return raw.tobytes()
+
+    # Average and Paeth bytes depend on the left, above and upper left bytes, so the pixels of every anti-diagonal only depend on the two previous anti-diagonals and are unfiltered at once.
+    # The raw pixels are padded with a row above and a column on the left of zero bytes.
+    pixels = __get_diagonals(numpy.ascontiguousarray(rows[:, 1:]).reshape(height, width, bpp), width)
+    padded = numpy.zeros((height + 1, width + 1, bpp), dtype=numpy.int16)
+    raw = __get_diagonals(padded, width + 1)
+    masks = [(filters == filter)[:, None] for filter in range(5)]
+    counts = [[0] + numpy.cumsum(mask).tolist() for mask in masks]
+
+    for d in range(width + height - 1):
+        y0 = max(0, d - width + 1)
+        y1 = min(height, d + 1)
+        a = raw[y0 + 1:y1 + 1, d + 1]
+        b = raw[y0:y1, d + 1]
+        c = raw[y0:y1, d]
+
+        # Only the filter types of the rows of the anti-diagonal are predicted
+        if counts[4][y1] > counts[4][y0]:
+            prediction = __paeth(a, b, c)
+        else:
+            prediction = numpy.zeros_like(a)
+        if counts[3][y1] > counts[3][y0]:
+            numpy.copyto(prediction, (a + b) >> 1, where=masks[3][y0:y1])
+        if counts[2][y1] > counts[2][y0]:
+            numpy.copyto(prediction, b, where=masks[2][y0:y1])
+        if counts[1][y1] > counts[1][y0]:
+            numpy.copyto(prediction, a, where=masks[1][y0:y1])
+        if counts[0][y1] > counts[0][y0]:
+            numpy.copyto(prediction, 0, where=masks[0][y0:y1])
+
+        raw[y0 + 1:y1 + 1, d + 2] = (pixels[y0:y1, d] + prediction) & 0xFF
+
+    return padded[1:, 1:].astype(numpy.uint8).tobytes()
+
+def read_png(source: str):
+    """
+    Read a non interlaced 8 bits PNG file.
+    Return an array of RGBA pixels with shape (height, width, 4).
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to read PNG files')
+
+    file = open(source, 'rb')
+    blob = file.read()
+    file.close()
+
+    if blob[0:8] != PNG_SIGNATURE:
+        raise ValueError('Not a PNG file')
+
+    offset = 8
+    idat = bytearray()
+    palette = None
+    transparency = None
+
+    while offset < len(blob):
+        length = struct.unpack('>I', blob[offset:offset + 4])[0]
+        type = blob[offset + 4:offset + 8]
+        data = blob[offset + 8:offset + 8 + length]
+        offset += length + 12
+
+        if type == b'IHDR':
+            width, height, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', data)
+        elif type == b'PLTE':
+            palette = data
+        elif type == b'tRNS':
+            transparency = data
+        elif type == b'IDAT':
+            idat += data
+        elif type == b'IEND':
+            break
+
+    if depth != 8 or interlace != 0:
+        raise ValueError('Only non interlaced 8 bits PNG files are supported')
+
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color]
+    pixels = numpy.frombuffer(__unfilter(zlib.decompress(idat), width, height, channels), dtype=numpy.uint8).reshape(height, width, channels)
+
+    # Expand every color type to RGBA
+    rgba = numpy.full((height, width, 4), 255, dtype=numpy.uint8)
+
+    if color == 3:
+        lut = numpy.full((256, 4), 255, dtype=numpy.uint8)
+        lut[:len(palette) // 3, :3] = numpy.frombuffer(palette, dtype=numpy.uint8).reshape(-1, 3)
+
+        if transparency != None:
+            lut[:len(transparency), 3] = numpy.frombuffer(transparency, dtype=numpy.uint8)
+
+        rgba = lut[pixels[:, :, 0]]
+    elif color == 0 or color == 4:
+        rgba[:, :, :3] = pixels[:, :, 0:1]
+    else:
+        rgba[:, :, :3] = pixels[:, :, :3]
+
+    if color == 4 or color == 6:
+        rgba[:, :, 3] = pixels[:, :, -1]
+
+    return rgba
@@ -0,0 +1,143 @@
+import contextvars
+import math
+import time
+
+from contextlib import contextmanager
+from typing import Optional
+
+current_profile = contextvars.ContextVar('current_profile', default=None) # Profile of the file being processed
+
+PERCENTILES = (50, 90, 99) # Percentiles of the profile summaries
+
+class Profile():
+    """
+    Timings of the stages and counters of the processing of a single file.
+    While a profile is entered, the instrumented stages of the converter running in the same context add to it.
+    Nested stages are only counted in the innermost stage, so the stage times add up to the total time.
+    """
+    def __init__(self, path: Optional[str]=None, callback=None):
+        self.path = path
+        self.callback = callback # Function called with the kind ('stage' or 'counter'), the name and the value of every timed stage and counter
+        self.stages = {} # Seconds spent in every stage
+        self.counters = {}
+        self.seconds = 0.0
+        self.nested = [] # Seconds spent in the nested stages of every running stage
+        self.start = None
+        self.token = None
+
+    def __enter__(self):
+        self.token = current_profile.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.seconds += time.perf_counter() - self.start
+        current_profile.reset(self.token)
+
+    def add_stage(self, name: str, seconds: float):
+        """
+        Add the seconds spent in the stage with the specified name
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+        if self.callback != None:
+            self.callback('stage', name, seconds)
+
+    def add_counter(self, name: str, value: int):
+        """
+        Add the value to the counter with the specified name
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+        if self.callback != None:
+            self.callback('counter', name, value)
+
+    def to_dict(self):
+        """
+        Return a dictionary of the path, total seconds, stage seconds and counters, the time spent outside of every stage being the other stage
+        """
+        stages = dict(self.stages)
+        stages['other'] = max(0.0, self.seconds - sum(self.stages.values()))
+
+        return {'path': self.path, 'seconds': self.seconds, 'stages': stages, 'counters': dict(self.counters)}
+
+@contextmanager
+def stage(name: str):
+    """
+    Time the block as the stage with the specified name in the current profile, nothing is timed without a current profile
+    """
+    profile = current_profile.get()
+
+    if profile == None:
+        yield
+        return
+
+    profile.nested.append(0.0)
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        nested = profile.nested.pop()
+
+        if len(profile.nested) > 0:
+            profile.nested[-1] += seconds
+
+        profile.add_stage(name, seconds - nested)
+
+def count(name: str, value=1):
+    """
+    Add the value to the counter with the specified name in the current profile
+    """
+    profile = current_profile.get()
+
+    if profile != None:
+        profile.add_counter(name, value)
+
+def is_profiling():
+    """
+    Return whether a profile is entered in the current context
+    """
+    return current_profile.get() != None
+
+def __get_percentiles(values: list):
+    """
+    Return a dictionary of the total, mean, percentiles and maximum of the values
+    """
+    values = sorted(values)
+    result = {'total': sum(values), 'mean': sum(values) / len(values)}
+
+    for percentile in PERCENTILES:
+        # Nearest rank percentile
+        result['p' + str(percentile)] = values[max(0, math.ceil(percentile * len(values) / 100) - 1)]
+
+    result['max'] = values[-1]
+    return result
+
+def summarize(profiles: list, batch: Optional[dict]=None):
+    """
+    Return a dictionary summarizing the dictionaries of the file profiles, with the percentiles of the seconds per file and of every stage among the files running it, and the totals of the counters.
+    The stages and counters of the batch profile, such as the folder walk, are added as they are.
+    """
+    summary = {'files': len(profiles)}
+
+    if len(profiles) > 0:
+        summary['seconds'] = __get_percentiles([profile['seconds'] for profile in profiles])
+
+    stages = {}
+    counters = {}
+
+    for profile in profiles:
+        for name, seconds in profile['stages'].items():
+            stages.setdefault(name, []).append(seconds)
+        for name, value in profile['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+
+    summary['stages'] = {name: __get_percentiles(values) for name, values in stages.items()}
+    summary['counters'] = counters
+
+    if batch != None:
+        summary['batch'] = {'seconds': batch['seconds'], 'stages': batch['stages'], 'counters': batch['counters']}
+
+    return summary
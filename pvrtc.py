@@ -0,0 +1,131 @@
+from textureformat import PVRFormat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Blend weights of the B color out of 8 for each modulation value, in standard and punch-through modes
+MODULATION_WEIGHTS = ((0, 3, 5, 8), (0, 4, 4, 8))
+
+def __get_twiddled_indices(blocks_x: int, blocks_y: int):
+    """
+    Return the indices of the blocks in Morton order with shape (blocks_y, blocks_x).
+    The bits of the block row and column are interleaved up to the smallest dimension, the row in the lowest bits, and the remaining bits of the largest dimension follow.
+    """
+    y = numpy.arange(blocks_y, dtype=numpy.uint32)[:, None]
+    x = numpy.arange(blocks_x, dtype=numpy.uint32)[None, :]
+    indices = numpy.zeros((blocks_y, blocks_x), dtype=numpy.uint32)
+    bit = 0
+
+    while (1 << bit) < min(blocks_x, blocks_y):
+        indices |= ((y >> bit) & 1) << (2 * bit)
+        indices |= ((x >> bit) & 1) << (2 * bit + 1)
+        bit += 1
+
+    return indices | (((x if blocks_x > blocks_y else y) >> bit) << (2 * bit))
+
+def __expand(values, bits: int):
+    """
+    Expand an array of channel values of 3 to 5 bits to 5 bits by replicating their highest bits
+    """
+    return (values << (5 - bits)) | (values >> (2 * bits - 5))
+
+def __get_color(half, blue_shift: int):
+    """
+    Return an array of 5 bits RGB and 4 bits alpha channels from an array of color half words, RGB555 when their top bit is set and ARGB3444 otherwise.
+    The blue channel starts at the blue shift bit, the A colors having a blue bit less than the B colors.
+    """
+    opaque = (half & 0x8000) != 0
+
+    r = numpy.where(opaque, (half >> 10) & 0x1F, __expand((half >> 8) & 0xF, 4))
+    g = numpy.where(opaque, (half >> 5) & 0x1F, __expand((half >> 4) & 0xF, 4))
+    b = numpy.where(opaque, __expand((half >> blue_shift) & (0x1F >> blue_shift), 5 - blue_shift), __expand((half >> blue_shift) & (0xF >> blue_shift), 4 - blue_shift))
+
+    # Alpha of 3 bits with a zero bit at the right
+    a = numpy.where(opaque, 0xF, ((half >> 12) & 0x7) << 1)
+
+    return numpy.stack([r, g, b, a], axis=-1).astype(numpy.int32)
+
+def __upscale(colors, width: int, height: int):
+    """
+    Bilinearly upscale an image of colors, one for each 4x4 block, to the image of the blocks pixels.
+    Each color is at the center of its block, and the image wraps around at its edges.
+    Return the colors multiplied by 16.
+    """
+    blocks_y, blocks_x = colors.shape[0:2]
+    x = numpy.arange(width) - 2
+    y = numpy.arange(height) - 2
+    x0 = (x // 4) % blocks_x
+    y0 = (y // 4) % blocks_y
+    x1 = (x0 + 1) % blocks_x
+    y1 = (y0 + 1) % blocks_y
+    fx = (x % 4)[None, :, None]
+    fy = (y % 4)[:, None, None]
+
+    top = colors[y0[:, None], x0[None, :]] * (4 - fx) + colors[y0[:, None], x1[None, :]] * fx
+    bottom = colors[y1[:, None], x0[None, :]] * (4 - fx) + colors[y1[:, None], x1[None, :]] * fx
+
+    return top * (4 - fy) + bottom * fy
+
+def __to_8_bits(colors):
+    """
+    Convert an array of upscaled 5 bits RGB and 4 bits alpha channels multiplied by 16 to 8 bits channels
+    """
+    result = numpy.empty_like(colors)
+    result[..., 0:3] = (colors[..., 0:3] >> 1) + (colors[..., 0:3] >> 6)
+    result[..., 3] = colors[..., 3] + (colors[..., 3] >> 4)
+
+    return result
+
+def decode(blob: bytes, width: int, height: int):
+    """
+    Decode a single PVRTC1 4 bits per pixel texture level with the specified width and height, stored as 8x8 pixels at least.
+    Return an array of RGBA pixels with shape (height, width, 4).
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to decode PVRTC textures')
+
+    if len(blob) < PVRFormat.PVRTC1_4.get_size(width, height):
+        raise ValueError('Texture data is too small for its size and format')
+
+    blocks_x = max(8, width) // 4
+    blocks_y = max(8, height) // 4
+
+    # Blocks of a modulation word followed by a color word, in Morton order
+    words = numpy.frombuffer(blob, dtype='<u4', count=blocks_x * blocks_y * 2).reshape(-1, 2)
+    words = words[__get_twiddled_indices(blocks_x, blocks_y)]
+    modulation = words[..., 0]
+    colors = words[..., 1]
+
+    # Bilinearly upscaled A and B colors
+    a = __to_8_bits(__upscale(__get_color(colors & 0xFFFF, 1), blocks_x * 4, blocks_y * 4))
+    b = __to_8_bits(__upscale(__get_color(colors >> 16, 0), blocks_x * 4, blocks_y * 4))
+
+    # 2 bits modulation values of the 4x4 pixels of each block, from the lowest bits
+    values = (modulation[:, :, None] >> (2 * numpy.arange(16, dtype=numpy.uint32))) & 0x3
+    values = values.reshape(blocks_y, blocks_x, 4, 4).transpose(0, 2, 1, 3).reshape(blocks_y * 4, blocks_x * 4)
+    punch_through = numpy.repeat(numpy.repeat((colors & 1) == 1, 4, axis=0), 4, axis=1)
+
+    # Blend the A and B colors, the modulation value 2 of punch-through blocks being transparent
+    weights = numpy.where(punch_through, numpy.array(MODULATION_WEIGHTS[1])[values], numpy.array(MODULATION_WEIGHTS[0])[values])[:, :, None]
+    pixels = (a * (8 - weights) + b * weights) // 8
+    pixels[..., 3] = numpy.where(punch_through & (values == 2), 0, pixels[..., 3])
+
+    return pixels[:height, :width].astype(numpy.uint8)
+
+def decode_mipmap(blob: bytes, width: int, height: int, mipmap: int):
+    """
+    Decode every level of a PVRTC1 4 bits per pixel texture with the specified width, height and mipmap count.
+    Return a list of arrays of RGBA pixels, one for each mip level.
+    """
+    levels = []
+    offset = 0
+
+    for level in range(mipmap):
+        w = max(1, width >> level)
+        h = max(1, height >> level)
+        levels.append(decode(memoryview(blob)[offset:], w, h))
+        offset += PVRFormat.PVRTC1_4.get_size(w, h)
+
+    return levels
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+from profiler import count, is_profiling
+from typing import Optional
+
+RAM_FOLDERS = ('/dev/shm',) # RAM backed folders used by default when they exist
+
+def get_scratch_root(path: Optional[str]=None):
+    """
+    Return the folder of the scratch spaces.
+    The specified path is used when not empty, then a writable RAM backed folder, then the system temporary folder.
+    """
+    if path != None and path != '':
+        return path
+
+    for folder in RAM_FOLDERS:
+        if os.path.isdir(folder) and os.access(folder, os.W_OK):
+            return folder
+
+    return tempfile.gettempdir()
+
+class ScratchSpace():
+    """
+    Uniquely named folder holding the intermediate files of a single conversion.
+    The folder is removed with every file in it when the conversion ends, even on errors.
+    """
+    def __init__(self, root: Optional[str]=None):
+        self.path = tempfile.mkdtemp(prefix='ghlimg-', dir=get_scratch_root(root))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_path(self, name: str):
+        """
+        Return the path of the intermediate file with the specified name
+        """
+        return os.path.join(self.path, name)
+
+    def close(self):
+        """
+        Remove the folder and every intermediate file in it, counting their size as temporary bytes when profiling
+        """
+        if is_profiling():
+            with os.scandir(self.path) as entries:
+                count('temp_bytes', sum(entry.stat().st_size for entry in entries if entry.is_file()))
+
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,191 @@
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+SOCKET_NAME = 'ghl_img_converter.sock' # Name of the Unix socket of the conversion daemon by default
+
+# Requests and responses are JSON objects, one per line:
+# {"id": 1, "argv": ["convert", "a.png", "--platform", "pc"], "cwd": "/path/to/textures"}
+# {"id": 1, "status": 0, "output": "..."}
+
+def get_socket_folder(create=False):
+    """
+    Return the folder of the default Unix socket, only accessible by the current user: the user runtime folder, or a folder of the user in the temporary folder.
+    The folder of the temporary folder is created when create is true.
+    Raise a RuntimeError when the folder is owned by another user or accessible by other users, as anyone able to bind the socket would receive every command.
+    """
+    folder = os.environ.get('XDG_RUNTIME_DIR')
+
+    if folder == None or not os.path.isdir(folder):
+        folder = os.path.join(tempfile.gettempdir(), 'ghl_img_converter-' + str(os.getuid()))
+
+        if create:
+            try:
+                os.mkdir(folder, 0o700)
+            except FileExistsError:
+                pass
+
+    if os.path.isdir(folder):
+        # The folder is checked without following links, so that it cannot be replaced by a link to a folder of another user
+        info = os.lstat(folder)
+
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077 != 0:
+            raise RuntimeError('The socket folder ' + folder + ' must be a folder owned by the current user and only accessible by them')
+
+    return folder
+
+def get_default_socket(create=False):
+    """
+    Return the path of the Unix socket of the conversion daemon by default, in the socket folder of the current user
+    """
+    return os.path.join(get_socket_folder(create), SOCKET_NAME)
+
+def __serve_stream(executor, run, input, output):
+    """
+    Run every JSON line request of the input stream on the executor, writing the JSON line response of each request to the output stream as soon as it ends.
+    Return once every request of the input stream is answered.
+    """
+    # The callbacks of the futures run after their waiters are notified, so the pending responses are counted instead
+    condition = threading.Condition()
+    pending = [0]
+
+    def respond(response: dict):
+        with condition:
+            output.write(json.dumps(response) + '\n')
+            output.flush()
+
+    def done(id, future):
+        try:
+            status, text = future.result()
+        except Exception as error:
+            status, text = 1, 'Error : ' + (str(error) or type(error).__name__) + '\n'
+
+        respond({'id': id, 'status': status, 'output': text})
+
+        with condition:
+            pending[0] -= 1
+            condition.notify_all()
+
+    for line in input:
+        if line.strip() == '':
+            continue
+
+        try:
+            request = json.loads(line)
+            argv = [str(arg) for arg in request['argv']]
+            future = executor.submit(run, argv, request.get('cwd', os.getcwd()))
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            respond({'id': None, 'status': 2, 'output': 'Invalid request (' + str(error) + ')\n'})
+            continue
+
+        with condition:
+            pending[0] += 1
+
+        future.add_done_callback(lambda future, id=request.get('id'): done(id, future))
+
+    with condition:
+        condition.wait_for(lambda: pending[0] == 0)
+
+def __reset_terminate():
+    """
+    Restore the default action of SIGTERM in a worker process, which inherits the handler of the daemon when forked
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def serve(run, socket_path: Optional[str]=None, jobs: Optional[int]=None):
+    """
+    Run the conversion daemon until it is interrupted, or until the end of the standard input without a socket path.
+    The run function is called with the argument vector and the working directory of every request on a pool of jobs worker processes kept alive between requests, and returns the exit status and the printed output.
+    Requests are read as JSON lines from the clients of the Unix socket, or from the standard input with the responses written to the standard output.
+    The socket file is removed when the daemon is interrupted or terminated.
+    """
+    serve_stream = __serve_stream
+
+    if socket_path == None:
+        # Keep the standard output for the responses, the external tools printing to the standard error instead
+        output = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+        sys.stdout.flush()
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            serve_stream(executor, run, sys.stdin, output)
+
+        output.close()
+        return
+
+    if os.path.exists(socket_path):
+        # Replace the socket of a daemon which did not exit cleanly, but never a running daemon
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+        else:
+            raise RuntimeError('A conversion daemon is already listening on ' + socket_path)
+        finally:
+            probe.close()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            serve_stream(executor, run, io.TextIOWrapper(self.rfile, encoding='utf-8'), io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True))
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt()
+
+    # Stop on SIGTERM as on an interrupt, so that the socket file is removed, the worker processes being stopped by the daemon
+    previous = signal.signal(signal.SIGTERM, terminate)
+
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=__reset_terminate) as executor, socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+
+        signal.signal(signal.SIGTERM, previous)
+
+def request(argv: list, cwd: Optional[str]=None, socket_path: Optional[str]=None):
+    """
+    Send a command line to the conversion daemon listening on the Unix socket, and wait for its end.
+    Relative paths of the command line are resolved from the specified working directory, the current one by default.
+    Raise the OSError of the connection when no daemon is listening, the command was then not sent.
+    Raise a RuntimeError when the daemon does not answer with a complete response once the command was sent, the command may then have run.
+    Return the exit status and the printed output of the command.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        connection.connect(get_default_socket() if socket_path == None else socket_path)
+
+        try:
+            connection.sendall((json.dumps({'id': 0, 'argv': argv, 'cwd': os.getcwd() if cwd == None else cwd}) + '\n').encode('utf-8'))
+            connection.shutdown(socket.SHUT_WR)
+
+            file = connection.makefile('rb')
+            line = file.readline()
+            file.close()
+
+            if not line.endswith(b'\n'):
+                raise RuntimeError('The conversion daemon closed the connection before answering the command')
+
+            response = json.loads(line)
+            return response['status'], response['output']
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            raise RuntimeError('The conversion daemon did not answer the command (' + (str(error) or type(error).__name__) + ')')
+    finally:
+        connection.close()
@@ -0,0 +1,55 @@
+import array
+
+from typing import Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def __get_end(blob: bytearray, start: int, end: Optional[int], width: int):
+    """
+    Return the end offset of the swapped range, aligned down to a whole number of words of the specified width
+    """
+    if end == None:
+        end = len(blob)
+
+    return end - (end - start) % width
+
+def __swap(blob: bytearray, start: int, end: Optional[int], width: int, typecode: str):
+    """
+    Reverse the byte order of every word of the specified width in place over the whole range
+    """
+    end = __get_end(blob, start, end, width)
+
+    if end <= start:
+        return
+
+    if numpy != None:
+        # Swap the words directly in the blob buffer
+        numpy.frombuffer(blob, dtype='u' + str(width), count=(end - start) // width, offset=start).byteswap(inplace=True)
+    else:
+        words = array.array(typecode)
+        words.frombytes(memoryview(blob)[start:end])
+        words.byteswap()
+        blob[start:end] = words.tobytes()
+
+def swap16(blob: bytearray, start=0, end: Optional[int]=None):
+    """
+    Swap the bytes of every 16 bits word of the blob in place, from the start offset to the end offset.
+    Used for the Xbox 360 byte order.
+    """
+    __swap(blob, start, end, 2, 'H')
+
+def swap32(blob: bytearray, start=0, end: Optional[int]=None):
+    """
+    Reverse the bytes of every 32 bits word of the blob in place, from the start offset to the end offset.
+    Used to swap R8G8B8A8 pixels between RGBA and ABGR.
+    """
+    __swap(blob, start, end, 4, 'I' if array.array('I').itemsize == 4 else 'L')
+
+def get_backend():
+    """
+    Return the name of the implementation used to swap bytes
+    """
+    return 'numpy' if numpy != None else 'array'
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import ghl_img_converter as converter
+
+from dxt import Quality
+from imgformat import Game, Platform
+from pngfile import write_png
+from textureformat import DDSFormat, TEX0Format
+
+@pytest.fixture
+def source(tmp_path):
+    """
+    Return the path of a random 64x64 PNG image
+    """
+    path = str(tmp_path / 'source.png')
+    write_png(path, numpy.random.default_rng(0).integers(0, 256, (64, 64, 4), dtype=numpy.uint8))
+
+    return path
+
+def read(path: str):
+    """
+    Return the bytes of the file
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+@pytest.mark.parametrize('platform', [Platform.PC, Platform.X360])
+@pytest.mark.parametrize('dds', [DDSFormat.BC1, DDSFormat.BC3, DDSFormat.R8G8B8A8])
+def test_append_matches_conversion(tmp_path, source, platform, dds):
+    """
+    Appending mip levels gives the IMG file of a full conversion with every mip level
+    """
+    appended = str(tmp_path / 'appended.img')
+    expected = str(tmp_path / 'expected.img')
+    converter.create_imgs(source, {platform: appended}, dds=dds, mipmap=1, quality=Quality.FAST)
+    converter.create_imgs(source, {platform: expected}, dds=dds, mipmap=4, quality=Quality.FAST)
+
+    assert converter.append_mipmaps(source, appended, 4, quality=Quality.FAST) == 3
+    assert read(appended) == read(expected)
+    assert converter.append_mipmaps(source, appended, 4, quality=Quality.FAST) == 0
+
+@pytest.mark.parametrize('tex0', list(TEX0Format))
+def test_append_matches_wii_conversion(tmp_path, source, tex0):
+    """
+    Appending mip levels to a Wii IMG file gives the IMG file of a full conversion with every mip level.
+    DJ Hero IMG headers do not identify their platform, which is specified.
+    """
+    appended = str(tmp_path / 'appended.img')
+    expected = str(tmp_path / 'expected.img')
+    converter.create_wii_img(source, appended, tex0, Game.DJH2, 2, Quality.FAST)
+    converter.create_wii_img(source, expected, tex0, Game.DJH2, 4, Quality.FAST)
+
+    assert converter.append_mipmaps(source, appended, 4, Platform.WII, quality=Quality.FAST) == 2
+    assert read(appended) == read(expected)
+
+def test_append_unshares_hardlinks(tmp_path, source):
+    """
+    Appending mip levels to a hardlinked IMG file leaves the other link untouched
+    """
+    appended = str(tmp_path / 'appended.img')
+    linked = str(tmp_path / 'linked.img')
+    converter.create_imgs(source, {Platform.PC: appended}, mipmap=1, quality=Quality.FAST)
+    os.link(appended, linked)
+    original = read(linked)
+
+    converter.append_mipmaps(source, appended, 4, quality=Quality.FAST)
+
+    assert read(linked) == original
+    assert os.stat(linked).st_nlink == 1
+    assert read(appended) != original
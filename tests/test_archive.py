@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from archive import ArchiveReader, ArchiveWriter, get_archive_stem, get_member_path, is_archive
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ghl_img_converter.py')
+
+@pytest.mark.parametrize('name', ['../a.png', 'textures/../../a.png', '/etc/a.png', '..\\a.png', 'textures\\..\\..\\a.png'])
+def test_member_path_traversal_rejected(name):
+    """
+    Member names written outside of the output folder are rejected
+    """
+    with pytest.raises(ValueError):
+        get_member_path(name)
+
+@pytest.mark.parametrize('name, path', [('a.png', 'a.png'), ('textures/./a.png', os.path.join('textures', 'a.png')), ('textures/../a.png', 'a.png'), ('textures\\a.png', os.path.join('textures', 'a.png'))])
+def test_member_path(name, path):
+    """
+    Safe member names are normalized
+    """
+    assert get_member_path(name) == path
+
+def test_extensions():
+    """
+    Archives are identified by their extension, compressed tar archives included
+    """
+    assert is_archive('textures.ZIP')
+    assert is_archive('textures.tar.gz')
+    assert not is_archive('textures.png')
+    assert get_archive_stem('textures.tar.xz') == 'textures'
+
+@pytest.mark.parametrize('extension', ['.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz'])
+def test_round_trip(tmp_path, extension):
+    """
+    Files added to an archive are read back in order with their extension filter
+    """
+    path = str(tmp_path / ('textures' + extension))
+
+    for name in ('a.png', 'b.dds', 'c.png'):
+        with open(tmp_path / name, 'wb') as file:
+            file.write(name.encode())
+
+    with ArchiveWriter(path) as writer:
+        writer.add(str(tmp_path / 'a.png'), 'a.png')
+        writer.add(str(tmp_path / 'b.dds'), 'folder/b.dds')
+        writer.add(str(tmp_path / 'c.png'), 'folder/c.png')
+
+    with ArchiveReader(path) as reader:
+        members = [(name, size, file.read()) for name, size, file in reader.members(('.png',))]
+
+    assert members == [('a.png', 5, b'a.png'), (os.path.join('folder', 'c.png'), 5, b'c.png')]
+
+def test_zip_traversal_rejected(tmp_path):
+    """
+    Zip archives with a member outside of the output folder are rejected when read
+    """
+    path = str(tmp_path / 'textures.zip')
+
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('../a.png', b'a')
+
+    with ArchiveReader(path) as reader, pytest.raises(ValueError):
+        list(reader.members(('.png',)))
+
+def test_tar_traversal_rejected(tmp_path):
+    """
+    Tar archives with a member outside of the output folder are rejected when read
+    """
+    path = str(tmp_path / 'textures.tar')
+
+    with tarfile.open(path, 'w') as archive:
+        archive.addfile(tarfile.TarInfo('../a.png'))
+
+    with ArchiveReader(path) as reader, pytest.raises(ValueError):
+        list(reader.members(('.png',)))
+
+@pytest.mark.parametrize('options', [['--resume'], ['--journal', 'batch.journal'], ['--dedup-link']])
+@pytest.mark.parametrize('input, output', [('textures.zip', 'output'), ('textures', 'output.tar.gz')])
+def test_unsupported_batch_options(tmp_path, options, input, output):
+    """
+    Batch options without effect on archive batches are rejected before the batch starts
+    """
+    os.mkdir(tmp_path / 'textures')
+
+    with zipfile.ZipFile(tmp_path / 'textures.zip', 'w') as archive:
+        archive.writestr('a.png', b'a')
+
+    process = subprocess.run([sys.executable, CONVERTER, 'convert', input, '--platform', 'pc', '--output', output] + options, cwd=tmp_path, capture_output=True, text=True)
+
+    assert process.returncode == 2
+    assert 'not supported with archives' in process.stderr
+    assert not os.path.exists(tmp_path / output)
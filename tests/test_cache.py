@@ -0,0 +1,147 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cache import ConversionCache, break_link
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ghl_img_converter.py')
+
+def write(path: str, data: bytes):
+    """
+    Write the bytes to the file
+    """
+    with open(path, 'wb') as file:
+        file.write(data)
+
+def read(path: str):
+    """
+    Return the bytes of the file
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+def test_hit_and_miss(tmp_path):
+    """
+    A key is missed until its converted file is stored, then fetched
+    """
+    cache = ConversionCache(str(tmp_path / 'cache'), 1024 * 1024)
+    source = str(tmp_path / 'source.png')
+    dest = str(tmp_path / 'dest.img')
+    write(source, b'source')
+    key = cache.get_key(source, {'platform': 'pc'})
+
+    assert not cache.fetch(key, dest)
+    assert not os.path.exists(dest)
+
+    write(dest, b'converted')
+    cache.store(key, dest)
+    os.remove(dest)
+
+    assert cache.fetch(key, dest)
+    assert read(dest) == b'converted'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_miss_keeps_dest(tmp_path):
+    """
+    A cache miss leaves the existing destination file untouched
+    """
+    cache = ConversionCache(str(tmp_path / 'cache'), 1024 * 1024)
+    dest = str(tmp_path / 'dest.img')
+    write(dest, b'previous')
+
+    assert not cache.fetch('ab' * 32, dest)
+    assert not cache.fetch('ab' * 32, dest, link=True)
+    assert read(dest) == b'previous'
+    assert sorted(os.listdir(tmp_path)) == ['cache', 'dest.img']
+
+def test_keys(tmp_path):
+    """
+    Keys depend on the bytes of the source file and on the options only
+    """
+    cache = ConversionCache(str(tmp_path / 'cache'), 1024 * 1024)
+    write(str(tmp_path / 'a.png'), b'source')
+    write(str(tmp_path / 'b.png'), b'source')
+    write(str(tmp_path / 'c.png'), b'other')
+    key = cache.get_key(str(tmp_path / 'a.png'), {'platform': 'pc', 'mipmap': 1})
+
+    assert cache.get_key(str(tmp_path / 'b.png'), {'mipmap': 1, 'platform': 'pc'}) == key
+    assert cache.get_key(str(tmp_path / 'c.png'), {'platform': 'pc', 'mipmap': 1}) != key
+    assert cache.get_key(str(tmp_path / 'a.png'), {'platform': 'pc', 'mipmap': 2}) != key
+
+def test_linked_fetch_keeps_mtime(tmp_path):
+    """
+    Hardlinked fetches mark the entry as used without changing the modification time of the outputs sharing it
+    """
+    cache = ConversionCache(str(tmp_path / 'cache'), 1024 * 1024)
+    stored = str(tmp_path / 'stored.img')
+    dest = str(tmp_path / 'dest.img')
+    write(stored, b'converted')
+    cache.store('ab' * 32, stored)
+    os.utime(cache.get_entry('ab' * 32), (1000, 1000))
+
+    assert cache.fetch('ab' * 32, dest, link=True)
+    assert os.path.samefile(dest, cache.get_entry('ab' * 32))
+    assert os.stat(dest).st_mtime == 1000
+    assert os.path.isfile(cache.get_marker('ab' * 32))
+
+def test_evict_least_recently_used(tmp_path):
+    """
+    The least recently used entries are evicted first, a fetch counting as a use
+    """
+    cache = ConversionCache(str(tmp_path / 'cache'), 15)
+    stored = str(tmp_path / 'stored.img')
+    write(stored, b'0123456789')
+
+    for i, key in enumerate(['aa' * 32, 'bb' * 32]):
+        cache.store(key, stored)
+        os.utime(cache.get_entry(key), (1000 + i, 1000 + i))
+
+    cache.fetch('aa' * 32, str(tmp_path / 'dest.img'))
+    cache.evict()
+
+    assert os.path.isfile(cache.get_entry('aa' * 32))
+    assert not os.path.exists(cache.get_entry('bb' * 32))
+    assert cache.evictions == 1
+
+def test_break_link(tmp_path):
+    """
+    A hardlinked file is replaced by a copy with the same bytes and modification time
+    """
+    path = str(tmp_path / 'a.img')
+    linked = str(tmp_path / 'b.img')
+    write(path, b'converted')
+    os.utime(path, (1000, 1000))
+
+    assert not break_link(path)
+
+    os.link(path, linked)
+
+    assert break_link(path)
+    assert not os.path.samefile(path, linked)
+    assert read(path) == b'converted'
+    assert os.stat(path).st_mtime == 1000
+
+def test_miss_appends_mipmaps(tmp_path):
+    """
+    With the conversion cache and --append-mipmaps, a cache miss appends the missing mip levels to the existing IMG file instead of converting it again
+    """
+    numpy = pytest.importorskip('numpy')
+    from imgtexture import IMGTexture
+    from pngfile import write_png
+
+    command = [sys.executable, CONVERTER, 'convert', 'source.png', '--platform', 'pc', '--quality', 'fast', '--output', 'dest.img']
+    write_png(str(tmp_path / 'source.png'), numpy.zeros((16, 16, 4), dtype=numpy.uint8))
+    subprocess.run(command + ['--mipmap', '1'], cwd=tmp_path, check=True, capture_output=True)
+    level = read(str(tmp_path / 'dest.img'))[20:]
+
+    # A new first mip level would be converted from the new source
+    write_png(str(tmp_path / 'source.png'), numpy.full((16, 16, 4), 255, dtype=numpy.uint8))
+    output = subprocess.run(command + ['--mipmap', '3', '--append-mipmaps', '--cache', 'cache'], cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+
+    assert '1 misses' in output
+
+    with IMGTexture(str(tmp_path / 'dest.img')) as texture:
+        assert texture.mipmap == 3
+        assert bytes(texture.get_level(0)) == level
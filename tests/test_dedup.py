@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from pngfile import write_png
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ghl_img_converter.py')
+
+def convert(folder, *options):
+    """
+    Convert the images folder of the folder to its output folder with the native backend.
+    Return the completed process.
+    """
+    return subprocess.run([sys.executable, CONVERTER, 'convert', 'images', '--platform', 'pc', '--quality', 'fast', '--output', 'output'] + list(options), cwd=folder, capture_output=True, text=True)
+
+def read(path):
+    """
+    Return the bytes of the file
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+def test_duplicates(tmp_path):
+    """
+    Byte-identical images are converted once, their duplicates getting the same IMG files
+    """
+    os.mkdir(tmp_path / 'images')
+
+    for name in ('a', 'b', 'c'):
+        write_png(str(tmp_path / 'images' / (name + '.png')), numpy.zeros((16, 16, 4), dtype=numpy.uint8))
+
+    write_png(str(tmp_path / 'images' / 'd.png'), numpy.full((16, 16, 4), 255, dtype=numpy.uint8))
+    output = convert(tmp_path, '--cache', 'cache').stdout
+
+    assert '2 runs saved by deduplication, 2 of 4 files run' in output
+    assert 'Cache : 0 hits, 2 misses, 0 evicted, 2 deduplicated files not looked up' in output
+    assert read(tmp_path / 'output' / 'a.img') == read(tmp_path / 'output' / 'b.img') == read(tmp_path / 'output' / 'c.img')
+    assert read(tmp_path / 'output' / 'a.img') != read(tmp_path / 'output' / 'd.img')
+
+def test_failed_duplicates(tmp_path):
+    """
+    Duplicates of a failed image fail with it, and are not counted as saved runs
+    """
+    os.mkdir(tmp_path / 'images')
+
+    for name in ('a', 'b'):
+        with open(tmp_path / 'images' / (name + '.png'), 'wb') as file:
+            file.write(b'Not a PNG file')
+
+    process = convert(tmp_path)
+
+    assert process.returncode == 1
+    assert '0 of 2 files processed, 2 failed' in process.stdout
+    assert 'runs saved' not in process.stdout
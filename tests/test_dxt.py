@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+import dxt
+
+from textureformat import DDSFormat
+
+@pytest.mark.parametrize('dds', list(DDSFormat))
+@pytest.mark.parametrize('width, height', [(16, 8), (4, 4), (8, 20)])
+def test_decode_matches_pillow(dds, width, height):
+    """
+    Random blocks decode to the pixels of Pillow's DDS decoder
+    """
+    blob = numpy.random.default_rng(width * height).integers(0, 256, dds.get_size(width, height), dtype=numpy.uint8).tobytes()
+
+    image = Image.open(io.BytesIO(bytes(dds.get_header(width, height, 1)) + blob))
+    expected = numpy.asarray(image.convert('RGBA'))
+
+    assert numpy.array_equal(dxt.decode(blob, width, height, dds), expected)
+
+def test_decode_too_small():
+    """
+    Truncated texture data is rejected
+    """
+    with pytest.raises(ValueError):
+        dxt.decode(bytes(8), 8, 8, DDSFormat.BC1)
+
+@pytest.mark.parametrize('dds', [DDSFormat.BC1, DDSFormat.BC2, DDSFormat.BC3])
+def test_encode_solid_colors(dds):
+    """
+    Blocks of a single 565 color decode to that color
+    """
+    pixels = numpy.zeros((8, 8, 4), dtype=numpy.uint8)
+    pixels[:4] = (255, 0, 0, 255)
+    pixels[4:] = (0, 0, 255, 255)
+
+    assert numpy.array_equal(dxt.decode(dxt.encode(pixels, dds, jobs=1), 8, 8, dds), pixels)
+
+def test_encode_uncompressed():
+    """
+    R8G8B8A8 levels are stored as is
+    """
+    pixels = numpy.random.default_rng(0).integers(0, 256, (4, 8, 4), dtype=numpy.uint8)
+
+    assert dxt.encode(pixels, DDSFormat.R8G8B8A8) == pixels.tobytes()
+
+def test_encode_mipmap_bands():
+    """
+    Levels encoded in bands on a pool of worker processes are the levels encoded at once
+    """
+    pixels = numpy.random.default_rng(0).integers(0, 256, (128, 64, 4), dtype=numpy.uint8)
+    levels = [pixels, pixels[::2, ::2], pixels[::4, ::4]]
+
+    assert dxt.encode_mipmap(levels, DDSFormat.BC3, dxt.Quality.FAST, jobs=2) == dxt.encode_mipmap(levels, DDSFormat.BC3, dxt.Quality.FAST, jobs=1)
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import ghl_img_converter as converter
+
+from dxt import Quality
+from imagefile import downsample
+from imgformat import Game, Platform
+from pngfile import write_png
+from textureformat import DDSFormat
+
+@pytest.fixture
+def pixels():
+    """
+    Return random 64x64 RGBA pixels
+    """
+    return numpy.random.default_rng(0).integers(0, 256, (64, 64, 4), dtype=numpy.uint8)
+
+def convert(folder, name: str, pixels, platform=Platform.X360, dds=DDSFormat.BC1, game=Game.GHL, mipmap=4):
+    """
+    Write the pixels to a PNG image and convert it with the built-in encoder.
+    Return the path of the IMG file.
+    """
+    source = str(folder / (name + '.png'))
+    dest = str(folder / (name + '.img'))
+    write_png(source, pixels)
+    converter.create_imgs(source, {platform: dest}, dds=dds, game=game, mipmap=mipmap, quality=Quality.FAST)
+
+    return dest
+
+def read(path: str):
+    """
+    Return the bytes of the file
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+@pytest.mark.parametrize('dds', [DDSFormat.BC1, DDSFormat.R8G8B8A8])
+def test_mipmap_matches_conversion(tmp_path, pixels, dds):
+    """
+    Keeping the first mip levels gives the IMG file of a conversion with fewer mip levels
+    """
+    edited = convert(tmp_path, 'edited', pixels, dds=dds)
+
+    assert converter.edit_img(edited, mipmap=2)
+    assert read(edited) == read(convert(tmp_path, 'expected', pixels, dds=dds, mipmap=2))
+
+@pytest.mark.parametrize('dds', [DDSFormat.BC3, DDSFormat.R8G8B8A8])
+def test_max_size_matches_conversion(tmp_path, pixels, dds):
+    """
+    Dropping the leading mip levels gives the IMG file of a conversion of the first kept mip level, box filtered mip levels being filtered from the previous one
+    """
+    edited = convert(tmp_path, 'edited', pixels, dds=dds)
+
+    assert converter.edit_img(edited, max_size=16)
+    assert read(edited) == read(convert(tmp_path, 'expected', downsample(downsample(pixels)), dds=dds, mipmap=2))
+
+def test_retag_matches_conversion(tmp_path, pixels):
+    """
+    Retagging a PC texture to Xbox One gives the IMG file of an Xbox One conversion
+    """
+    edited = convert(tmp_path, 'edited', pixels, Platform.PC)
+
+    assert converter.edit_img(edited, Platform.X1)
+    assert read(edited) == read(convert(tmp_path, 'expected', pixels, Platform.X1))
+
+def test_unchanged(tmp_path, pixels):
+    """
+    An edit keeping the IMG file as is does not write it
+    """
+    edited = convert(tmp_path, 'edited', pixels)
+
+    assert not converter.edit_img(edited, mipmap=8)
+
+@pytest.mark.parametrize('game', [Game.DJH, Game.DJH2])
+def test_dj_hero_retag_twice(tmp_path, pixels, game):
+    """
+    DJ Hero and DJ Hero 2 IMG headers being identical, editing a DJ Hero texture again with the same options leaves it unchanged
+    """
+    edited = convert(tmp_path, 'edited', pixels, game=Game.DJH)
+
+    assert converter.edit_img(edited, game=game, mipmap=1)
+    assert not converter.edit_img(edited, game=game, mipmap=1)
+    assert not converter.edit_img(edited, game=game)
+    assert read(edited) == read(convert(tmp_path, 'expected', pixels, game=Game.DJH, mipmap=1))
+
+def test_edit_unshares_hardlinks(tmp_path, pixels):
+    """
+    Editing a hardlinked IMG file leaves the other link untouched
+    """
+    edited = convert(tmp_path, 'edited', pixels)
+    linked = str(tmp_path / 'linked.img')
+    os.link(edited, linked)
+    original = read(linked)
+
+    assert converter.edit_img(edited, mipmap=1)
+    assert read(linked) == original
+    assert os.stat(linked).st_nlink == 1
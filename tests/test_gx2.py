@@ -0,0 +1,41 @@
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from gx2 import GX2Surface, TILE_MODE_1D_TILED_THIN1, TILE_MODE_2D_TILED_THIN1
+from textureformat import DDSFormat
+
+SIZES = [(4, 4), (64, 32), (128, 64), (256, 256), (512, 128), (1024, 1024), (96, 200)]
+
+@pytest.mark.parametrize('dds', list(DDSFormat))
+@pytest.mark.parametrize('width, height', SIZES)
+def test_addresses_bijective(dds, width, height):
+    """
+    Every element has its own address inside the tiled image data
+    """
+    surface = GX2Surface.from_dds(width, height, dds)
+    addresses = surface.get_addresses().ravel()
+    elements = surface.get_bpp() // 8
+
+    assert addresses.min() >= 0
+    assert addresses.max() + elements <= surface.image_size
+    assert numpy.all(addresses % elements == 0)
+    assert len(numpy.unique(addresses)) == addresses.size
+
+@pytest.mark.parametrize('dds', list(DDSFormat))
+@pytest.mark.parametrize('width, height', SIZES)
+def test_tile_round_trip(dds, width, height):
+    """
+    Untiling tiled image data gives back the linear image data
+    """
+    surface = GX2Surface.from_dds(width, height, dds)
+    blob = numpy.random.default_rng(width + height).integers(0, 256, dds.get_size(width, height), dtype=numpy.uint8).tobytes()
+
+    assert surface.untile(surface.tile(blob)) == blob
+
+def test_small_surfaces_use_1d_tiling():
+    """
+    Surfaces smaller than a macro tile fall back to 1D tiling
+    """
+    assert GX2Surface.from_dds(64, 32, DDSFormat.BC1).get_tile_mode() == TILE_MODE_1D_TILED_THIN1
+    assert GX2Surface.from_dds(128, 64, DDSFormat.BC1).get_tile_mode() == TILE_MODE_2D_TILED_THIN1
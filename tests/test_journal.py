@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from journal import Journal
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ghl_img_converter.py')
+
+OPTIONS = {'platform': 'pc', 'mipmap': 1}
+
+def test_resume(tmp_path):
+    """
+    A recorded file is completed when resuming while its source, options and outputs are unchanged
+    """
+    path = str(tmp_path / 'batch.journal')
+    output = str(tmp_path / 'a.img')
+    open(output, 'w').close()
+
+    with Journal(path) as journal:
+        journal.record('a.png', 10, 1000, OPTIONS, [output])
+
+    with Journal(path, resume=True) as journal:
+        assert journal.is_completed('a.png', 10, 1000, {'mipmap': 1, 'platform': 'pc'}, [output])
+        assert not journal.is_completed('a.png', 11, 1000, OPTIONS, [output])
+        assert not journal.is_completed('a.png', 10, 1001, OPTIONS, [output])
+        assert not journal.is_completed('a.png', 10, 1000, {'platform': 'x360', 'mipmap': 1}, [output])
+        assert not journal.is_completed('b.png', 10, 1000, OPTIONS, [output])
+        assert journal.skipped == 1
+
+    os.remove(output)
+
+    with Journal(path, resume=True) as journal:
+        assert not journal.is_completed('a.png', 10, 1000, OPTIONS, [output])
+
+def test_new_batch_starts_empty(tmp_path):
+    """
+    A batch which is not resumed starts a new journal
+    """
+    path = str(tmp_path / 'batch.journal')
+
+    with Journal(path) as journal:
+        journal.record('a.png', 10, 1000, OPTIONS, [])
+
+    Journal(path).close()
+
+    with Journal(path, resume=True) as journal:
+        assert not journal.is_completed('a.png', 10, 1000, OPTIONS, [])
+
+def test_cut_line(tmp_path):
+    """
+    The entry cut by a crash is ignored and the following entries are appended on their own line
+    """
+    path = str(tmp_path / 'batch.journal')
+
+    with Journal(path) as journal:
+        journal.record('a.png', 10, 1000, OPTIONS, [])
+
+    with open(path, 'a') as file:
+        file.write('{"source": "b.png", "si')
+
+    with Journal(path, resume=True) as journal:
+        assert journal.cut
+        assert journal.is_completed('a.png', 10, 1000, OPTIONS, [])
+        journal.record('c.png', 10, 1000, OPTIONS, [])
+
+    with Journal(path, resume=True) as journal:
+        assert not journal.cut
+        assert journal.is_completed('c.png', 10, 1000, OPTIONS, [])
+        assert not journal.is_completed('b.png', 10, 1000, OPTIONS, [])
+
+def test_resume_batch(tmp_path):
+    """
+    A resumed batch skips the files converted by the previous batch, and converts again the sources modified since
+    """
+    numpy = pytest.importorskip('numpy')
+    from pngfile import write_png
+
+    os.mkdir(tmp_path / 'images')
+
+    for name in ('a', 'b'):
+        write_png(str(tmp_path / 'images' / (name + '.png')), numpy.full((16, 16, 4), ord(name), dtype=numpy.uint8))
+
+    command = [sys.executable, CONVERTER, 'convert', 'images', '--platform', 'pc', '--quality', 'fast', '--output', 'output', '--resume']
+
+    assert '2 files processed' in subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, check=True).stdout
+
+    os.utime(tmp_path / 'images' / 'b.png', ns=(0, 0))
+    output = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, check=True).stdout
+
+    assert '1 files skipped' in output
+    assert '1 files processed' in output
@@ -0,0 +1,112 @@
+import struct
+import zlib
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from pngfile import PNG_SIGNATURE, encode_png, read_png
+
+def paeth(a: int, b: int, c: int):
+    """
+    Return the Paeth predictor of the left, above and upper left bytes
+    """
+    p = a + b - c
+
+    if abs(p - a) <= abs(p - b) and abs(p - a) <= abs(p - c):
+        return a
+    elif abs(p - b) <= abs(p - c):
+        return b
+    return c
+
+def filter_rows(pixels, filters: list):
+    """
+    Return the image data of the pixels with the filter type of every row, filtered byte by byte
+    """
+    height, width, bpp = pixels.shape
+    raw = pixels.reshape(height, width * bpp).astype(int)
+    data = bytearray()
+
+    for y, filter in enumerate(filters):
+        data.append(filter)
+
+        for i in range(width * bpp):
+            a = raw[y, i - bpp] if i >= bpp else 0
+            b = raw[y - 1, i] if y > 0 else 0
+            c = raw[y - 1, i - bpp] if y > 0 and i >= bpp else 0
+            data.append((raw[y, i] - [0, a, b, (a + b) // 2, paeth(a, b, c)][filter]) & 0xFF)
+
+    return data
+
+def write_filtered_png(path: str, pixels, filters: list, color: int):
+    """
+    Write the pixels to a PNG file of the color type with the filter type of every row
+    """
+    height, width = pixels.shape[0:2]
+
+    with open(path, 'wb') as file:
+        for type, data in ((b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color, 0, 0, 0)), (b'IDAT', zlib.compress(filter_rows(pixels, filters))), (b'IEND', b'')):
+            file.write((PNG_SIGNATURE if type == b'IHDR' else b'') + struct.pack('>I', len(data)) + type + data + struct.pack('>I', zlib.crc32(type + data)))
+
+@pytest.mark.parametrize('color, channels', [(0, 1), (2, 3), (4, 2), (6, 4)])
+@pytest.mark.parametrize('width, height', [(1, 1), (1, 9), (9, 1), (13, 7), (7, 13)])
+@pytest.mark.parametrize('filters', ['random', 'average', 'paeth', 'previous'])
+def test_unfilter(tmp_path, color, channels, width, height, filters):
+    """
+    Every filter type is reversed, alone or mixed with the others
+    """
+    rng = numpy.random.default_rng(width * height + channels)
+    pixels = rng.integers(0, 256, (height, width, channels), dtype=numpy.uint8)
+    types = {'random': rng.integers(0, 5, height).tolist(), 'average': [3] * height, 'paeth': [4] * height, 'previous': rng.integers(0, 3, height).tolist()}[filters]
+    path = str(tmp_path / 'image.png')
+    write_filtered_png(path, pixels, types, color)
+
+    rgba = read_png(path)
+
+    assert numpy.array_equal(rgba[..., 0:3], pixels[..., 0:1].repeat(3, axis=2) if channels <= 2 else pixels[..., 0:3])
+    assert numpy.array_equal(rgba[..., 3], pixels[..., -1] if channels in (2, 4) else numpy.full((height, width), 255))
+
+def test_unknown_filter(tmp_path):
+    """
+    Unknown filter types are rejected
+    """
+    path = str(tmp_path / 'image.png')
+    write_filtered_png(path, numpy.zeros((2, 2, 4), dtype=numpy.uint8), [0, 0], 6)
+
+    with open(path, 'rb') as file:
+        blob = bytearray(file.read())
+
+    # Replace the image data with a row of filter type 5
+    data = zlib.compress(bytes([5]) + bytes(8) + bytes([0]) + bytes(8))
+    start = blob.index(b'IDAT') - 4
+    blob[start:blob.index(b'IEND') - 4] = struct.pack('>I', len(data)) + b'IDAT' + data + struct.pack('>I', zlib.crc32(b'IDAT' + data))
+
+    with open(path, 'wb') as file:
+        file.write(blob)
+
+    with pytest.raises(ValueError):
+        read_png(path)
+
+def test_pillow_png(tmp_path):
+    """
+    PNG files saved by Pillow with adaptive filtering read as the saved pixels
+    """
+    Image = pytest.importorskip('PIL.Image')
+    y, x = numpy.mgrid[0:96, 0:128]
+    pixels = numpy.stack([(x + y) % 256, (x * y) % 256, x * 2, 255 - y], axis=-1).astype(numpy.uint8)
+    path = str(tmp_path / 'image.png')
+    Image.fromarray(pixels, 'RGBA').save(path)
+
+    assert numpy.array_equal(read_png(path), pixels)
+
+def test_round_trip(tmp_path):
+    """
+    Encoded PNG images read as their pixels
+    """
+    pixels = numpy.random.default_rng(0).integers(0, 256, (5, 11, 4), dtype=numpy.uint8)
+    path = str(tmp_path / 'image.png')
+
+    with open(path, 'wb') as file:
+        file.write(encode_png(pixels))
+
+    assert numpy.array_equal(read_png(path), pixels)
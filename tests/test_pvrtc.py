@@ -0,0 +1,53 @@
+import struct
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import pvrtc
+
+WHITE = 0xFFFE # Opaque RGB555 A color, its lowest bit being the punch-through flag
+BLACK = 0x8000 # Opaque RGB555 B color
+
+def get_blob(modulation: int, color: int, blocks: int):
+    """
+    Return PVRTC1 texture data with the same modulation and color words in every block
+    """
+    return struct.pack('<2I', modulation, color) * blocks
+
+@pytest.mark.parametrize('modulation, value', [(0x00000000, 255), (0x55555555, 159), (0xAAAAAAAA, 95), (0xFFFFFFFF, 0)])
+def test_uniform_blocks(modulation, value):
+    """
+    Uniform blocks blend their A and B colors with the standard modulation weights
+    """
+    pixels = pvrtc.decode(get_blob(modulation, WHITE | BLACK << 16, 4), 8, 8)
+
+    assert pixels.shape == (8, 8, 4)
+    assert numpy.all(pixels[..., 0:3] == value)
+    assert numpy.all(pixels[..., 3] == 255)
+
+def test_punch_through():
+    """
+    The modulation value 2 of punch-through blocks is transparent
+    """
+    pixels = pvrtc.decode(get_blob(0xAAAAAAAA, WHITE | 1 | BLACK << 16, 4), 8, 8)
+
+    assert numpy.all(pixels[..., 0:3] == 127)
+    assert numpy.all(pixels[..., 3] == 0)
+
+def test_small_levels():
+    """
+    Levels smaller than 8x8 pixels are stored as 8x8 pixels and cropped
+    """
+    blob = get_blob(0, WHITE | BLACK << 16, 4)
+    levels = pvrtc.decode_mipmap(blob * 4, 8, 8, 4)
+
+    assert [level.shape for level in levels] == [(8, 8, 4), (4, 4, 4), (2, 2, 4), (1, 1, 4)]
+    assert all(numpy.all(level == 255) for level in levels)
+
+def test_decode_too_small():
+    """
+    Truncated texture data is rejected
+    """
+    with pytest.raises(ValueError):
+        pvrtc.decode(bytes(16), 8, 8)
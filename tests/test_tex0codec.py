@@ -0,0 +1,68 @@
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import tex0codec
+
+from dxt import Quality
+from textureformat import TEX0Format
+
+def get_pixels(width: int, height: int, seed=0):
+    """
+    Return random RGBA pixels with shape (height, width, 4)
+    """
+    return numpy.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=numpy.uint8)
+
+def test_rgb5a3_round_trip():
+    """
+    RGB5A3 pixels decode and encode back to the same bytes
+    """
+    blob = tex0codec.encode(get_pixels(16, 8), TEX0Format.RGB5A3)
+
+    assert tex0codec.encode(tex0codec.decode(blob, 16, 8, TEX0Format.RGB5A3), TEX0Format.RGB5A3) == blob
+
+def test_ia4_round_trip():
+    """
+    IA4 pixels decode and encode back to the same bytes
+    """
+    pixels = get_pixels(16, 8)
+    pixels[..., 1] = pixels[..., 0]
+    pixels[..., 2] = pixels[..., 0]
+    blob = tex0codec.encode(pixels, TEX0Format.IA4)
+
+    assert tex0codec.encode(tex0codec.decode(blob, 16, 8, TEX0Format.IA4), TEX0Format.IA4) == blob
+
+def test_rgb5a3_known_vectors():
+    """
+    Opaque pixels are stored as RGB555 with the top bit set, translucent ones as A3RGB444, big endian
+    """
+    pixels = numpy.zeros((4, 4, 4), dtype=numpy.uint8)
+    pixels[:] = (255, 0, 0, 255)
+    pixels[0, 1] = (0, 255, 0, 0)
+    blob = tex0codec.encode(pixels, TEX0Format.RGB5A3)
+
+    assert blob[0:2] == bytes([0xFC, 0x00])
+    assert blob[2:4] == bytes([0x00, 0xF0])
+    assert numpy.array_equal(tex0codec.decode(blob, 4, 4, TEX0Format.RGB5A3)[0, 0], (255, 0, 0, 255))
+
+@pytest.mark.parametrize('width, height', [(8, 8), (32, 16)])
+def test_cmpr_solid_colors(width, height):
+    """
+    CMPR tiles of a single 565 color decode to that color
+    """
+    pixels = numpy.zeros((height, width, 4), dtype=numpy.uint8)
+    pixels[:] = (0, 0, 255, 255)
+    pixels[:, width // 2:] = (255, 255, 0, 255)
+
+    assert numpy.array_equal(tex0codec.decode(tex0codec.encode(pixels, TEX0Format.CMPR, Quality.FAST), width, height, TEX0Format.CMPR), pixels)
+
+@pytest.mark.parametrize('tex0', list(TEX0Format))
+def test_mipmap_sizes(tex0):
+    """
+    Encoded mip levels have the sizes of the TEX0 format and decode to one array per level
+    """
+    levels = [get_pixels(32 >> level, 32 >> level, level) for level in range(3)]
+    blob = tex0codec.encode_mipmap(levels, tex0, Quality.FAST)
+
+    assert len(blob) == tex0.get_size_mipmap(32, 32, 3)
+    assert [level.shape for level in tex0codec.decode_mipmap(blob, 32, 32, tex0, 3)] == [level.shape for level in levels]
@@ -0,0 +1,169 @@
+import dxt
+
+from dxt import Quality
+from textureformat import DDSFormat, TEX0Format
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def __reverse_indices():
+    """
+    Return the lookup table reversing the order of the 4 indices of 2 bits of a byte
+    """
+    table = numpy.arange(256, dtype=numpy.uint8)
+    return ((table & 0x03) << 6) | ((table & 0x0C) << 2) | ((table & 0x30) >> 2) | ((table & 0xC0) >> 6)
+
+def __cmpr_to_bc1(blocks):
+    """
+    Convert an array of 8 bytes CMPR sub-blocks to BC1 blocks, or back as the conversion is its own inverse.
+    Colors are big endian and the first pixel of each row is in the highest bits in CMPR.
+    """
+    converted = numpy.empty_like(blocks)
+    converted[:, [0, 1, 2, 3]] = blocks[:, [1, 0, 3, 2]]
+    converted[:, 4:8] = __reverse_indices()[blocks[:, 4:8]]
+
+    return converted
+
+def __untile(tiles, width: int, height: int, tex0: TEX0Format):
+    """
+    Rearrange an array of pixels grouped by tiles in rows of tiles to an array of pixels with shape (height, width, channels)
+    """
+    return dxt.unblock(tiles, width, height, tex0.width, tex0.height)
+
+def __decode_cmpr(blob: bytes, width: int, height: int):
+    """
+    Decode a CMPR texture level whose 8x8 tiles hold 2x2 sub-blocks of BC1
+    """
+    tiles_x = max(1, (width + 7) // 8)
+    tiles_y = max(1, (height + 7) // 8)
+    blocks = numpy.frombuffer(blob, dtype=numpy.uint8, count=TEX0Format.CMPR.get_size(width, height)).reshape(-1, 8)
+    pixels = dxt.decode_blocks(__cmpr_to_bc1(blocks), DDSFormat.BC1)
+
+    # Sub-blocks are stored from left to right, then top to bottom within each tile
+    pixels = pixels.reshape(tiles_y, tiles_x, 2, 2, 4, 4, 4).transpose(0, 2, 4, 1, 3, 5, 6)
+
+    return pixels.reshape(tiles_y * 8, tiles_x * 8, 4)[:height, :width]
+
+def __decode_rgb5a3(blob: bytes, width: int, height: int):
+    """
+    Decode a RGB5A3 texture level whose 4x4 tiles hold big endian 16 bits pixels
+    """
+    values = numpy.frombuffer(blob, dtype='>u2', count=TEX0Format.RGB5A3.get_size(width, height) // 2).astype(numpy.uint32)
+    opaque = (values & 0x8000) != 0
+
+    # RGB555 pixels when the top bit is set, A3RGB444 pixels otherwise
+    r5 = (values >> 10) & 0x1F
+    g5 = (values >> 5) & 0x1F
+    b5 = values & 0x1F
+    a3 = (values >> 12) & 0x7
+
+    pixels = numpy.empty((len(values), 4), dtype=numpy.uint8)
+    pixels[:, 0] = numpy.where(opaque, (r5 << 3) | (r5 >> 2), ((values >> 8) & 0xF) * 17)
+    pixels[:, 1] = numpy.where(opaque, (g5 << 3) | (g5 >> 2), ((values >> 4) & 0xF) * 17)
+    pixels[:, 2] = numpy.where(opaque, (b5 << 3) | (b5 >> 2), (values & 0xF) * 17)
+    pixels[:, 3] = numpy.where(opaque, 255, (a3 << 5) | (a3 << 2) | (a3 >> 1))
+
+    return __untile(pixels.reshape(-1, 16, 4), width, height, TEX0Format.RGB5A3)
+
+def __decode_ia4(blob: bytes, width: int, height: int):
+    """
+    Decode a IA4 texture level whose 8x4 tiles hold 4 bits alpha and 4 bits intensity pixels
+    """
+    values = numpy.frombuffer(blob, dtype=numpy.uint8, count=TEX0Format.IA4.get_size(width, height))
+    intensity = (values & 0xF) * 17
+
+    pixels = numpy.empty((len(values), 4), dtype=numpy.uint8)
+    pixels[:, 0:3] = intensity[:, None]
+    pixels[:, 3] = (values >> 4) * 17
+
+    return __untile(pixels.reshape(-1, 32, 4), width, height, TEX0Format.IA4)
+
+def decode(blob: bytes, width: int, height: int, tex0: TEX0Format):
+    """
+    Decode a single TEX0 texture level with the specified width, height and format.
+    Return an array of RGBA pixels with shape (height, width, 4).
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to decode TEX0 textures')
+
+    if len(blob) < tex0.get_size(width, height):
+        raise ValueError('Texture data is too small for its size and format')
+
+    if tex0 == TEX0Format.CMPR:
+        return __decode_cmpr(blob, width, height)
+    elif tex0 == TEX0Format.RGB5A3:
+        return __decode_rgb5a3(blob, width, height)
+    else:
+        return __decode_ia4(blob, width, height)
+
+def decode_mipmap(blob: bytes, width: int, height: int, tex0: TEX0Format, mipmap: int):
+    """
+    Decode every level of a TEX0 texture with the specified width, height, format and mipmap count.
+    Return a list of arrays of RGBA pixels, one for each mip level.
+    """
+    levels = []
+    offset = 0
+
+    for level in range(mipmap):
+        w = max(1, width >> level)
+        h = max(1, height >> level)
+        levels.append(decode(memoryview(blob)[offset:], w, h, tex0))
+        offset += tex0.get_size(w, h)
+
+    return levels
+
+def __encode_cmpr(pixels, quality: Quality):
+    """
+    Encode a CMPR texture level, with 2x2 sub-blocks of BC1 in each 8x8 tile
+    """
+    tiles = dxt.blockify(pixels, 8, 8)
+
+    # Split each tile in its sub-blocks, from left to right, then top to bottom
+    blocks = tiles.reshape(-1, 2, 4, 2, 4, 4).transpose(0, 1, 3, 2, 4, 5).reshape(-1, 16, 4)
+
+    return __cmpr_to_bc1(dxt.encode_blocks(blocks, DDSFormat.BC1, quality)).tobytes()
+
+def __encode_rgb5a3(pixels):
+    """
+    Encode a RGB5A3 texture level, with RGB555 pixels when opaque and A3RGB444 pixels otherwise
+    """
+    tiles = dxt.blockify(pixels, 4, 4).reshape(-1, 4).astype(numpy.uint32)
+    r, g, b, a = tiles[:, 0], tiles[:, 1], tiles[:, 2], tiles[:, 3]
+    a3 = (a * 7 + 127) // 255
+
+    opaque = 0x8000 | (((r * 31 + 127) // 255) << 10) | (((g * 31 + 127) // 255) << 5) | ((b * 31 + 127) // 255)
+    translucent = (a3 << 12) | (((r * 15 + 127) // 255) << 8) | (((g * 15 + 127) // 255) << 4) | ((b * 15 + 127) // 255)
+
+    return numpy.where(a3 == 7, opaque, translucent).astype('>u2').tobytes()
+
+def __encode_ia4(pixels):
+    """
+    Encode a IA4 texture level, with the luma of each pixel as its intensity
+    """
+    tiles = dxt.blockify(pixels, 8, 4).reshape(-1, 4).astype(numpy.uint32)
+    intensity = (tiles[:, 0] * 299 + tiles[:, 1] * 587 + tiles[:, 2] * 114 + 500) // 1000
+
+    return ((((tiles[:, 3] * 15 + 127) // 255) << 4) | ((intensity * 15 + 127) // 255)).astype(numpy.uint8).tobytes()
+
+def encode(pixels, tex0: TEX0Format, quality=Quality.HIGH):
+    """
+    Encode an array of RGBA pixels with shape (height, width, 4) to a single TEX0 texture level of the specified format.
+    The quality preset is used by the CMPR format.
+    """
+    if numpy == None:
+        raise RuntimeError('NumPy is required to encode TEX0 textures')
+
+    if tex0 == TEX0Format.CMPR:
+        return __encode_cmpr(pixels, quality)
+    elif tex0 == TEX0Format.RGB5A3:
+        return __encode_rgb5a3(pixels)
+    else:
+        return __encode_ia4(pixels)
+
+def encode_mipmap(levels: list, tex0: TEX0Format, quality=Quality.HIGH):
+    """
+    Encode a list of arrays of RGBA pixels, one for each mip level, to TEX0 texture levels of the specified format
+    """
+    return b''.join(encode(pixels, tex0, quality) for pixels in levels)
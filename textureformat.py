@@ -40,6 +40,8 @@ class BlockTextureFormat(TextureFormat):
 
         return size
 
+PVR_HEADER_SIZE = 52 # Size of the PVR 3 header, followed by its metadata block
+
 class PVRFormat(TextureFormat, Enum):
     """
     Enum of the supported iOS texture formats
@@ -56,6 +58,34 @@ class PVRFormat(TextureFormat, Enum):
         """
         return int.from_bytes(header[28:32], byteorder='little'), int.from_bytes(header[24:28], byteorder='little')
 
+    @staticmethod
+    def get_metadata_size_from_header(header: bytes):
+        """
+        Return the size of the metadata block following the PVR header of a texture
+        """
+        return int.from_bytes(header[48:52], byteorder='little')
+
+    def get_size(self, width: int, height: int):
+        """
+        Return the size of the texture with the specified width and height values, of 4 bits per pixel and at least 8x8 pixels
+        """
+        return max(8, width) * max(8, height) // 2
+
+    def get_size_mipmap(self, width: int, height: int, mipmap: int):
+        """
+        Return the size of the texture with specifed width, height and mipmap count
+        """
+        size = 0
+        w = width
+        h = height
+
+        for _ in range(mipmap):
+            size += self.get_size(w, h)
+            w //= 2
+            h //= 2
+
+        return size
+
 class DDSFormat(BlockTextureFormat, Enum):
     """
     Enum of the supported DDS texture formats
@@ -70,6 +100,16 @@ class DDSFormat(BlockTextureFormat, Enum):
         self.dxt = dxt
         self.compressed = compressed
 
+    def get_size(self, width: int, height: int):
+        """
+        Return the size of the texture with the specified width and height values
+        """
+        if not self.compressed:
+            # Uncompressed formats store their bits per pixel as size
+            return max(1, width) * max(1, height) * self.size // 8
+
+        return BlockTextureFormat.get_size(self, width, height)
+
     def get_pitch(self, width: int):
         """
         Return the pitch of the DDS texture with the specified width
@@ -124,6 +164,15 @@ class DDSFormat(BlockTextureFormat, Enum):
         """
         return int.from_bytes(header[16:20], byteorder='little'), int.from_bytes(header[12:16], byteorder='little')
 
+    @staticmethod
+    def from_img(value: int):
+        """
+        Return the DDS format associated with its IMG header value
+        """
+        if value in DDS_FORMATS:
+            return DDS_FORMATS[value]
+        raise ValueError('Unknown format')
+
     @staticmethod
     def from_string(value: str):
         """
@@ -176,6 +225,15 @@ class TEX0Format(BlockTextureFormat, Enum):
         """
         return int.from_bytes(header[28:30], byteorder='big'), int.from_bytes(header[30:32], byteorder='big')
 
+    @staticmethod
+    def from_img(value: int):
+        """
+        Return the TEX0 format associated with its IMG header value
+        """
+        if value in TEX0_FORMATS:
+            return TEX0_FORMATS[value]
+        raise ValueError('Unknown format')
+
     @staticmethod
     def from_string(value: str):
         """
@@ -184,4 +242,8 @@ class TEX0Format(BlockTextureFormat, Enum):
         for tex0 in TEX0Format:
             if value == tex0.name:
                 return tex0
-        raise ValueError('Unknown format')
\ No newline at end of file
+        raise ValueError('Unknown format')
+
+# Reverse lookups of the IMG header values
+DDS_FORMATS = {dds.img: dds for dds in DDSFormat}
+TEX0_FORMATS = {tex0.img: tex0 for tex0 in TEX0Format}